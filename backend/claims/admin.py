@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Claim, ValidationJob
+from .models import Claim, JobStageTiming, UploadSession, ValidationJob
 
 
 @admin.register(Claim)
@@ -18,3 +18,20 @@ class ValidationJobAdmin(admin.ModelAdmin):
     search_fields = ['job_id']
     readonly_fields = ['job_id', 'created_at', 'completed_at']
     ordering = ['-created_at']
+
+
+@admin.register(JobStageTiming)
+class JobStageTimingAdmin(admin.ModelAdmin):
+    list_display = ['job', 'task_id', 'stage', 'duration_seconds', 'rows', 'rows_per_second', 'query_count', 'created_at']
+    list_filter = ['stage', 'created_at']
+    search_fields = ['job__job_id', 'task_id']
+    ordering = ['-created_at']
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['upload_id', 'status', 'filename', 'size', 'job', 'created_by', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['upload_id', 'filename']
+    readonly_fields = ['upload_id', 'checksum', 'created_at', 'updated_at']
+    ordering = ['-created_at']
@@ -0,0 +1,109 @@
+"""
+Server-sent events for validation job progress.
+
+``GET /api/jobs/{id}/events/`` streams the snapshots the worker publishes to
+the job's Redis channel (see claims.progress), so a client watching a job
+costs one query when it connects and none afterwards. The stream ends once
+the job completes or fails; the client reconnects if it is cut earlier.
+
+The access token is sent in the Authorization header like for every other
+endpoint (the frontend reads the stream with ``fetch`` rather than
+``EventSource``), so it never appears in URLs or access logs.
+
+Streaming needs an ASGI server: this view is served by the separate ASGI
+process (rcm_project/asgi.py, ``events`` in the Procfile); under WSGI the
+response is only sent when the stream ends.
+"""
+import asyncio
+import json
+
+import redis.asyncio as aioredis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from . import progress
+from .models import ValidationJob
+
+# Sent when Redis is unavailable: the client reconnects (and re-reads the job) after this delay
+RETRY_MILLISECONDS = 5000
+
+
+def _authenticate(request):
+    """User for the access token in the Authorization header"""
+    result = JWTAuthentication().authenticate(request)
+    if result is None:
+        raise AuthenticationFailed('Authentication credentials were not provided.')
+    return result[0]
+
+
+def _load_snapshot(pk):
+    job = ValidationJob.objects.filter(pk=pk).first()
+    return progress.job_progress_snapshot(job) if job else None
+
+
+def _event(payload: str) -> str:
+    return f'event: progress\ndata: {payload}\n\n'
+
+
+def _is_finished(payload: str) -> bool:
+    return json.loads(payload)['status'] in progress.TERMINAL_JOB_STATUSES
+
+
+async def _job_event_stream(pk, snapshot):
+    client = aioredis.Redis.from_url(settings.PROGRESS_REDIS_URL)
+    pubsub = client.pubsub()
+    try:
+        try:
+            await pubsub.subscribe(progress.job_channel(pk))
+            # Read the latest snapshot after subscribing so no update is missed in between
+            cached = await client.get(progress.job_snapshot_key(pk))
+        except Exception as e:
+            print(f"Job events unavailable for job {pk}: {str(e)}")
+            yield f'retry: {RETRY_MILLISECONDS}\n' + _event(json.dumps(snapshot))
+            return
+        
+        payload = cached.decode() if cached else json.dumps(snapshot)
+        yield _event(payload)
+        if _is_finished(payload):
+            return
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.JOB_EVENTS_MAX_SECONDS
+        while loop.time() < deadline:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=settings.JOB_EVENTS_KEEPALIVE_SECONDS
+            )
+            if message is None:
+                yield ': keepalive\n\n'
+                continue
+            payload = message['data'].decode()
+            yield _event(payload)
+            if _is_finished(payload):
+                return
+    finally:
+        try:
+            await pubsub.aclose()
+            await client.aclose()
+        except Exception:
+            pass
+
+
+async def job_events(request, pk):
+    """Stream progress events for one validation job"""
+    try:
+        await sync_to_async(_authenticate)(request)
+    except (AuthenticationFailed, InvalidToken, TokenError) as e:
+        return JsonResponse({'detail': str(e)}, status=401)
+    
+    snapshot = await sync_to_async(_load_snapshot)(pk)
+    if snapshot is None:
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+    
+    response = StreamingHttpResponse(_job_event_stream(pk, snapshot), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx must not buffer the stream
+    return response
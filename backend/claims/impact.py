@@ -0,0 +1,130 @@
+"""
+Dry-run impact of a candidate rule set on the stored claims.
+
+Each claim is re-evaluated with the candidate rules and compared with a
+baseline: its stored ``status`` / ``error_type``, or in A/B mode the result
+of a second rule plan evaluated on the same claim data. Nothing is written.
+``ImpactSummary`` keeps the confusion matrix of error type transitions and
+the paid amount per error type under both, and counts the claims (and paid
+amount) that would change, broken down by error type transition, service
+code and facility, with a sample of flipped claim ids. Shards build partial
+summaries that are merged with ``ImpactSummary.merge``; ``as_dict`` is
+JSON-safe (amounts as strings) so it can travel through Celery results.
+
+Only static rules are evaluated: the LLM step never changes a claim's
+status or error type, so the dry run skips it.
+"""
+from decimal import Decimal
+
+
+def _bucket():
+    return {'count': 0, 'paid_amount': Decimal('0.00')}
+
+
+class ImpactSummary:
+    """Differences between stored results and a candidate rule plan's results"""
+
+    def __init__(self, sample_size: int = 0):
+        self.sample_size = sample_size
+        self.evaluated = 0
+        self.changed = 0
+        self.flipped = _bucket()
+        self.to_validated = _bucket()
+        self.to_not_validated = _bucket()
+        self.by_error_type = {}
+        self.by_service = {}
+        self.by_facility = {}
+        self.sample = []
+        # matrix[baseline error_type][candidate error_type] = claims
+        self.matrix = {}
+        # paid_amount[error_type] = {'baseline': amount, 'candidate': amount}
+        self.paid_amount = {}
+
+    def add(self, claim, result: dict, baseline: dict = None):
+        """
+        Compare one claim's candidate validation result with ``baseline``
+        (another plan's result; the claim's stored result if None)
+        """
+        if baseline is None:
+            baseline = {'status': claim.status, 'error_type': claim.error_type}
+        self.evaluated += 1
+        amount = claim.paid_amount_aed or Decimal('0.00')
+        row = self.matrix.setdefault(baseline['error_type'], {})
+        row[result['error_type']] = row.get(result['error_type'], 0) + 1
+        self._paid_amount(baseline['error_type'])['baseline'] += amount
+        self._paid_amount(result['error_type'])['candidate'] += amount
+        if result['error_type'] == baseline['error_type'] and result['status'] == baseline['status']:
+            return
+        self.changed += 1
+        transition = f"{baseline['error_type']}->{result['error_type']}"
+        self._count(self.by_error_type.setdefault(transition, _bucket()), amount)
+        if result['status'] == baseline['status']:
+            return
+
+        # Status flips: validated <-> not_validated
+        self._count(self.flipped, amount)
+        self._count(self.to_validated if result['status'] == 'validated' else self.to_not_validated, amount)
+        self._count(self.by_service.setdefault(claim.service_code, _bucket()), amount)
+        self._count(self.by_facility.setdefault(claim.facility_id, _bucket()), amount)
+        if len(self.sample) < self.sample_size:
+            self.sample.append(claim.claim_id)
+
+    def _paid_amount(self, error_type):
+        return self.paid_amount.setdefault(error_type, {'baseline': Decimal('0.00'), 'candidate': Decimal('0.00')})
+
+    def _count(self, bucket, amount):
+        bucket['count'] += 1
+        bucket['paid_amount'] += amount
+
+    def merge(self, other: dict):
+        """Add a partial summary (``as_dict`` output of another shard)"""
+        self.evaluated += other['evaluated']
+        self.changed += other['changed']
+        for name in ('flipped', 'to_validated', 'to_not_validated'):
+            self._merge_bucket(getattr(self, name), other[name])
+        for name in ('by_error_type', 'by_service', 'by_facility'):
+            groups = getattr(self, name)
+            for key, bucket in other[name].items():
+                self._merge_bucket(groups.setdefault(key, _bucket()), bucket)
+        self.sample.extend(other['sample'][:max(self.sample_size - len(self.sample), 0)])
+        for baseline, row in other['matrix'].items():
+            merged = self.matrix.setdefault(baseline, {})
+            for candidate, count in row.items():
+                merged[candidate] = merged.get(candidate, 0) + count
+        for error_type, amounts in other['paid_amount_by_error_type'].items():
+            for side in ('baseline', 'candidate'):
+                self._paid_amount(error_type)[side] += Decimal(amounts[side])
+
+    def _merge_bucket(self, bucket, other):
+        bucket['count'] += other['count']
+        bucket['paid_amount'] += Decimal(other['paid_amount'])
+
+    def as_dict(self):
+        def encode(bucket):
+            return {'count': bucket['count'], 'paid_amount': str(bucket['paid_amount'])}
+
+        def encode_groups(groups):
+            # Largest impact first
+            ordered = sorted(groups.items(), key=lambda item: (-item[1]['count'], item[0]))
+            return {key: encode(bucket) for key, bucket in ordered}
+
+        return {
+            'evaluated': self.evaluated,
+            'changed': self.changed,
+            'flipped': encode(self.flipped),
+            'to_validated': encode(self.to_validated),
+            'to_not_validated': encode(self.to_not_validated),
+            'by_error_type': encode_groups(self.by_error_type),
+            'by_service': encode_groups(self.by_service),
+            'by_facility': encode_groups(self.by_facility),
+            'sample': list(self.sample),
+            'matrix': {baseline: dict(sorted(row.items())) for baseline, row in sorted(self.matrix.items())},
+            'paid_amount_by_error_type': {
+                error_type: {
+                    'baseline': str(amounts['baseline']),
+                    'candidate': str(amounts['candidate']),
+                    'delta': str(amounts['candidate'] - amounts['baseline']),
+                }
+                for error_type, amounts in sorted(self.paid_amount.items())
+            },
+        }
@@ -0,0 +1,73 @@
+"""
+Streaming JSON ingestion (``POST /api/jobs/ingest/``).
+
+The request body - NDJSON, or a JSON array of claim objects - is decoded
+incrementally by ``RecordDecoder``: it is fed the body as the server
+receives it and yields each complete object as soon as it has arrived, so
+memory use does not depend on the body size. The endpoint
+(claims/stream_ingest.py) groups the claims into micro-batches of
+INGEST_MICRO_BATCH_SIZE (or whatever arrived within
+INGEST_MICRO_BATCH_SECONDS) and queues each one to ``process_claim_batch``
+while the rest of the body is still being received.
+
+Every record is also appended to an NDJSON claims file for the job, so a
+stream job can be resumed like an uploaded file (``read_claims_file``).
+"""
+import codecs
+import json
+
+import pandas as pd
+
+from .preflight import canonical_columns
+
+# Largest single claim object accepted; guards the buffer against a body
+# that never completes an object
+INGEST_MAX_RECORD_BYTES = 1024 * 1024
+
+# Characters between records: NDJSON newlines, or the brackets and commas of an array
+SEPARATORS = ' \t\r\n,[]'
+
+
+class IngestError(ValueError):
+    """The request body is not NDJSON or a JSON array of objects"""
+
+
+class RecordDecoder:
+    """Incremental decoder of an NDJSON or JSON array body, fed the body as it arrives"""
+
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+
+    def feed(self, data: bytes, final: bool = False):
+        """Yield each top-level JSON value completed by ``data``; ``final`` marks the end of the body"""
+        try:
+            self.buffer += self.utf8.decode(data, final=final)
+        except UnicodeDecodeError as e:
+            raise IngestError('Body is not UTF-8') from e
+        position = 0
+        try:
+            while True:
+                while position < len(self.buffer) and self.buffer[position] in SEPARATORS:
+                    position += 1
+                if position == len(self.buffer):
+                    return
+                try:
+                    record, position = self.decoder.raw_decode(self.buffer, position)
+                except json.JSONDecodeError as e:
+                    if final:
+                        raise IngestError(f'Invalid JSON: {e.msg}') from e
+                    if len(self.buffer) - position > INGEST_MAX_RECORD_BYTES:
+                        raise IngestError(f'Claim object larger than {INGEST_MAX_RECORD_BYTES} bytes') from e
+                    return
+                yield record
+        finally:
+            self.buffer = self.buffer[position:]
+
+
+def claims_frame(records, start_row: int) -> pd.DataFrame:
+    """Claim records as the DataFrame chunk process_claim_chunk expects (rows numbered from start_row)"""
+    frame = pd.DataFrame.from_records(records, index=range(start_row, start_row + len(records)))
+    frame.columns = canonical_columns(frame.columns)
+    return frame
@@ -0,0 +1,90 @@
+"""
+Stage timings for the validation pipeline.
+
+``StageTimer.stage(name)`` measures the wall time of a block and counts the
+queries it sends on the default connection (``connection.execute_wrapper``).
+A stage entered several times - once per chunk or batch - accumulates, and
+``save()`` writes one JobStageTiming row per stage. Stages must not be
+nested, or the inner queries are counted twice.
+"""
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+from .models import JobStageTiming
+
+
+class StageTimer:
+    """Per-stage wall time, row and query totals of one task run"""
+
+    def __init__(self, job=None, task_id=''):
+        self.job = job
+        self.task_id = task_id or ''
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name, rows=0):
+        """Time a block as part of ``name``; rows may also be added to the yielded totals"""
+        totals = self.stages.setdefault(name, {'seconds': 0.0, 'rows': 0, 'queries': 0})
+        totals['rows'] += rows
+
+        def count_query(execute, sql, params, many, context):
+            totals['queries'] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_query):
+                yield totals
+        finally:
+            totals['seconds'] += time.perf_counter() - started
+
+    def timings(self):
+        """Unsaved JobStageTiming rows, in the order the stages first ran"""
+        return [
+            JobStageTiming(
+                job=self.job,
+                task_id=self.task_id,
+                stage=name,
+                duration_seconds=totals['seconds'],
+                rows=totals['rows'],
+                rows_per_second=totals['rows'] / totals['seconds'] if totals['seconds'] > 0 else 0,
+                query_count=totals['queries'],
+            )
+            for name, totals in self.stages.items()
+        ]
+
+    def summary(self):
+        return [timing.as_dict() for timing in self.timings()]
+
+    def save(self):
+        """Persist the timings; failures are logged so they never fail the task"""
+        timings = self.timings()
+        for timing in timings:
+            print(
+                f"Stage {timing.stage}: {timing.duration_seconds:.3f}s, {timing.rows} rows "
+                f"({timing.rows_per_second:.1f} rows/s), {timing.query_count} queries"
+            )
+        try:
+            JobStageTiming.objects.bulk_create(timings)
+        except Exception as e:
+            print(f"Could not save stage timings: {str(e)}")
+
+
+def stage_totals(timings):
+    """
+    Sum JobStageTiming rows of several runs (e.g. the shards of one
+    revalidation) per stage; rows/sec is over the summed worker time.
+    """
+    totals = {}
+    for timing in timings:
+        stage = totals.setdefault(timing.stage, {'stage': timing.stage, 'duration_seconds': 0.0, 'rows': 0, 'query_count': 0})
+        stage['duration_seconds'] += timing.duration_seconds
+        stage['rows'] += timing.rows
+        stage['query_count'] += timing.query_count
+    for stage in totals.values():
+        seconds = stage['duration_seconds']
+        stage['rows_per_second'] = round(stage['rows'] / seconds, 1) if seconds > 0 else 0
+        stage['duration_seconds'] = round(seconds, 4)
+    return list(totals.values())
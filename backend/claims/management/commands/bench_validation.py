@@ -0,0 +1,145 @@
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import redirect_stdout
+
+import pandas as pd
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from claims.models import Claim, Metrics, ValidationJob
+from claims.synthetic import CLAIM_COLUMNS, generate_claim_rows
+from claims.tasks import process_claims_file
+from rules import cache as rules_cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Run process_claims_file on synthetic claim files and print per-stage timings '
+        '(rule parsing, file reading, static rules, persistence, metrics) as JSON. '
+        'LLM enrichment is queued on the llm queue and only timed if it runs in this process. '
+        'Each run starts with a cold rules cache unless --warm-rules is passed. '
+        'Runs against the configured database; benchmark rows are deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Claims per synthetic file')
+        parser.add_argument('--error-rate', type=float, default=0.3, help='Share of rows that break one rule')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=3, help='Runs; each uses a fresh file and claim ids')
+        parser.add_argument('--chunk-size', type=int, default=None, help='INGEST_CHUNK_SIZE override')
+        parser.add_argument('--with-llm', action='store_true', help='Keep OPENAI_API_KEY (LLM calls are off by default)')
+        parser.add_argument('--warm-rules', action='store_true',
+                            help='Keep compiled rule plans cached between runs; medians cover the warm runs')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark jobs and claims')
+        parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        overrides = {'INGEST_CHUNK_SIZE': options['chunk_size'] or settings.INGEST_CHUNK_SIZE}
+        if not options['with_llm']:
+            overrides['OPENAI_API_KEY'] = ''
+
+        runs = []
+        # Pipeline print() logging goes to stderr, keeping stdout for the JSON
+        with override_settings(**overrides), redirect_stdout(sys.stderr):
+            for i in range(options['repeat']):
+                rows = self._rows(options['rows'], options['error_rate'], options['seed'] + i)
+                # Otherwise every run after the first reuses the cached plans and load_rules is ~0
+                cold = i == 0 or not options['warm_rules']
+                if cold:
+                    rules_cache.invalidate()
+                runs.append(self._run(rows, options['keep']))
+                runs[-1]['rules_cache'] = 'cold' if cold else 'warm'
+                self.stderr.write(
+                    f"Run {i + 1}/{options['repeat']} ({runs[-1]['rules_cache']} rules): "
+                    f"{runs[-1]['total_seconds']:.2f}s ({runs[-1]['rows_per_second']:.1f} rows/s)"
+                )
+
+        # With --warm-rules the cold first run is reported but left out of the medians
+        measured = [run for run in runs if run['rules_cache'] == 'warm'] if options['warm_rules'] else runs
+        results = {
+            'benchmark': 'bench_validation',
+            'commit': self._commit(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'rows': options['rows'],
+            'error_rate': options['error_rate'],
+            'seed': options['seed'],
+            'chunk_size': overrides['INGEST_CHUNK_SIZE'],
+            'llm': options['with_llm'],
+            'warm_rules': options['warm_rules'],
+            'runs': runs,
+            'median': self._median(measured or runs),
+        }
+        payload = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(payload + '\n')
+        else:
+            self.stdout.write(payload)
+
+    def _rows(self, count, error_rate, seed):
+        run = uuid.uuid4().hex[:8]
+        rows = pd.DataFrame(list(generate_claim_rows(count, error_rate=error_rate, seed=seed)), columns=CLAIM_COLUMNS)
+        rows.insert(0, 'claim_id', [f'BENCH-{run}-{i}' for i in range(count)])
+        return rows
+
+    def _run(self, rows, keep):
+        buffer = io.BytesIO()
+        rows.to_excel(buffer, index=False)
+        job = ValidationJob.objects.create(job_id=f'bench-{uuid.uuid4().hex[:12]}')
+        job.claims_file.save('bench_claims.xlsx', ContentFile(buffer.getvalue()))
+
+        started = time.perf_counter()
+        result = process_claims_file.apply(args=(job.job_id,)).get()
+        total_seconds = time.perf_counter() - started
+        if result['status'] != 'completed':
+            raise RuntimeError(f"Benchmark job failed: {result.get('error')}")
+
+        run = {
+            'total_seconds': round(total_seconds, 4),
+            'rows_per_second': round(len(rows) / total_seconds, 1),
+            'validated': result['validated'],
+            'errors': result['errors'],
+            'stages': [timing.as_dict() for timing in job.stage_timings.all()],
+        }
+        if not keep:
+            Claim.objects.filter(claim_id__in=list(rows['claim_id'])).delete()
+            Metrics.objects.filter(job=job).delete()
+            job.claims_file.delete(save=False)
+            job.delete()
+        return run
+
+    def _median(self, runs):
+        stages = {}
+        for run in runs:
+            for stage in run['stages']:
+                stages.setdefault(stage['stage'], []).append(stage)
+        return {
+            'total_seconds': round(statistics.median(run['total_seconds'] for run in runs), 4),
+            'rows_per_second': round(statistics.median(run['rows_per_second'] for run in runs), 1),
+            'stages': {
+                name: {
+                    field: statistics.median(timing[field] for timing in timings)
+                    for field in ('duration_seconds', 'rows_per_second', 'query_count')
+                }
+                for name, timings in stages.items()
+            },
+        }
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
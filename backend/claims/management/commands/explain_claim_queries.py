@@ -0,0 +1,179 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+from django.db.models import Count, Sum
+
+from claims.models import Claim, Metrics, RefinedClaim, ValidationJob
+from claims.synthetic import generate_claim_rows
+
+# Indexes added by 0006_tuned_query_indexes, per model
+TUNED_INDEXES = {
+    Claim: ['claims_clai_status_created_idx', 'claims_clai_error_created_idx', 'claims_clai_svc_created_idx'],
+    RefinedClaim: ['claims_refi_error_paid_idx', 'claims_refi_job_error_idx', 'claims_refi_job_status_idx', 'claims_refi_job_llm_idx'],
+    Metrics: ['claims_metr_type_end_idx'],
+}
+
+# Single-column indexes they replaced
+BASELINE_INDEXES = {
+    Claim: [
+        models.Index(fields=['status'], name='claims_clai_status_b4f911_idx'),
+        models.Index(fields=['error_type'], name='claims_clai_error_t_336f61_idx'),
+        models.Index(fields=['service_code'], name='claims_clai_service_b7fc43_idx'),
+    ],
+    RefinedClaim: [
+        models.Index(fields=['error_type'], name='claims_refi_error_t_c5caa1_idx'),
+        models.Index(fields=['static_rule_validated'], name='claims_refi_static__c5b56b_idx'),
+        models.Index(fields=['llm_validated'], name='claims_refi_llm_val_63595c_idx'),
+    ],
+    Metrics: [
+        models.Index(fields=['period_type'], name='claims_metr_period__622139_idx'),
+    ],
+}
+
+ERROR_TYPE_WEIGHTS = {'no_error': 60, 'technical_error': 20, 'medical_error': 15, 'both': 5}
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic claim dataset, then print timings and query plans for the hot '
+        'claim queries with the baseline and the tuned indexes. Everything is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--claims', type=int, default=20000, help='Number of synthetic claims to create')
+        parser.add_argument('--jobs', type=int, default=20, help='Number of jobs the refined claims are spread over')
+        parser.add_argument('--repeat', type=int, default=5, help='Executions per query for timing')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--no-plans', action='store_true', help='Only print timings')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Database: {connection.vendor}, {options['claims']} synthetic claims")
+
+        with transaction.atomic():
+            jobs = self._seed(options['claims'], options['jobs'], options['seed'])
+            queries = self._hot_queries(jobs[len(jobs) // 2])
+
+            self._analyze()
+            tuned = self._measure(queries, options['repeat'])
+
+            self._swap_indexes(drop=TUNED_INDEXES, create=BASELINE_INDEXES)
+            self._analyze()
+            baseline = self._measure(queries, options['repeat'])
+
+            transaction.set_rollback(True)
+
+        for name in queries:
+            before_ms, before_plan = baseline[name]
+            after_ms, after_plan = tuned[name]
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{name}: {before_ms:.2f} ms -> {after_ms:.2f} ms'
+            ))
+            if not options['no_plans']:
+                self.stdout.write('  before:')
+                self.stdout.write(self._indent(before_plan))
+                self.stdout.write('  after:')
+                self.stdout.write(self._indent(after_plan))
+
+    def _seed(self, count, job_count, seed):
+        rng = random.Random(seed)
+        run = uuid.uuid4().hex[:8]
+        jobs = [
+            ValidationJob.objects.create(job_id=f'bench-{run}-{i}', status='completed')
+            for i in range(job_count)
+        ]
+        error_types = list(ERROR_TYPE_WEIGHTS)
+        weights = list(ERROR_TYPE_WEIGHTS.values())
+
+        claims = []
+        for i, row in enumerate(generate_claim_rows(count, seed=seed)):
+            error_type = rng.choices(error_types, weights)[0]
+            claims.append(Claim(
+                claim_id=f'BENCH-{run}-{i}',
+                encounter_type=row['encounter_type'].lower(),
+                service_date=datetime.strptime(row['service_date'], '%m/%d/%y').date(),
+                national_id=row['national_id'],
+                member_id=row['member_id'],
+                facility_id=row['facility_id'],
+                unique_id=row['unique_id'],
+                diagnosis_codes=row['diagnosis_codes'],
+                service_code=row['service_code'],
+                paid_amount_aed=Decimal(str(row['paid_amount_aed'])),
+                approval_number=row['approval_number'],
+                status='validated' if error_type == 'no_error' else 'not_validated',
+                error_type=error_type,
+            ))
+        claims = Claim.objects.bulk_create(claims, batch_size=1000)
+
+        RefinedClaim.objects.bulk_create([
+            RefinedClaim(
+                claim=claim,
+                service_code=claim.service_code,
+                paid_amount_aed=claim.paid_amount_aed,
+                status=claim.status,
+                error_type=claim.error_type,
+                static_rule_validated=True,
+                llm_validated=claim.error_type != 'no_error' and rng.random() < 0.1,
+                processed_by_job=jobs[i % job_count],
+            )
+            for i, claim in enumerate(claims)
+        ], batch_size=1000)
+
+        for job in jobs:
+            Metrics.objects.create(period_start=job.created_at, period_end=job.created_at, job=job)
+        return jobs
+
+    def _hot_queries(self, job):
+        return {
+            'paid amount for one error type': Claim.objects.filter(error_type='medical_error')
+                .values('error_type').annotate(total=Sum('paid_amount_aed')).order_by(),
+            'claims list filtered by status': Claim.objects.filter(status='not_validated').order_by('-created_at')[:100],
+            'claims list filtered by service code': Claim.objects.filter(service_code='SRV2001').order_by('-created_at')[:100],
+            'job paid amount by error type': RefinedClaim.objects.filter(processed_by_job=job, error_type='technical_error')
+                .values('error_type').annotate(total=Sum('paid_amount_aed')).order_by(),
+            'job validated count': RefinedClaim.objects.filter(processed_by_job=job, status='validated')
+                .values('status').annotate(total=Count('id')).order_by(),
+            'job LLM-processed count': RefinedClaim.objects.filter(processed_by_job=job, llm_validated=True)
+                .values('processed_by_job').annotate(total=Count('id')).order_by(),
+            'latest job metrics': Metrics.objects.filter(period_type='job').order_by('-period_end')[:1],
+        }
+
+    def _measure(self, queries, repeat):
+        results = {}
+        for name, queryset in queries.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = (statistics.median(timings), queryset.explain())
+        return results
+
+    def _swap_indexes(self, drop, create):
+        # Raw statements: the SQLite schema editor cannot run inside atomic()
+        editor = connection.schema_editor(collect_sql=True)
+        with connection.cursor() as cursor:
+            for model, names in drop.items():
+                for index in model._meta.indexes:
+                    if index.name in names:
+                        cursor.execute(str(index.remove_sql(model, editor)))
+            for model, indexes in create.items():
+                for index in indexes:
+                    cursor.execute(str(index.create_sql(model, editor)))
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                for model in (Claim, RefinedClaim, Metrics):
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+            elif connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+
+    def _indent(self, text):
+        return '\n'.join(f'    {line}' for line in text.splitlines())
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from claims.models import UploadSession
+from claims.uploads import discard
+
+
+class Command(BaseCommand):
+    help = 'Abort chunked uploads that received no part for --hours and delete their staged parts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Idle time after which an open upload is aborted')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        stale = UploadSession.objects.filter(status='open', updated_at__lt=cutoff)
+        count = 0
+        for session in stale.iterator():
+            discard(session)
+            count += 1
+        stale.update(status='aborted', updated_at=timezone.now())
+        self.stdout.write(f'Aborted {count} idle upload sessions')
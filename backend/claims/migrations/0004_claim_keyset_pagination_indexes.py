@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0003_validationjob_analytics_pipeline_completed_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='claim',
+            index=models.Index(fields=['created_at', 'id'], name='claims_clai_created_c66a20_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='claim',
+            index=models.Index(fields=['paid_amount_aed', 'id'], name='claims_clai_paid_am_b0d049_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='claim',
+            index=models.Index(fields=['service_date', 'id'], name='claims_clai_service_fa71bc_idx'),
+        ),
+    ]
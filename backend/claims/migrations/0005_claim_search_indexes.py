@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:58
+
+import claims.postgres
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+from django.db import migrations
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0004_claim_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        # The extension and the indexes are no-ops outside PostgreSQL
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddIndex(
+            model_name='claim',
+            index=claims.postgres.PostgresGinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('claim_id'), name='gin_trgm_ops'), name='claims_claim_id_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='claim',
+            index=claims.postgres.PostgresGinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('national_id'), name='gin_trgm_ops'), name='claims_national_id_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='claim',
+            index=claims.postgres.PostgresGinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('member_id'), name='gin_trgm_ops'), name='claims_member_id_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='claim',
+            index=claims.postgres.PostgresGinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('facility_id'), name='gin_trgm_ops'), name='claims_facility_id_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='claim',
+            index=claims.postgres.PostgresGinIndex(django.contrib.postgres.search.SearchVector('error_explanation', config='english'), name='claims_error_expl_fts_idx'),
+        ),
+    ]
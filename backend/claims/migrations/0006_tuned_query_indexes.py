@@ -0,0 +1,74 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0005_claim_search_indexes'),
+    ]
+
+    operations = [
+        # New indexes are built before the ones they replace are dropped
+        migrations.AddIndex(
+            model_name='claim',
+            index=models.Index(fields=['status', '-created_at'], name='claims_clai_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='claim',
+            index=models.Index(fields=['error_type', '-created_at'], include=('paid_amount_aed',), name='claims_clai_error_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='claim',
+            index=models.Index(fields=['service_code', '-created_at'], name='claims_clai_svc_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='metrics',
+            index=models.Index(fields=['period_type', '-period_end'], name='claims_metr_type_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='refinedclaim',
+            index=models.Index(fields=['error_type'], include=('paid_amount_aed',), name='claims_refi_error_paid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='refinedclaim',
+            index=models.Index(fields=['processed_by_job', 'error_type'], include=('paid_amount_aed',), name='claims_refi_job_error_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='refinedclaim',
+            index=models.Index(fields=['processed_by_job', 'status'], name='claims_refi_job_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='refinedclaim',
+            index=models.Index(condition=models.Q(('llm_validated', True)), fields=['processed_by_job'], name='claims_refi_job_llm_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='claim',
+            name='claims_clai_status_b4f911_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='claim',
+            name='claims_clai_error_t_336f61_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='claim',
+            name='claims_clai_service_b7fc43_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='metrics',
+            name='claims_metr_period__622139_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='refinedclaim',
+            name='claims_refi_error_t_c5caa1_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='refinedclaim',
+            name='claims_refi_static__c5b56b_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='refinedclaim',
+            name='claims_refi_llm_val_63595c_idx',
+        ),
+    ]
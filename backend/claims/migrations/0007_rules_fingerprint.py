@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0006_tuned_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='claim',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', help_text="SHA-256 of the claim's input columns", max_length=64),
+        ),
+        migrations.AddField(
+            model_name='claim',
+            name='rules_fingerprint',
+            field=models.CharField(blank=True, default='', help_text='Fingerprint of the rules that produced the status', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='refinedclaim',
+            name='rules_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='validationjob',
+            name='rules_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
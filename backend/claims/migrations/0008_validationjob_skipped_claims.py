@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0007_rules_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='validationjob',
+            name='skipped_claims',
+            field=models.IntegerField(default=0, help_text='Unchanged rows not revalidated (same content hash and rules)'),
+        ),
+    ]
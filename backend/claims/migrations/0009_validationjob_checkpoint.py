@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0008_validationjob_skipped_claims'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='validationjob',
+            name='checkpoint_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='validationjob',
+            name='checkpoint_row',
+            field=models.IntegerField(default=0, help_text='Rows of the claims file committed so far; processing resumes here'),
+        ),
+    ]
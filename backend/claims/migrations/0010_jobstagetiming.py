@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0009_validationjob_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobStageTiming',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('stage', models.CharField(choices=[('load_rules', 'Load Rules'), ('ingestion', 'Ingestion'), ('static_rules', 'Static Rule Evaluation'), ('llm', 'LLM Evaluation'), ('persistence', 'Persistence'), ('metrics', 'Metrics Generation')], max_length=20)),
+                ('duration_seconds', models.FloatField(default=0)),
+                ('rows', models.IntegerField(default=0)),
+                ('rows_per_second', models.FloatField(default=0)),
+                ('query_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stage_timings', to='claims.validationjob')),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rules', '0001_initial'),
+        ('claims', '0010_jobstagetiming'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='validationjob',
+            name='rule_set',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='validation_jobs', to='rules.ruleset'),
+        ),
+    ]
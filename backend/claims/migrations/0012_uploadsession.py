@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rules', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('claims', '0011_validationjob_rule_set'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('upload_id', models.CharField(max_length=100, unique=True)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('completed', 'Completed'), ('aborted', 'Aborted')], default='open', max_length=20)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.BigIntegerField(help_text='Declared size of the whole file in bytes')),
+                ('checksum', models.CharField(help_text='Declared SHA-256 of the whole file (hex)', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('job', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_session', to='claims.validationjob')),
+                ('rule_set', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_sessions', to='rules.ruleset')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
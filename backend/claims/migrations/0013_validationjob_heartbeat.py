@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0012_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='validationjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='validationjob',
+            name='task_id',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
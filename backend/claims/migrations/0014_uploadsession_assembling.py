@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0013_validationjob_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='error_message',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='status',
+            field=models.CharField(choices=[('open', 'Open'), ('assembling', 'Assembling'), ('completed', 'Completed'), ('aborted', 'Aborted')], default='open', max_length=20),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0014_uploadsession_assembling'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StreamBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_row', models.IntegerField()),
+                ('end_row', models.IntegerField()),
+                ('final', models.BooleanField(default=False)),
+                ('validated_count', models.IntegerField(default=0)),
+                ('error_count', models.IntegerField(default=0)),
+                ('skipped_claims', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stream_batches', to='claims.validationjob')),
+            ],
+            options={
+                'ordering': ['start_row'],
+                'unique_together': {('job', 'start_row')},
+            },
+        ),
+    ]
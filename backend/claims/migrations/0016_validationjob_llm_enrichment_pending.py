@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0015_streambatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='validationjob',
+            name='llm_enrichment_pending',
+            field=models.IntegerField(default=0, help_text='enrich_claims tasks queued for the job and not finished yet'),
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import OpClass
+from .postgres import PostgresGinIndex, fulltext_vector
 
 
 class Claim(models.Model):
@@ -36,6 +39,10 @@ class Claim(models.Model):
     error_explanation = models.TextField(blank=True, help_text="Detailed explanation of errors")
     recommended_action = models.TextField(blank=True, help_text="Actionable recommendations")
     
+    # Versioning: the input columns and the rules the stored result was computed from
+    content_hash = models.CharField(max_length=64, blank=True, default='', help_text="SHA-256 of the claim's input columns")
+    rules_fingerprint = models.CharField(max_length=64, blank=True, default='', help_text="Fingerprint of the rules that produced the status")
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -45,9 +52,22 @@ class Claim(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['status']),
-            models.Index(fields=['error_type']),
-            models.Index(fields=['service_code']),
+            # Filtered list pages ordered by -created_at; the error_type index also
+            # covers paid_amount_aed so per-error-type sums are index-only scans
+            models.Index(fields=['status', '-created_at'], name='claims_clai_status_created_idx'),
+            models.Index(fields=['error_type', '-created_at'], include=['paid_amount_aed'], name='claims_clai_error_created_idx'),
+            models.Index(fields=['service_code', '-created_at'], name='claims_clai_svc_created_idx'),
+            # Keyset pagination: one (ordering field, id) index per allowed ordering
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['paid_amount_aed', 'id']),
+            models.Index(fields=['service_date', 'id']),
+            # ?search= (PostgreSQL only, see claims.search): trigram indexes serve
+            # UPPER(col) LIKE '%term%' and the tsvector index serves explanation search
+            PostgresGinIndex(OpClass(Upper('claim_id'), name='gin_trgm_ops'), name='claims_claim_id_trgm_idx'),
+            PostgresGinIndex(OpClass(Upper('national_id'), name='gin_trgm_ops'), name='claims_national_id_trgm_idx'),
+            PostgresGinIndex(OpClass(Upper('member_id'), name='gin_trgm_ops'), name='claims_member_id_trgm_idx'),
+            PostgresGinIndex(OpClass(Upper('facility_id'), name='gin_trgm_ops'), name='claims_facility_id_trgm_idx'),
+            PostgresGinIndex(fulltext_vector('error_explanation'), name='claims_error_expl_fts_idx'),
         ]
     
     def __str__(self):
@@ -75,6 +95,7 @@ class RefinedClaim(models.Model):
     llm_validated = models.BooleanField(default=False)
     static_rule_errors = models.TextField(blank=True, help_text="Errors from static rule evaluation")
     llm_analysis = models.TextField(blank=True, help_text="LLM-based analysis and recommendations")
+    rules_fingerprint = models.CharField(max_length=64, blank=True, default='')
     
     # Metadata
     processed_at = models.DateTimeField(auto_now_add=True)
@@ -85,10 +106,13 @@ class RefinedClaim(models.Model):
         ordering = ['-processed_at']
         indexes = [
             models.Index(fields=['status']),
-            models.Index(fields=['error_type']),
+            models.Index(fields=['error_type'], include=['paid_amount_aed'], name='claims_refi_error_paid_idx'),
             models.Index(fields=['service_code']),
-            models.Index(fields=['static_rule_validated']),
-            models.Index(fields=['llm_validated']),
+            # Per-job metrics: counts and paid amount sums by error type/status
+            models.Index(fields=['processed_by_job', 'error_type'], include=['paid_amount_aed'], name='claims_refi_job_error_idx'),
+            models.Index(fields=['processed_by_job', 'status'], name='claims_refi_job_status_idx'),
+            # Only the (rare) LLM-processed rows are indexed
+            models.Index(fields=['processed_by_job'], condition=models.Q(llm_validated=True), name='claims_refi_job_llm_idx'),
         ]
     
     def __str__(self):
@@ -143,7 +167,8 @@ class Metrics(models.Model):
         ordering = ['-period_end']
         indexes = [
             models.Index(fields=['period_start', 'period_end']),
-            models.Index(fields=['period_type']),
+            # Latest metrics lookup: filter(period_type=...).order_by('-period_end')
+            models.Index(fields=['period_type', '-period_end'], name='claims_metr_type_end_idx'),
             models.Index(fields=['job']),
         ]
         unique_together = [['period_start', 'period_end', 'period_type', 'job']]
@@ -172,14 +197,29 @@ class ValidationJob(models.Model):
     processed_claims = models.IntegerField(default=0)
     validated_count = models.IntegerField(default=0)
     error_count = models.IntegerField(default=0)
+    skipped_claims = models.IntegerField(default=0, help_text="Unchanged rows not revalidated (same content hash and rules)")
+    
+    # Resumable processing: rows before checkpoint_row are committed
+    checkpoint_row = models.IntegerField(default=0, help_text="Rows of the claims file committed so far; processing resumes here")
+    checkpoint_at = models.DateTimeField(null=True, blank=True)
+    # Run currently processing the job: its task id and last sign of life (claim or committed chunk)
+    task_id = models.CharField(max_length=255, blank=True, default='')
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
     
     # Pipeline stages
     data_validation_completed = models.BooleanField(default=False)
     static_rule_evaluation_completed = models.BooleanField(default=False)
     llm_evaluation_completed = models.BooleanField(default=False)
+    llm_enrichment_pending = models.IntegerField(default=0, help_text="enrich_claims tasks queued for the job and not finished yet")
     analytics_pipeline_completed = models.BooleanField(default=False)
     metrics_generated = models.BooleanField(default=False)
     
+    # RuleSet bound at submission (None: job rule files or the defaults)
+    rule_set = models.ForeignKey('rules.RuleSet', on_delete=models.SET_NULL, null=True, blank=True, related_name='validation_jobs')
+    
+    # Fingerprint of the rules the job validated with
+    rules_fingerprint = models.CharField(max_length=64, blank=True, default='')
+    
     error_message = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
@@ -190,3 +230,104 @@ class ValidationJob(models.Model):
     
     def __str__(self):
         return f"Job {self.job_id} - {self.status}"
+
+
+class UploadSession(models.Model):
+    """Chunked upload of a claims file: parts are staged on disk until completed (see claims/uploads.py)"""
+    
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('assembling', 'Assembling'),
+        ('completed', 'Completed'),
+        ('aborted', 'Aborted'),
+    ]
+    
+    upload_id = models.CharField(max_length=100, unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField(help_text="Declared size of the whole file in bytes")
+    checksum = models.CharField(max_length=64, help_text="Declared SHA-256 of the whole file (hex)")
+    
+    # RuleSet the job is bound to (None: the one active when the upload completes)
+    rule_set = models.ForeignKey('rules.RuleSet', on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_sessions')
+    job = models.OneToOneField(ValidationJob, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_session')
+    # Why the last completion attempt failed (assembly runs in the assemble_upload task)
+    error_message = models.TextField(blank=True, default='')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Upload {self.upload_id} - {self.status}"
+
+
+class StreamBatch(models.Model):
+    """
+    A validated micro-batch of a streamed job (POST /api/jobs/ingest/)
+    
+    Batches are validated in any order; each records its counts here and
+    the job's checkpoint advances over the batches contiguous with it.
+    """
+    
+    job = models.ForeignKey(ValidationJob, on_delete=models.CASCADE, related_name='stream_batches')
+    start_row = models.IntegerField()
+    end_row = models.IntegerField()
+    final = models.BooleanField(default=False)
+    
+    validated_count = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    skipped_claims = models.IntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['start_row']
+        unique_together = ['job', 'start_row']
+    
+    def __str__(self):
+        return f"Batch {self.start_row}-{self.end_row} of job {self.job_id}"
+
+
+class JobStageTiming(models.Model):
+    """Wall time, throughput and DB queries of one pipeline stage of a job or revalidation run"""
+    
+    STAGE_CHOICES = [
+        ('load_rules', 'Load Rules'),
+        ('ingestion', 'Ingestion'),
+        ('static_rules', 'Static Rule Evaluation'),
+        ('llm', 'LLM Evaluation'),
+        ('persistence', 'Persistence'),
+        ('metrics', 'Metrics Generation'),
+    ]
+    
+    # Validation job, or None for revalidation runs (identified by task_id)
+    job = models.ForeignKey(ValidationJob, on_delete=models.CASCADE, null=True, blank=True, related_name='stage_timings')
+    task_id = models.CharField(max_length=255, blank=True, db_index=True)
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES)
+    
+    duration_seconds = models.FloatField(default=0)
+    rows = models.IntegerField(default=0)
+    rows_per_second = models.FloatField(default=0)
+    query_count = models.IntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['created_at', 'id']
+    
+    def __str__(self):
+        return f"{self.stage} - {self.duration_seconds:.3f}s"
+    
+    def as_dict(self):
+        return {
+            'stage': self.stage,
+            'task_id': self.task_id,
+            'duration_seconds': round(self.duration_seconds, 4),
+            'rows': self.rows,
+            'rows_per_second': round(self.rows_per_second, 1),
+            'query_count': self.query_count,
+        }
@@ -0,0 +1,216 @@
+"""
+Pagination for the claims list endpoint.
+
+``/api/claims/`` supports two modes:
+
+* Page numbers (default, used by ClaimsTable): ``?page=N``. The exact
+  ``count`` can be skipped with ``?count=none`` or replaced by the query
+  planner's estimate with ``?count=estimate``.
+* Keyset: ``?pagination=cursor`` for the first page, then follow the
+  ``next``/``previous`` links. Each page seeks past the last row seen on
+  ``(ordering field, id)`` instead of using OFFSET, so page latency does not
+  grow with depth. No count is computed unless ``?count=exact`` or
+  ``?count=estimate`` is passed.
+"""
+import json
+import operator
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from functools import reduce
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset):
+    """Return the planner's row estimate for a queryset (exact count off PostgreSQL)"""
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count()
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class ClaimPagination(PageNumberPagination):
+    """Page number pagination with optional count modes and a keyset mode"""
+
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    count_modes = ('exact', 'estimate', 'none')
+    tiebreak_field = 'id'
+
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.keyset = (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == 'cursor'
+        )
+        self.count_mode = request.query_params.get(self.count_query_param)
+        if self.count_mode not in self.count_modes:
+            self.count_mode = 'none' if self.keyset else 'exact'
+
+        if self.keyset:
+            return self.paginate_keyset(queryset, request, view)
+        if self.count_mode != 'exact':
+            return self.paginate_lookahead(queryset, request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            payload = OrderedDict()
+            if self.count is not None:
+                payload['count'] = self.count
+            payload['next'] = self.get_next_link()
+            payload['previous'] = self.get_previous_link()
+            payload['results'] = data
+            return Response(payload)
+        if self.count_mode != 'exact':
+            return Response(OrderedDict([
+                ('count', self.count),
+                ('next', self.get_next_link()),
+                ('previous', self.get_previous_link()),
+                ('results', data),
+            ]))
+        return super().get_paginated_response(data)
+
+    def get_next_link(self):
+        if self.keyset:
+            return self.next_link
+        if self.count_mode != 'exact':
+            if not self.has_next:
+                return None
+            url = self.request.build_absolute_uri()
+            return replace_query_param(url, self.page_query_param, self.page_number + 1)
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.keyset:
+            return self.previous_link
+        if self.count_mode != 'exact':
+            if self.page_number <= 1:
+                return None
+            url = self.request.build_absolute_uri()
+            if self.page_number == 2:
+                return remove_query_param(url, self.page_query_param)
+            return replace_query_param(url, self.page_query_param, self.page_number - 1)
+        return super().get_previous_link()
+
+    # ------------------------------------------------------------------
+    # Page numbers without an exact count
+    # ------------------------------------------------------------------
+
+    def paginate_lookahead(self, queryset, request):
+        """Fetch one extra row to find out whether a next page exists"""
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = _positive_int(request.query_params.get(self.page_query_param, 1), strict=True)
+        except ValueError:
+            raise NotFound(self.invalid_page_message.format(page_number=request.query_params.get(self.page_query_param), message='Invalid page number'))
+
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.count = estimate_count(queryset) if self.count_mode == 'estimate' else None
+        return rows[:page_size]
+
+    # ------------------------------------------------------------------
+    # Keyset pagination
+    # ------------------------------------------------------------------
+
+    def paginate_keyset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        ordering = self.get_keyset_ordering(queryset, view)
+        position, reverse = self.decode_cursor(request, len(ordering))
+
+        if self.count_mode == 'exact':
+            self.count = queryset.count()
+        elif self.count_mode == 'estimate':
+            self.count = estimate_count(queryset)
+        else:
+            self.count = None
+
+        queryset = queryset.order_by(*[
+            ('-' if descending != reverse else '') + name for name, descending in ordering
+        ])
+        if position is not None:
+            queryset = queryset.filter(self.seek_filter(ordering, position, reverse))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_link = None
+        self.previous_link = None
+        if rows:
+            if has_more or reverse:
+                self.next_link = self.encode_cursor(self.get_position(rows[-1], ordering), reverse=False)
+            if (has_more and reverse) or (position is not None and not reverse):
+                self.previous_link = self.encode_cursor(self.get_position(rows[0], ordering), reverse=True)
+        return rows
+
+    def get_keyset_ordering(self, queryset, view):
+        """Ordering as ``[(field, descending), ...]`` with ``id`` appended as a tie-breaker"""
+        ordering = list(queryset.query.order_by) or list(getattr(view, 'ordering', None) or ['-created_at'])
+        fields = []
+        for item in ordering:
+            item = str(item)
+            fields.append((item.lstrip('-'), item.startswith('-')))
+        if self.tiebreak_field not in [name for name, _ in fields]:
+            fields.append((self.tiebreak_field, fields[0][1]))
+        return fields
+
+    def seek_filter(self, ordering, position, reverse):
+        """
+        Build ``(a, b) < (x, y)`` as ``a <= x AND (a < x OR (a = x AND b < y))``.
+
+        The leading ``a <= x`` term lets the database start the index scan at
+        the cursor position instead of filtering from the top of the index.
+        """
+        clauses = []
+        for i, (name, descending) in enumerate(ordering):
+            lookup = 'lt' if descending != reverse else 'gt'
+            clause = Q(**{f'{name}__{lookup}': position[i]})
+            for j, (previous_name, _) in enumerate(ordering[:i]):
+                clause &= Q(**{previous_name: position[j]})
+            clauses.append(clause)
+
+        name, descending = ordering[0]
+        leading = Q(**{f"{name}__{'lte' if descending != reverse else 'gte'}": position[0]})
+        return leading & reduce(operator.or_, clauses)
+
+    def get_position(self, instance, ordering):
+        opts = instance._meta
+        return [opts.get_field(name).value_to_string(instance) for name, _ in ordering]
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        encoded = urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.mode_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request, length):
+        """Return ``(position, reverse)``; position is ``None`` on the first page"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position = payload['p']
+            reverse = bool(payload.get('r', 0))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != length:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
@@ -0,0 +1,30 @@
+"""PostgreSQL-specific helpers shared by claim models, migrations and search"""
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+
+SEARCH_CONFIG = 'english'
+
+
+def fulltext_vector(field_name):
+    """tsvector expression used both by the full-text GIN index and by search queries"""
+    return SearchVector(field_name, config=SEARCH_CONFIG)
+
+
+class PostgresGinIndex(GinIndex):
+    """
+    GinIndex (trigram/full-text) that is only created on PostgreSQL.
+    
+    SQLite re-creates every index in ``Meta.indexes`` when it rebuilds a
+    table to add a column, so the index itself - not just the migration
+    that adds it - has to be a no-op there.
+    """
+    
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return ''
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+    
+    def remove_sql(self, model, schema_editor, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return ''
+        return super().remove_sql(model, schema_editor, **kwargs)
@@ -0,0 +1,129 @@
+"""
+Upload pre-flight for claims files.
+
+Before a ValidationJob is created, ``inspect`` reads only the header row
+and size metadata of the file: the worksheet dimension of an xlsx (openpyxl
+read-only mode, no rows are loaded) or the first PREFLIGHT_SAMPLE_BYTES of
+a csv. Files missing a required column are rejected at upload time instead
+of failing minutes later inside process_claims_file, and the estimated row
+count routes the job (claims/routing.py) and seeds ``total_claims``.
+
+Column names are matched the way ingestion reads them: stripped,
+lower-cased, spaces replaced by underscores, then mapped through
+``COLUMN_ALIASES`` (``canonical_columns``, shared with process_claims_file).
+"""
+import csv
+import io
+import os
+
+from django.conf import settings
+
+# Columns every claims file must have (claim_id and approval_number are optional)
+REQUIRED_COLUMNS = [
+    'encounter_type', 'service_date', 'national_id', 'member_id', 'facility_id',
+    'unique_id', 'diagnosis_codes', 'service_code', 'paid_amount_aed',
+]
+
+# Alternative (normalised) header names accepted for each column
+COLUMN_ALIASES = {
+    'claim_id': ['claim_no', 'claim_number', 'claimid'],
+    'encounter_type': ['encounter'],
+    'service_date': ['date_of_service'],
+    'diagnosis_codes': ['diagnosis_code', 'diagnosis'],
+    'paid_amount_aed': ['paid_amount', 'paid_amount_(aed)', 'amount_aed'],
+    'approval_number': ['approval_no', 'prior_approval_number'],
+}
+
+CLAIMS_FILE_EXTENSIONS = ('.xlsx', '.xls', '.csv')
+
+# Bytes of a csv read to find its header and average row length
+PREFLIGHT_SAMPLE_BYTES = 64 * 1024
+
+_ALIAS_LOOKUP = {alias: column for column, aliases in COLUMN_ALIASES.items() for alias in aliases}
+
+
+def normalize_column(name) -> str:
+    return str(name).strip().lower().replace(' ', '_')
+
+
+def canonical_columns(columns):
+    """Normalised column names with aliases mapped, unless the file also has the canonical column"""
+    normalized = [normalize_column(column) for column in columns]
+    present = set(normalized)
+    return [
+        _ALIAS_LOOKUP[column] if column in _ALIAS_LOOKUP and _ALIAS_LOOKUP[column] not in present else column
+        for column in normalized
+    ]
+
+
+def missing_columns(columns):
+    present = set(canonical_columns(columns))
+    return [column for column in REQUIRED_COLUMNS if column not in present]
+
+
+def inspect(source, name: str = None, size: int = None) -> dict:
+    """
+    Header and row estimate of a claims file (a path or an open binary file)
+
+    Returns ``{'columns', 'missing', 'estimated_rows'}``; ``columns`` is None
+    (and nothing is reported missing) when the header cannot be read without
+    loading the file, i.e. for legacy .xls files. An open file is rewound
+    afterwards.
+    """
+    name = name or str(source)
+    if size is None:
+        size = os.path.getsize(source) if isinstance(source, (str, os.PathLike)) else source.size
+    extension = os.path.splitext(name)[1].lower()
+
+    if extension == '.csv':
+        columns, estimated_rows = _inspect_csv(source, size)
+    elif extension == '.xlsx':
+        columns, estimated_rows = _inspect_xlsx(source, size)
+    else:
+        columns, estimated_rows = None, size // settings.CLAIMS_FILE_BYTES_PER_ROW
+    if not isinstance(source, (str, os.PathLike)):
+        source.seek(0)
+
+    return {
+        'columns': columns,
+        'missing': missing_columns(columns) if columns is not None else [],
+        'estimated_rows': estimated_rows,
+    }
+
+
+def _inspect_xlsx(source, size):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True)
+    try:
+        sheet = workbook.active
+        header = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        max_row = sheet.max_row
+    finally:
+        workbook.close()
+    columns = [column for column in header if column is not None]
+    if max_row:
+        return columns, max(max_row - 1, 0)  # header row
+    # Unsized worksheet
+    return columns, size // settings.CLAIMS_FILE_BYTES_PER_ROW
+
+
+def _inspect_csv(source, size):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as claims_file:
+            sample = claims_file.read(PREFLIGHT_SAMPLE_BYTES)
+    else:
+        sample = source.read(PREFLIGHT_SAMPLE_BYTES)
+
+    complete = len(sample) >= size
+    if not complete:
+        # Only whole lines count towards the average row length
+        sample = sample[:sample.rfind(b'\n') + 1]
+    lines = io.StringIO(sample.decode('utf-8-sig', errors='replace'), newline='')
+    header = next(csv.reader(lines), [])
+    columns = [column for column in header if column.strip()]
+
+    line_count = sample.count(b'\n') + (1 if complete and sample and not sample.endswith(b'\n') else 0)
+    if complete or not line_count:
+        return columns, max(line_count - 1, 0)
+    return columns, max(round(size / (len(sample) / line_count)) - 1, 0)
@@ -0,0 +1,132 @@
+"""
+Task progress kept in Redis.
+
+Each shard of a revalidation runs on its own worker, so per-task
+``update_state`` cannot express overall progress. Shards instead add their
+counts to one Redis hash per parent task id (``HINCRBY`` is atomic) and
+publish the totals under the parent id.
+
+Validation jobs publish snapshots of their progress (see below).
+"""
+import json
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+from .instrumentation import stage_totals
+
+KEY_PREFIX = 'rcm:progress:'
+# Counters of a run that never finishes are dropped after a day
+EXPIRE_SECONDS = 24 * 60 * 60
+
+
+@lru_cache(maxsize=None)
+def get_client():
+    return redis.Redis.from_url(settings.PROGRESS_REDIS_URL)
+
+
+def _key(task_id):
+    return f'{KEY_PREFIX}{task_id}'
+
+
+def start(task_id, **fields):
+    """Reset the counters for task_id, storing fixed fields such as the total"""
+    pipe = get_client().pipeline()
+    pipe.delete(_key(task_id))
+    pipe.hset(_key(task_id), mapping={'processed': 0, 'validated': 0, 'errors': 0, **fields})
+    pipe.expire(_key(task_id), EXPIRE_SECONDS)
+    pipe.execute()
+
+
+def increment(task_id, **counts):
+    """Atomically add counts and return all fields of the hash as ints"""
+    pipe = get_client().pipeline()
+    for field, amount in counts.items():
+        pipe.hincrby(_key(task_id), field, amount)
+    pipe.expire(_key(task_id), EXPIRE_SECONDS)
+    pipe.hgetall(_key(task_id))
+    values = pipe.execute()[-1]
+    return {field.decode(): int(value) for field, value in values.items()}
+
+
+def clear(task_id):
+    get_client().delete(_key(task_id))
+
+
+# ----------------------------------------------------------------------
+# Validation job progress: the worker stores the latest snapshot of each
+# job and publishes it on the job's channel, so the status endpoint and
+# the events stream (claims/events.py) are served without DB queries.
+# ----------------------------------------------------------------------
+
+JOB_KEY_PREFIX = 'rcm:job:'
+TERMINAL_JOB_STATUSES = ('completed', 'failed')
+
+
+def job_channel(job_pk):
+    return f'{JOB_KEY_PREFIX}{job_pk}:events'
+
+
+def job_snapshot_key(job_pk):
+    return f'{JOB_KEY_PREFIX}{job_pk}:snapshot'
+
+
+def job_progress_snapshot(job, stages=None):
+    """
+    Payload of /api/jobs/{id}/status/ and of each job progress event
+    
+    ``stages`` are the running task's stage timings; by default the
+    JobStageTiming rows saved for the job, summed per stage over its runs
+    (e.g. the batches of a streamed job).
+    """
+    if stages is None:
+        stages = stage_totals(job.stage_timings.all())
+    return {
+        'job_id': job.job_id,
+        'status': job.status,
+        'progress': {
+            'total': job.total_claims,
+            'processed': job.processed_claims,
+            'validated': job.validated_count,
+            'errors': job.error_count,
+            'skipped': job.skipped_claims,
+            'percentage': (job.processed_claims / job.total_claims * 100) if job.total_claims > 0 else 0
+        },
+        'checkpoint': {
+            'row': job.checkpoint_row,
+            'at': job.checkpoint_at.isoformat() if job.checkpoint_at else None,
+        },
+        'stages': stages,
+    }
+
+
+def publish_job_progress(job, stages=None):
+    """Store and publish the job's current snapshot; Redis errors are logged, never raised"""
+    _publish_job_snapshot(job, lambda: job_progress_snapshot(job, stages))
+
+
+def publish_job_requeued(job):
+    """
+    Store and publish a processing snapshot for a job queued to run again
+    (resume), so the previous run's terminal snapshot does not end the
+    status and events of the new run before it publishes
+    """
+    _publish_job_snapshot(job, lambda: {**job_progress_snapshot(job), 'status': 'processing'})
+
+
+def _publish_job_snapshot(job, snapshot):
+    try:
+        payload = json.dumps(snapshot())
+        pipe = get_client().pipeline()
+        pipe.set(job_snapshot_key(job.pk), payload, ex=EXPIRE_SECONDS)
+        pipe.publish(job_channel(job.pk), payload)
+        pipe.execute()
+    except Exception as e:
+        print(f"Could not publish progress for job {job.job_id}: {str(e)}")
+
+
+def get_job_progress(job_pk):
+    """Latest published snapshot of a job, or None"""
+    payload = get_client().get(job_snapshot_key(job_pk))
+    return json.loads(payload) if payload else None
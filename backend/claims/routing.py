@@ -0,0 +1,39 @@
+"""
+Queue selection for claim processing tasks.
+
+Celery workers consume three queues (see ``rcm_project/celery.py``):
+
+* ``interactive`` - small uploads, so they finish in seconds even while
+  bulk work is running
+* ``bulk`` - large uploads and full revalidation sweeps
+* ``llm`` - LLM enrichment, which is slow and rate limited by the API
+
+Uploads are routed by their estimated row count before the file is parsed.
+"""
+from django.conf import settings
+
+from .preflight import inspect
+
+
+def estimate_row_count(path: str) -> int:
+    """
+    Estimate the data rows of a claims file without parsing it (see
+    claims/preflight.py: worksheet dimension of an xlsx, sampled row length
+    of a csv, otherwise the file size divided by CLAIMS_FILE_BYTES_PER_ROW)
+    """
+    return inspect(path)['estimated_rows']
+
+
+def queue_for_rows(row_count: int) -> str:
+    return 'interactive' if row_count <= settings.INTERACTIVE_MAX_ROWS else 'bulk'
+
+
+def queue_for_job(job) -> str:
+    """Queue for process_claims_file based on the job's (pre-flight estimated) row count"""
+    if job.total_claims:
+        return queue_for_rows(job.total_claims)
+    try:
+        return queue_for_rows(estimate_row_count(job.claims_file.path))
+    except Exception as e:
+        print(f"Could not estimate rows for job {job.job_id}: {str(e)}")
+        return 'bulk'
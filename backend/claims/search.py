@@ -0,0 +1,56 @@
+"""
+Indexed search for claims.
+
+``?search=`` on ``/api/claims/`` matches each term against the identifier
+columns in ``search_fields`` and the free-text columns in
+``search_fulltext_fields``.
+
+On PostgreSQL the identifier lookups stay ``icontains`` (``UPPER(col) LIKE``)
+but are served by ``pg_trgm`` GIN indexes on ``UPPER(col)``, and free text
+is matched with ``to_tsvector``/``plainto_tsquery`` against an expression GIN
+index. Other databases (SQLite in development) fall back to plain
+``icontains`` on every column.
+"""
+import operator
+from functools import reduce
+
+from django.contrib.postgres.search import SearchQuery
+from django.db import connections
+from django.db.models import Q
+from rest_framework.filters import SearchFilter
+
+from .postgres import SEARCH_CONFIG, fulltext_vector
+
+
+class ClaimSearchFilter(SearchFilter):
+    """SearchFilter that also matches error explanations and uses the trigram/full-text indexes"""
+
+    def get_fulltext_fields(self, view, request):
+        return getattr(view, 'search_fulltext_fields', None) or []
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request) or []
+        fulltext_fields = self.get_fulltext_fields(view, request)
+        search_terms = self.get_search_terms(request)
+
+        if not search_terms or not (search_fields or fulltext_fields):
+            return queryset
+
+        use_fulltext = connections[queryset.db].vendor == 'postgresql'
+        if use_fulltext and fulltext_fields:
+            queryset = queryset.alias(**{
+                f'{field_name}_document': fulltext_vector(field_name)
+                for field_name in fulltext_fields
+            })
+
+        orm_lookups = [self.construct_search(str(search_field)) for search_field in search_fields]
+        conditions = []
+        for search_term in search_terms:
+            queries = [Q(**{orm_lookup: search_term}) for orm_lookup in orm_lookups]
+            for field_name in fulltext_fields:
+                if use_fulltext:
+                    queries.append(Q(**{f'{field_name}_document': SearchQuery(search_term, config=SEARCH_CONFIG)}))
+                else:
+                    queries.append(Q(**{f'{field_name}__icontains': search_term}))
+            conditions.append(reduce(operator.or_, queries))
+        return queryset.filter(reduce(operator.and_, conditions))
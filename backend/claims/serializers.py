@@ -1,9 +1,34 @@
 from rest_framework import serializers
-from .models import Claim, ValidationJob, RefinedClaim, Metrics
+from django.conf import settings
+from .models import Claim, ValidationJob, RefinedClaim, Metrics, UploadSession
+from .preflight import CLAIMS_FILE_EXTENSIONS, inspect
+from .uploads import received_parts
 from django.contrib.auth.models import User
 
 
-class ClaimSerializer(serializers.ModelSerializer):
+def preflight_claims_file(source, name=None, size=None):
+    """Pre-flight a claims file (claims/preflight.py), as a ValidationError if it cannot be processed"""
+    try:
+        result = inspect(source, name, size)
+    except Exception as e:
+        raise serializers.ValidationError(f"Could not read claims file: {str(e)}")
+    if result['missing']:
+        raise serializers.ValidationError(f"Claims file is missing required columns: {', '.join(result['missing'])}")
+    return result
+
+
+class DynamicFieldsMixin:
+    """Drop every field not listed in the ``fields`` serializer context entry"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get('fields')
+        if requested:
+            for field_name in set(self.fields) - set(requested):
+                self.fields.pop(field_name)
+
+
+class ClaimSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Claim model"""
     uploaded_by_username = serializers.CharField(source='uploaded_by.username', read_only=True)
     validated_by_username = serializers.CharField(source='validated_by.username', read_only=True)
@@ -14,10 +39,23 @@ class ClaimSerializer(serializers.ModelSerializer):
             'id', 'claim_id', 'encounter_type', 'service_date', 'national_id',
             'member_id', 'facility_id', 'unique_id', 'diagnosis_codes',
             'service_code', 'paid_amount_aed', 'approval_number',
-            'status', 'error_type', 'error_explanation', 'recommended_action',
+            'status', 'error_type', 'error_explanation', 'recommended_action', 'rules_fingerprint',
             'created_at', 'updated_at', 'uploaded_by_username', 'validated_by_username'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'uploaded_by_username', 'validated_by_username']
+        read_only_fields = ['id', 'rules_fingerprint', 'created_at', 'updated_at', 'uploaded_by_username', 'validated_by_username']
+
+
+class ClaimSummarySerializer(serializers.ModelSerializer):
+    """Slim claim representation for list pages (``?view=summary``) - no text blobs or user lookups"""
+    
+    class Meta:
+        model = Claim
+        fields = [
+            'id', 'claim_id', 'encounter_type', 'service_date', 'member_id',
+            'facility_id', 'service_code', 'paid_amount_aed',
+            'status', 'error_type', 'created_at'
+        ]
+        read_only_fields = fields
 
 
 class ValidationJobSerializer(serializers.ModelSerializer):
@@ -29,15 +67,24 @@ class ValidationJobSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Claims file is required")
         
         # Check file extension
-        if not value.name.endswith(('.xlsx', '.xls')):
-            raise serializers.ValidationError("Claims file must be an Excel file (.xlsx or .xls)")
+        if not value.name.lower().endswith(CLAIMS_FILE_EXTENSIONS):
+            raise serializers.ValidationError("Claims file must be an Excel or CSV file (.xlsx, .xls or .csv)")
         
         # Check file size (max 50MB)
         if value.size > 50 * 1024 * 1024:
             raise serializers.ValidationError("Claims file size must be less than 50MB")
         
+        # Pre-flight: header and row estimate, without loading the rows
+        self.preflight = preflight_claims_file(value, value.name, value.size)
         return value
     
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if getattr(self, 'preflight', None):
+            # Seeds routing and progress until ingestion counts the rows
+            attrs['total_claims'] = self.preflight['estimated_rows']
+        return attrs
+    
     def validate_technical_rules_file(self, value):
         """Validate technical rules file"""
         if value:
@@ -61,18 +108,95 @@ class ValidationJobSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'job_id', 'status', 'claims_file', 'technical_rules_file',
             'medical_rules_file', 'total_claims', 'processed_claims',
-            'validated_count', 'error_count', 'error_message',
+            'validated_count', 'error_count', 'skipped_claims', 'checkpoint_row', 'checkpoint_at', 'error_message',
             'data_validation_completed', 'static_rule_evaluation_completed',
             'llm_evaluation_completed', 'analytics_pipeline_completed', 'metrics_generated',
-            'created_at', 'completed_at'
+            'rule_set', 'rules_fingerprint', 'created_at', 'completed_at'
         ]
         read_only_fields = [
             'id', 'job_id', 'status', 'total_claims', 'processed_claims',
-            'validated_count', 'error_count', 'error_message',
+            'validated_count', 'error_count', 'skipped_claims', 'checkpoint_row', 'checkpoint_at', 'error_message',
             'data_validation_completed', 'static_rule_evaluation_completed',
             'llm_evaluation_completed', 'analytics_pipeline_completed', 'metrics_generated',
-            'created_at', 'completed_at'
+            'rules_fingerprint', 'created_at', 'completed_at'
+        ]
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer for UploadSession model (chunked uploads)"""
+    parts = serializers.SerializerMethodField()
+    received_bytes = serializers.SerializerMethodField()
+    max_part_bytes = serializers.SerializerMethodField()
+    
+    def validate_filename(self, value):
+        """Validate claims file name"""
+        if not value.lower().endswith(CLAIMS_FILE_EXTENSIONS):
+            raise serializers.ValidationError("Claims file must be an Excel or CSV file (.xlsx, .xls or .csv)")
+        return value
+    
+    def validate_size(self, value):
+        """Validate declared file size"""
+        if value <= 0:
+            raise serializers.ValidationError("File size must be positive")
+        if value > settings.CHUNKED_UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError(f"Claims file size must be at most {settings.CHUNKED_UPLOAD_MAX_BYTES} bytes")
+        return value
+    
+    def validate_checksum(self, value):
+        """Validate declared SHA-256"""
+        value = value.lower()
+        if len(value) != 64 or any(c not in '0123456789abcdef' for c in value):
+            raise serializers.ValidationError("Checksum must be a hex SHA-256 digest")
+        return value
+    
+    def get_parts(self, obj):
+        return received_parts(obj) if obj.status == 'open' else {}
+    
+    def get_received_bytes(self, obj):
+        return sum(self.get_parts(obj).values())
+    
+    def get_max_part_bytes(self, obj):
+        return settings.UPLOAD_PART_MAX_BYTES
+    
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'upload_id', 'status', 'filename', 'size', 'checksum', 'rule_set', 'job',
+            'parts', 'received_bytes', 'max_part_bytes', 'error_message', 'created_at', 'updated_at'
         ]
+        read_only_fields = ['id', 'upload_id', 'status', 'job', 'error_message', 'created_at', 'updated_at']
+
+
+class ClaimValidationSerializer(serializers.Serializer):
+    """One claim submitted for synchronous validation (POST /api/claims/validate/); nothing is stored"""
+    claim_id = serializers.CharField(required=False, allow_blank=True, default='')
+    encounter_type = serializers.CharField()
+    service_date = serializers.DateField()
+    national_id = serializers.CharField()
+    member_id = serializers.CharField()
+    facility_id = serializers.CharField()
+    unique_id = serializers.CharField()
+    diagnosis_codes = serializers.CharField()
+    service_code = serializers.CharField()
+    paid_amount_aed = serializers.DecimalField(max_digits=12, decimal_places=2)
+    approval_number = serializers.CharField(required=False, allow_blank=True, allow_null=True, default='')
+    
+    @staticmethod
+    def claim_data(data, index=0):
+        """Validated claim in the format used by the validators (as claim_to_data for stored claims)"""
+        return {
+            'claim_id': data['claim_id'] or f'CLAIM_{index + 1}',
+            'encounter_type': data['encounter_type'].lower(),
+            'service_date': data['service_date'].isoformat(),
+            'national_id': data['national_id'],
+            'member_id': data['member_id'],
+            'facility_id': data['facility_id'],
+            'unique_id': data['unique_id'],
+            'diagnosis_codes': data['diagnosis_codes'],
+            'service_code': data['service_code'],
+            'paid_amount_aed': float(data['paid_amount_aed']),
+            'approval_number': data['approval_number'] or '',
+        }
 
 
 class RefinedClaimSerializer(serializers.ModelSerializer):
@@ -85,7 +209,7 @@ class RefinedClaimSerializer(serializers.ModelSerializer):
             'id', 'claim', 'claim_id', 'service_code', 'paid_amount_aed',
             'status', 'error_type', 'error_explanation', 'recommended_action',
             'static_rule_validated', 'llm_validated', 'static_rule_errors', 'llm_analysis',
-            'processed_at', 'updated_at', 'processed_by_job'
+            'rules_fingerprint', 'processed_at', 'updated_at', 'processed_by_job'
         ]
         read_only_fields = ['id', 'processed_at', 'updated_at']
 
@@ -0,0 +1,198 @@
+"""
+Streamed claim ingestion: ``POST /api/jobs/ingest/``.
+
+Django's ASGI handler reads the whole request body before it calls a view,
+so this endpoint is a plain ASGI application that rcm_project/asgi.py serves
+ahead of Django. It reads the body one ASGI message at a time as the client
+sends it, decodes the claims incrementally (claims/ingest.py) and queues
+them to ``process_claim_batch`` in micro-batches of INGEST_MICRO_BATCH_SIZE,
+or whatever arrived within INGEST_MICRO_BATCH_SECONDS, so validation starts
+before the upload ends. The first claim's fields are checked like a file
+header; a body that breaks off later keeps (and completes the job with) the
+claims received until then.
+
+The body must have a Content-Length or use chunked transfer encoding; a
+request with neither is rejected with 411 before anything is read. Like the
+other endpoints, the access token is sent in the Authorization header.
+"""
+import json
+import time
+import uuid
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signals
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .ingest import IngestError, RecordDecoder
+from .models import ValidationJob
+from .preflight import missing_columns
+from .tasks import process_claim_batch
+from rules import cache as rules_cache
+
+
+def _authenticate(authorization: str):
+    """User for the access token in the Authorization header"""
+    authentication = JWTAuthentication()
+    raw_token = authentication.get_raw_token(authorization.encode('latin-1')) if authorization else None
+    if raw_token is None:
+        raise AuthenticationFailed('Authentication credentials were not provided.')
+    return authentication.get_user(authentication.get_validated_token(raw_token))
+
+
+def queue_claim_batch(job, claims, start_row, final=False):
+    """Queue one micro-batch of a streamed job"""
+    try:
+        process_claim_batch.apply_async(args=[job.job_id, claims, start_row], kwargs={'final': final})
+    except Exception as e:
+        print(f"Warning: Could not start Celery task: {str(e)}")
+        if settings.DEBUG:
+            print("Processing synchronously in DEBUG mode...")
+            process_claim_batch(job.job_id, claims, start_row, final=final)
+
+
+class StreamIngest:
+    """State of one ingest request: its job, NDJSON claims file and the batch being filled"""
+
+    def __init__(self, user):
+        self.user = user
+        self.job = None
+        self.claims_file = None
+        self.batch = []
+        self.start_row = 0
+        self.batches = 0
+        self.batch_started = time.monotonic()
+
+    def create_job(self):
+        """A processing job bound to the active RuleSet, with its NDJSON claims file opened for writing"""
+        job_id = str(uuid.uuid4())
+        name = default_storage.get_available_name(f'uploads/claims/{job_id}.ndjson')
+        path = Path(default_storage.path(name))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.claims_file = open(path, 'w', encoding='utf-8')
+        self.job = ValidationJob.objects.create(
+            job_id=job_id,
+            claims_file=name,
+            created_by=self.user,
+            rule_set=rules_cache.active_ruleset(),
+            status='processing',
+            heartbeat_at=timezone.now(),
+        )
+
+    async def add(self, claim):
+        if not isinstance(claim, dict):
+            raise IngestError(f'Claim {self.start_row + len(self.batch)} is not a JSON object')
+        if self.job is None:
+            missing = missing_columns(claim.keys())
+            if missing:
+                raise IngestError(f"Claims are missing required columns: {', '.join(missing)}")
+            await sync_to_async(self.create_job)()
+
+        self.batch.append(claim)
+        if (len(self.batch) >= settings.INGEST_MICRO_BATCH_SIZE
+                or time.monotonic() - self.batch_started >= settings.INGEST_MICRO_BATCH_SECONDS):
+            await sync_to_async(self.queue_batch)()
+
+    def queue_batch(self, final=False):
+        # The claims file must hold every queued row, so a resume can pick up from any checkpoint.
+        # Written here, off the event loop, one batch at a time.
+        self.claims_file.writelines(json.dumps(claim) + '\n' for claim in self.batch)
+        self.claims_file.flush()
+        queue_claim_batch(self.job, self.batch, self.start_row, final=final)
+        self.start_row += len(self.batch)
+        self.batches += 1
+        self.batch = []
+        self.batch_started = time.monotonic()
+
+    def close(self):
+        if self.claims_file:
+            self.claims_file.close()
+
+
+async def _body(receive):
+    """The request body, one ASGI message at a time"""
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise IngestError('The client disconnected before the body ended')
+        yield message.get('body', b'')
+        if not message.get('more_body', False):
+            return
+
+
+async def _respond(send, status, body):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps(body).encode()})
+
+
+async def ingest_application(scope, receive, send):
+    """Stream-validate claims posted as NDJSON or a JSON array of objects"""
+    await sync_to_async(signals.request_started.send, thread_sensitive=True)(sender=ingest_application, scope=scope)
+    try:
+        await _ingest(scope, receive, send)
+    finally:
+        await sync_to_async(signals.request_finished.send, thread_sensitive=True)(sender=ingest_application)
+
+
+async def _ingest(scope, receive, send):
+    if scope['method'] != 'POST':
+        await _respond(send, 405, {'detail': f"Method \"{scope['method']}\" not allowed."})
+        return
+    headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+    try:
+        user = await sync_to_async(_authenticate)(headers.get('authorization', ''))
+    except (AuthenticationFailed, InvalidToken, TokenError) as e:
+        await _respond(send, 401, {'detail': str(e)})
+        return
+    if 'content-length' not in headers and 'chunked' not in headers.get('transfer-encoding', '').lower():
+        await _respond(send, 411, {
+            'error': 'Content-Length or chunked transfer encoding required',
+            'detail': 'Failed to ingest claims',
+        })
+        return
+
+    ingest = StreamIngest(user)
+    decoder = RecordDecoder()
+    error = None
+    try:
+        async for data in _body(receive):
+            for claim in decoder.feed(data):
+                await ingest.add(claim)
+        for claim in decoder.feed(b'', final=True):
+            await ingest.add(claim)
+    except Exception as e:
+        # Invalid JSON, or the client went away mid-body
+        error = str(e)
+
+    received = ingest.start_row + len(ingest.batch)
+    try:
+        if ingest.job is not None:
+            await sync_to_async(ingest.queue_batch)(final=True)
+    finally:
+        await sync_to_async(ingest.close)()
+
+    if ingest.job is None:
+        await _respond(send, 400, {'error': error or 'No claims received', 'detail': 'Failed to ingest claims'})
+        return
+
+    body = {
+        'id': ingest.job.id,
+        'job_id': ingest.job.job_id,
+        'status': 'processing',
+        'received': received,
+        'batches': ingest.batches,
+    }
+    if error:
+        body.update({'error': error, 'detail': 'Ingestion stopped; the claims received before the error are being validated'})
+        await _respond(send, 400, body)
+        return
+    await _respond(send, 202, body)
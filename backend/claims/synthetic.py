@@ -0,0 +1,100 @@
+"""
+Synthetic claim data for benchmarks.
+
+Rows use the same columns and value formats as the sample claims file in
+``data/artifacts`` and the service/facility/diagnosis codes from the sample
+technical and medical rules, so they exercise the real rule paths.
+"""
+import random
+import string
+from datetime import date, timedelta
+
+CLAIM_COLUMNS = [
+    'encounter_type', 'service_date', 'national_id', 'member_id', 'facility_id',
+    'unique_id', 'diagnosis_codes', 'approval_number', 'service_code', 'paid_amount_aed',
+]
+
+# service code -> (encounter type, allowed facility types, required diagnosis, requires approval)
+SERVICES = {
+    'SRV1001': ('INPATIENT', ['GENERAL_HOSPITAL'], None, True),
+    'SRV1003': ('INPATIENT', ['DIALYSIS_CENTER', 'GENERAL_HOSPITAL'], None, False),
+    'SRV2001': ('OUTPATIENT', ['CARDIOLOGY_CENTER', 'GENERAL_HOSPITAL'], 'R07.9', False),
+    'SRV2002': ('OUTPATIENT', ['GENERAL_HOSPITAL'], None, False),
+    'SRV2003': ('OUTPATIENT', ['GENERAL_HOSPITAL'], None, False),
+    'SRV2006': ('OUTPATIENT', ['GENERAL_HOSPITAL'], 'J45.909', False),
+    'SRV2010': ('OUTPATIENT', ['DIALYSIS_CENTER', 'GENERAL_HOSPITAL'], None, False),
+    'SRV2011': ('OUTPATIENT', ['CARDIOLOGY_CENTER', 'GENERAL_HOSPITAL'], None, False),
+}
+
+FACILITIES = {
+    'GENERAL_HOSPITAL': ['96GUDLMT', 'EGVP0QAQ', 'OCQUMGDW', 'SZC62NTW'],
+    'DIALYSIS_CENTER': ['0DBYE6KP', 'EPRETQTL'],
+    'CARDIOLOGY_CENTER': ['7R1VMIGX', 'LB7I54Z7'],
+    'MATERNITY_HOSPITAL': ['2XKSZK4T', 'GLCTDQAJ'],
+}
+
+# Diagnoses that need no approval on their own
+FILLER_DIAGNOSES = ['E66.3', 'E66.9', 'E88.9', 'G43.9', 'N39.0']
+APPROVAL_DIAGNOSES = {'R07.9', 'E11.9', 'Z34.0'}
+
+AMOUNT_THRESHOLD = 250.00
+
+# Rule violations injected into the ``error_rate`` share of rows
+ERROR_KINDS = ['missing_approval', 'unique_id_format', 'encounter_type', 'facility_type']
+
+
+def _random_id(rng, length=8):
+    return ''.join(rng.choices(string.ascii_uppercase + string.digits, k=length))
+
+
+def generate_claim_rows(count: int, error_rate: float = 0.3, seed: int = 0):
+    """
+    Yield ``count`` claim rows keyed by ``CLAIM_COLUMNS``.
+
+    Roughly ``error_rate`` of the rows break exactly one rule picked from
+    ``ERROR_KINDS``; the rest pass the sample technical and medical rules.
+    """
+    rng = random.Random(seed)
+    service_codes = list(SERVICES)
+    start = date(2024, 1, 1)
+
+    for _ in range(count):
+        service_code = rng.choice(service_codes)
+        encounter_type, facility_types, required_diagnosis, needs_approval = SERVICES[service_code]
+        facility_id = rng.choice(FACILITIES[rng.choice(facility_types)])
+        national_id = _random_id(rng)
+        member_id = _random_id(rng)
+        diagnosis_codes = required_diagnosis or rng.choice(FILLER_DIAGNOSES)
+        if needs_approval or diagnosis_codes in APPROVAL_DIAGNOSES or rng.random() < 0.3:
+            approval_number = f'APP{rng.randint(1, 999999):06d}'
+            paid_amount = round(rng.uniform(50, 2000), 2)
+        else:
+            approval_number = None
+            paid_amount = round(rng.uniform(20, AMOUNT_THRESHOLD), 2)
+        unique_id = f'{national_id[:4]}-{member_id[:4]}-{facility_id[:4]}'
+
+        if rng.random() < error_rate:
+            kind = rng.choice(ERROR_KINDS)
+            if kind == 'missing_approval':
+                approval_number = None
+                paid_amount = round(rng.uniform(AMOUNT_THRESHOLD + 1, 2000), 2)
+            elif kind == 'unique_id_format':
+                unique_id = unique_id.replace('-', '').lower()
+            elif kind == 'encounter_type':
+                encounter_type = 'OUTPATIENT' if encounter_type == 'INPATIENT' else 'INPATIENT'
+            else:
+                facility_id = rng.choice(FACILITIES['MATERNITY_HOSPITAL'])
+                unique_id = f'{national_id[:4]}-{member_id[:4]}-{facility_id[:4]}'
+
+        yield {
+            'encounter_type': encounter_type,
+            'service_date': (start + timedelta(days=rng.randint(0, 600))).strftime('%m/%d/%y'),
+            'national_id': national_id,
+            'member_id': member_id,
+            'facility_id': facility_id,
+            'unique_id': unique_id,
+            'diagnosis_codes': diagnosis_codes,
+            'approval_number': approval_number,
+            'service_code': service_code,
+            'paid_amount_aed': paid_amount,
+        }
@@ -1,286 +1,863 @@
-from celery import shared_task
+from celery import chord, group, shared_task, states
+from celery.exceptions import Ignore
 from django.core.files.storage import default_storage
+from rest_framework.exceptions import ValidationError
 import pandas as pd
 from pathlib import Path
-from .models import Claim, ValidationJob, RefinedClaim, Metrics
+from .models import Claim, ValidationJob, RefinedClaim, Metrics, JobStageTiming, StreamBatch, UploadSession
+from . import progress
+from .instrumentation import StageTimer, stage_totals
+from .impact import ImpactSummary
+from .ingest import claims_frame
+from .preflight import canonical_columns, missing_columns
+from .routing import queue_for_job
+from .serializers import preflight_claims_file
+from .uploads import UploadError, assemble
+from rcm_project import monitoring
 from rules.rule_parser import TechnicalRuleParser, MedicalRuleParser
 from rules.rule_validator import RuleValidator
 from rules.llm_validator import LLMValidator
 from rules.models import RuleSet
+from rules import cache as rules_cache
 from django.conf import settings
 from django.utils import timezone
-from django.db.models import Sum, Count, Q
+from django.db import transaction
+from django.db.models import F, Sum, Count, Q, Min, Max
 from decimal import Decimal
+import hashlib
+import json
 import uuid
 
 
-@shared_task(bind=True)
-def process_claims_file(self, job_id: str):
-    """Process claims file asynchronously"""
+def default_rules_paths():
+    return (
+        Path(settings.TENANT_CONFIG_PATH) / 'Humaein_Technical_Rules.pdf',
+        Path(settings.TENANT_CONFIG_PATH) / 'Humaein_Medical_Rules.pdf',
+    )
+
+
+def load_rules(job: ValidationJob = None, ruleset: RuleSet = None):
+    """
+    Load technical and medical rules with multi-tenant support
+    Priority: 1. The given RuleSet (the job's), 2. Job-specific files, 3. Default files
+    """
+    technical_rules = {}
+    medical_rules = {}
+    
+    # RuleSet bound to the job at submission (multi-tenant support)
+    threshold_override = None
+    if ruleset:
+        threshold_override = float(ruleset.paid_amount_threshold) if ruleset.paid_amount_threshold else None
+        print(f"Using RuleSet: {ruleset.name} (threshold: {threshold_override or 'from PDF'})")
+    
+    # Try to load technical rules
     try:
-        job = ValidationJob.objects.get(job_id=job_id)
-        job.status = 'processing'
-        job.save()
-        
-        # Load rules with multi-tenant support
-        # Priority: 1. Active RuleSet, 2. Job-specific files, 3. Default files
-        technical_rules = {}
-        medical_rules = {}
-        
-        # Check for active RuleSet first (multi-tenant support)
-        active_ruleset = RuleSet.objects.filter(is_active=True).first()
-        threshold_override = None
-        if active_ruleset:
-            threshold_override = float(active_ruleset.paid_amount_threshold) if active_ruleset.paid_amount_threshold else None
-            print(f"Using active RuleSet: {active_ruleset.name} (threshold: {threshold_override or 'from PDF'})")
-        
-        # Try to load technical rules
-        try:
-            # Priority 1: Active RuleSet technical rules file
-            if active_ruleset and active_ruleset.technical_rules_file:
-                parser = TechnicalRuleParser(active_ruleset.technical_rules_file.path)
+        # Priority 1: RuleSet technical rules file
+        if ruleset and ruleset.technical_rules_file:
+            parser = TechnicalRuleParser(ruleset.technical_rules_file.path)
+            technical_rules = parser.parse()
+            print(f"Loaded technical rules from RuleSet: {ruleset.name}")
+        # Priority 2: Job-specific technical rules file
+        elif job is not None and job.technical_rules_file:
+            parser = TechnicalRuleParser(job.technical_rules_file.path)
+            technical_rules = parser.parse()
+            print("Loaded technical rules from job file")
+        # Priority 3: Default technical rules file
+        else:
+            default_tech_rules = default_rules_paths()[0]
+            if default_tech_rules.exists():
+                parser = TechnicalRuleParser(str(default_tech_rules))
                 technical_rules = parser.parse()
-                print(f"Loaded technical rules from RuleSet: {active_ruleset.name}")
-            # Priority 2: Job-specific technical rules file
-            elif job.technical_rules_file:
-                parser = TechnicalRuleParser(job.technical_rules_file.path)
-                technical_rules = parser.parse()
-                print("Loaded technical rules from job file")
-            # Priority 3: Default technical rules file
+                print(f"Loaded technical rules from default file: {len(technical_rules.get('service_approvals', {}))} service approvals, {len(technical_rules.get('diagnosis_approvals', {}))} diagnosis approvals")
             else:
-                default_tech_rules = Path(settings.TENANT_CONFIG_PATH) / 'Humaein_Technical_Rules.pdf'
-                if default_tech_rules.exists():
-                    parser = TechnicalRuleParser(str(default_tech_rules))
-                    technical_rules = parser.parse()
-                    print(f"Loaded technical rules from default file: {len(technical_rules.get('service_approvals', {}))} service approvals, {len(technical_rules.get('diagnosis_approvals', {}))} diagnosis approvals")
-                else:
-                    print(f"Warning: Default technical rules file not found at {default_tech_rules}")
-        except Exception as e:
-            print(f"Error loading technical rules: {str(e)}")
-            # Use minimal default rules
-            technical_rules = {
-                'service_approvals': {},
-                'diagnosis_approvals': {},
-                'amount_threshold': 250.00,
-                'id_format_rules': {}
-            }
-        
-        # Try to load medical rules
-        try:
-            # Priority 1: Active RuleSet medical rules file
-            if active_ruleset and active_ruleset.medical_rules_file:
-                parser = MedicalRuleParser(active_ruleset.medical_rules_file.path)
-                medical_rules = parser.parse()
-                print(f"Loaded medical rules from RuleSet: {active_ruleset.name}")
-            # Priority 2: Job-specific medical rules file
-            elif job.medical_rules_file:
-                parser = MedicalRuleParser(job.medical_rules_file.path)
+                print(f"Warning: Default technical rules file not found at {default_tech_rules}")
+    except Exception as e:
+        print(f"Error loading technical rules: {str(e)}")
+        # Use minimal default rules
+        technical_rules = {
+            'service_approvals': {},
+            'diagnosis_approvals': {},
+            'amount_threshold': 250.00,
+            'id_format_rules': {}
+        }
+    
+    # Try to load medical rules
+    try:
+        # Priority 1: RuleSet medical rules file
+        if ruleset and ruleset.medical_rules_file:
+            parser = MedicalRuleParser(ruleset.medical_rules_file.path)
+            medical_rules = parser.parse()
+            print(f"Loaded medical rules from RuleSet: {ruleset.name}")
+        # Priority 2: Job-specific medical rules file
+        elif job is not None and job.medical_rules_file:
+            parser = MedicalRuleParser(job.medical_rules_file.path)
+            medical_rules = parser.parse()
+            print("Loaded medical rules from job file")
+        # Priority 3: Default medical rules file
+        else:
+            default_med_rules = default_rules_paths()[1]
+            if default_med_rules.exists():
+                parser = MedicalRuleParser(str(default_med_rules))
                 medical_rules = parser.parse()
-                print("Loaded medical rules from job file")
-            # Priority 3: Default medical rules file
+                print(f"Loaded medical rules from default file: {len(medical_rules.get('encounter_type_restrictions', {}))} encounter restrictions, {len(medical_rules.get('facility_registry', {}))} facilities")
             else:
-                default_med_rules = Path(settings.TENANT_CONFIG_PATH) / 'Humaein_Medical_Rules.pdf'
-                if default_med_rules.exists():
-                    parser = MedicalRuleParser(str(default_med_rules))
-                    medical_rules = parser.parse()
-                    print(f"Loaded medical rules from default file: {len(medical_rules.get('encounter_type_restrictions', {}))} encounter restrictions, {len(medical_rules.get('facility_registry', {}))} facilities")
-                else:
-                    print(f"Warning: Default medical rules file not found at {default_med_rules}")
+                print(f"Warning: Default medical rules file not found at {default_med_rules}")
+    except Exception as e:
+        print(f"Error loading medical rules: {str(e)}")
+        # Use minimal default rules
+        medical_rules = {
+            'encounter_type_restrictions': {},
+            'facility_type_restrictions': {},
+            'diagnosis_requirements': {},
+            'facility_registry': {},
+            'mutually_exclusive': []
+        }
+    
+    # Apply threshold override from RuleSet (configurable without code changes)
+    if threshold_override is not None:
+        technical_rules['amount_threshold'] = threshold_override
+        print(f"Threshold overridden by RuleSet: AED {threshold_override}")
+    elif not technical_rules.get('amount_threshold'):
+        technical_rules['amount_threshold'] = 250.00
+        print(f"Using default threshold: AED 250.00")
+    
+    return technical_rules, medical_rules
+
+
+def rules_cache_key(job: ValidationJob = None, ruleset: RuleSet = None):
+    """
+    Identity of the rules load_rules would load: the RuleSet version (its
+    threshold) and the hash of the technical and medical file it would pick
+    """
+    paths = []
+    for field, default_path in zip(('technical_rules_file', 'medical_rules_file'), default_rules_paths()):
+        if ruleset and getattr(ruleset, field):
+            paths.append(getattr(ruleset, field).path)
+        elif job is not None and getattr(job, field):
+            paths.append(getattr(job, field).path)
+        else:
+            paths.append(str(default_path))
+    version = (ruleset.pk, ruleset.updated_at.isoformat()) if ruleset else None
+    return (version, *(rules_cache.file_hash(path) for path in paths))
+
+
+def get_rule_validator(job: ValidationJob = None, ruleset: RuleSet = None) -> RuleValidator:
+    """
+    Compiled rules for a job (its bound RuleSet) or for ``ruleset``, reused
+    from this process's rules cache when unchanged
+    """
+    if job is not None:
+        ruleset = job.rule_set
+    return rules_cache.get_plan(
+        rules_cache_key(job, ruleset),
+        lambda: RuleValidator(*load_rules(job, ruleset)),
+    )
+
+
+def apply_llm_evaluation(claim_data: dict, static_validation_result: dict, llm_validator: LLMValidator):
+    """
+    ANALYTICS PIPELINE Component 2: LLM-based Evaluation
+    
+    Runs the LLM on claims with static rule errors and merges its insights.
+    Returns the final validation result and the analytics pipeline fields
+    stored on RefinedClaim.
+    """
+    llm_validated = False
+    llm_analysis = ''
+    final_validation_result = static_validation_result.copy()
+    
+    if static_validation_result['error_type'] != 'no_error':
+        try:
+            llm_result = llm_validator.validate_claim(claim_data, static_validation_result)
+            llm_validated = True
+            if llm_result.get('llm_enhanced'):
+                # Merge LLM insights
+                if llm_result.get('llm_explanation'):
+                    llm_analysis = llm_result['llm_explanation']
+                    final_validation_result['explanations'] += f"\n\nLLM Analysis:\n{llm_result['llm_explanation']}"
+                if llm_result.get('llm_recommendations'):
+                    llm_analysis += f"\n\nLLM Recommendations:\n{llm_result['llm_recommendations']}"
+                    final_validation_result['recommended_actions'] += f"\n\nLLM Recommendations:\n{llm_result['llm_recommendations']}"
         except Exception as e:
-            print(f"Error loading medical rules: {str(e)}")
-            # Use minimal default rules
-            medical_rules = {
-                'encounter_type_restrictions': {},
-                'facility_type_restrictions': {},
-                'diagnosis_requirements': {},
-                'facility_registry': {},
-                'mutually_exclusive': []
-            }
-        
-        # Apply threshold override from RuleSet (configurable without code changes)
-        if threshold_override is not None:
-            technical_rules['amount_threshold'] = threshold_override
-            print(f"Threshold overridden by RuleSet: AED {threshold_override}")
-        elif not technical_rules.get('amount_threshold'):
-            technical_rules['amount_threshold'] = 250.00
-            print(f"Using default threshold: AED 250.00")
-        
-        # Initialize validators
-        rule_validator = RuleValidator(technical_rules, medical_rules)
-        llm_validator = LLMValidator()
-        
-        # Read claims file
-        df = pd.read_excel(job.claims_file.path)
-        
-        # Normalize column names (handle case variations)
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-        
-        job.total_claims = len(df)
-        job.save()
-        
-        validated_count = 0
-        error_count = 0
-        
-        # Process each claim
-        for idx, row in df.iterrows():
+            print(f"LLM validation failed for claim {claim_data['claim_id']}: {str(e)}")
+            llm_analysis = f"LLM validation skipped: {str(e)}"
+    
+    return final_validation_result, {
+        'static_rule_validated': True,
+        'static_rule_errors': static_validation_result.get('explanations', ''),
+        'llm_validated': llm_validated,
+        'llm_analysis': llm_analysis,
+    }
+
+
+def static_evaluation(static_validation_result: dict):
+    """
+    Result and RefinedClaim pipeline fields of a claim as stored before LLM
+    enrichment (see enrich_claims): the static rule result unchanged
+    """
+    return static_validation_result.copy(), {
+        'static_rule_validated': True,
+        'static_rule_errors': static_validation_result.get('explanations', ''),
+        'llm_validated': False,
+        'llm_analysis': '',
+    }
+
+
+def queue_llm_enrichment(claims: list, rules_fingerprint: str, job: ValidationJob = None):
+    """
+    Queue LLM enrichment of stored claims with static rule errors, once the
+    current transaction commits
+    
+    ``claims`` holds (claim_data, content_hash, static_validation_result) of
+    each stored claim; claims without errors are left out, the LLM only runs
+    on errors.
+    """
+    enrich = [
+        {'claim_data': claim_data, 'content_hash': content_hash, 'static_result': static_validation_result}
+        for claim_data, content_hash, static_validation_result in claims
+        if static_validation_result['error_type'] != 'no_error'
+    ]
+    if not enrich:
+        return
+    job_id = job.job_id if job else None
+    if job:
+        # Counted in the current transaction, so the job cannot complete its LLM evaluation before this task runs
+        ValidationJob.objects.filter(pk=job.pk).update(llm_enrichment_pending=F('llm_enrichment_pending') + 1)
+    
+    def send():
+        try:
+            enrich_claims.delay(enrich, rules_fingerprint, job_id)
+        except Exception as e:
+            print(f"Warning: Could not queue LLM enrichment: {str(e)}")
+            if settings.DEBUG:
+                print("Enriching synchronously in DEBUG mode...")
+                enrich_claims(enrich, rules_fingerprint, job_id)
+    
+    transaction.on_commit(send)
+
+
+@shared_task(bind=True, acks_late=True)
+def enrich_claims(self, claims: list, rules_fingerprint: str, job_id: str = None):
+    """
+    ANALYTICS PIPELINE Component 2 for stored claims: LLM evaluation on the llm queue
+    
+    Uploads and revalidations store the static rule results and queue their
+    claims with errors here, so the slow, rate-limited LLM calls never hold
+    an interactive or bulk worker. The LLM does not change a claim's status
+    or error type; its analysis is appended to the stored explanation and
+    recommended action. A claim is only updated while it still holds the
+    queued content hash and rules fingerprint and has not been enriched yet,
+    so a claim revalidated meanwhile keeps its newer result and a redelivered
+    task changes nothing. With ``job_id`` the 'llm' stage timing, the job's
+    llm_processed_count metric and its llm_evaluation_completed flag are
+    updated and the job's progress snapshot is republished.
+    """
+    job = ValidationJob.objects.filter(job_id=job_id).first() if job_id else None
+    timer = StageTimer(job=job, task_id=self.request.id)
+    llm_validator = LLMValidator()
+    enriched = 0
+    
+    with timer.stage('llm', rows=len(claims)):
+        for item in claims:
+            claim_data = item['claim_data']
             try:
-                # Map row data to claim format
-                # Generate claim_id if missing (use index + 1 for 1-based numbering)
-                claim_id = row.get('claim_id') or row.get('claim id')
-                if pd.isna(claim_id) or not claim_id or str(claim_id).strip() == '':
-                    claim_id = f'CLAIM_{idx + 1}'
-                else:
-                    claim_id = str(claim_id).strip()
-                
-                claim_data = {
-                    'claim_id': str(claim_id),
-                    'encounter_type': str(row.get('encounter_type', row.get('encounter type', ''))).lower(),
-                    'service_date': row.get('service_date', row.get('service date', '')),
-                    'national_id': str(row.get('national_id', row.get('national id', ''))),
-                    'member_id': str(row.get('member_id', row.get('member id', ''))),
-                    'facility_id': str(row.get('facility_id', row.get('facility id', ''))),
-                    'unique_id': str(row.get('unique_id', row.get('unique id', ''))),
-                    'diagnosis_codes': str(row.get('diagnosis_codes', row.get('diagnosis codes', ''))),
-                    'service_code': str(row.get('service_code', row.get('service code', ''))),
-                    'paid_amount_aed': float(row.get('paid_amount_aed', row.get('paid amount aed', 0))),
-                    'approval_number': str(row.get('approval_number', row.get('approval number', ''))).strip() if pd.notna(row.get('approval_number', row.get('approval number', ''))) else None,
-                }
-                
-                # ============================================
-                # DATA PIPELINE: Stage 1 - Data Validation
-                # ============================================
-                # Validate claim data format and completeness
-                # (Basic validation happens here - data type checks, required fields, etc.)
-                
-                # ============================================
-                # DATA PIPELINE: Stage 2 - Master Table
-                # ============================================
-                # Store in master table (Claim)
-                claim, created = Claim.objects.update_or_create(
-                    claim_id=claim_data['claim_id'],
-                    defaults={
-                        'encounter_type': claim_data['encounter_type'],
-                        'service_date': pd.to_datetime(claim_data['service_date']).date() if pd.notna(claim_data['service_date']) else None,
-                        'national_id': claim_data['national_id'],
-                        'member_id': claim_data['member_id'],
-                        'facility_id': claim_data['facility_id'],
-                        'unique_id': claim_data['unique_id'],
-                        'diagnosis_codes': claim_data['diagnosis_codes'],
-                        'service_code': claim_data['service_code'],
-                        'paid_amount_aed': claim_data['paid_amount_aed'],
-                        'approval_number': claim_data['approval_number'],
-                        'uploaded_by': job.created_by,
-                    }
+                final_validation_result, pipeline_fields = apply_llm_evaluation(
+                    claim_data, item['static_result'], llm_validator
                 )
-                
+                with transaction.atomic():
+                    updated = RefinedClaim.objects.filter(
+                        claim__claim_id=claim_data['claim_id'],
+                        claim__content_hash=item['content_hash'],
+                        rules_fingerprint=rules_fingerprint,
+                        llm_validated=False,
+                    ).update(
+                        llm_validated=pipeline_fields['llm_validated'],
+                        llm_analysis=pipeline_fields['llm_analysis'],
+                        error_explanation=final_validation_result['explanations'],
+                        recommended_action=final_validation_result['recommended_actions'],
+                    )
+                    if updated:
+                        Claim.objects.filter(claim_id=claim_data['claim_id']).update(
+                            error_explanation=final_validation_result['explanations'],
+                            recommended_action=final_validation_result['recommended_actions'],
+                        )
+                        enriched += 1
+            except Exception as e:
+                print(f"LLM enrichment failed for claim {claim_data['claim_id']}: {str(e)}")
+    
+    if job:
+        timer.save()
+        Metrics.objects.filter(job=job, period_type='job').update(
+            llm_processed_count=RefinedClaim.objects.filter(processed_by_job=job, llm_validated=True).count()
+        )
+        ValidationJob.objects.filter(pk=job.pk).update(llm_enrichment_pending=F('llm_enrichment_pending') - 1)
+        complete_llm_evaluation(job)
+        job.refresh_from_db()
+        progress.publish_job_progress(job)
+    return {'status': 'completed', 'claims': len(claims), 'enriched': enriched}
+
+
+def complete_llm_evaluation(job: ValidationJob):
+    """Mark a completed job's LLM evaluation done once none of its enrich_claims tasks is pending"""
+    ValidationJob.objects.filter(pk=job.pk, status='completed', llm_enrichment_pending__lte=0).update(
+        llm_evaluation_completed=True
+    )
+
+
+@shared_task
+def explain_claims(claims_data, static_results):
+    """
+    LLM evaluation of claims validated synchronously (POST
+    /api/claims/validate/?llm=true); runs on the llm queue, nothing is stored
+    """
+    llm_validator = LLMValidator()
+    claims = []
+    for claim_data, static_validation_result in zip(claims_data, static_results):
+        final_validation_result, pipeline_fields = apply_llm_evaluation(claim_data, static_validation_result, llm_validator)
+        claims.append({
+            'claim_id': claim_data['claim_id'],
+            'llm_validated': pipeline_fields['llm_validated'],
+            'llm_analysis': pipeline_fields['llm_analysis'],
+            'explanations': final_validation_result['explanations'],
+            'recommended_actions': final_validation_result['recommended_actions'],
+        })
+    return {'status': 'completed', 'claims': claims}
+
+
+# Input columns covered by Claim.content_hash
+CONTENT_HASH_FIELDS = [
+    'encounter_type', 'service_date', 'national_id', 'member_id', 'facility_id',
+    'unique_id', 'diagnosis_codes', 'service_code', 'paid_amount_aed', 'approval_number',
+]
+
+
+def claim_content_hash(values: dict) -> str:
+    """SHA-256 of a claim's input columns, normalised the way they are stored"""
+    normalised = []
+    for field in CONTENT_HASH_FIELDS:
+        value = values.get(field)
+        if value is None:
+            value = ''
+        elif field == 'service_date':
+            value = value.isoformat()
+        elif field == 'paid_amount_aed':
+            value = f'{Decimal(str(value)):.2f}'
+        normalised.append(str(value))
+    return hashlib.sha256(json.dumps(normalised).encode('utf-8')).hexdigest()
+
+
+def read_claims_file(path: str) -> pd.DataFrame:
+    """Read a claims file: csv (all columns as text, keeping leading zeros of ids), NDJSON, else Excel"""
+    if str(path).lower().endswith('.csv'):
+        return pd.read_csv(path, dtype=str)
+    if str(path).lower().endswith('.ndjson'):
+        # Claims of a streamed job (claims/ingest.py)
+        return pd.read_json(path, lines=True, dtype=False)
+    return pd.read_excel(path)
+
+
+def row_to_claim_data(idx, row) -> dict:
+    """Map a claims file row (normalised column names) to the claim format used by the validators"""
+    # Generate claim_id if missing (use index + 1 for 1-based numbering)
+    claim_id = row.get('claim_id') or row.get('claim id')
+    if pd.isna(claim_id) or not claim_id or str(claim_id).strip() == '':
+        claim_id = f'CLAIM_{idx + 1}'
+    else:
+        claim_id = str(claim_id).strip()
+    
+    return {
+        'claim_id': str(claim_id),
+        'encounter_type': str(row.get('encounter_type', row.get('encounter type', ''))).lower(),
+        'service_date': row.get('service_date', row.get('service date', '')),
+        'national_id': str(row.get('national_id', row.get('national id', ''))),
+        'member_id': str(row.get('member_id', row.get('member id', ''))),
+        'facility_id': str(row.get('facility_id', row.get('facility id', ''))),
+        'unique_id': str(row.get('unique_id', row.get('unique id', ''))),
+        'diagnosis_codes': str(row.get('diagnosis_codes', row.get('diagnosis codes', ''))),
+        'service_code': str(row.get('service_code', row.get('service code', ''))),
+        'paid_amount_aed': float(row.get('paid_amount_aed', row.get('paid amount aed', 0))),
+        'approval_number': str(row.get('approval_number', row.get('approval number', ''))).strip() if pd.notna(row.get('approval_number', row.get('approval number', ''))) else None,
+    }
+
+
+def record_chunk(job: ValidationJob, checkpoint_row: int, counts: dict):
+    """Add a chunk's counts to the job and advance its checkpoint (inside the chunk's transaction)"""
+    job.validated_count += counts['validated']
+    job.error_count += counts['errors']
+    job.skipped_claims += counts['skipped']
+    job.processed_claims = checkpoint_row
+    job.checkpoint_row = checkpoint_row
+    job.checkpoint_at = timezone.now()
+    job.heartbeat_at = job.checkpoint_at
+    job.data_validation_completed = True
+    job.static_rule_evaluation_completed = True
+    job.analytics_pipeline_completed = True
+    # Not a full save: enrich_claims updates the job's pending enrichment count concurrently
+    job.save(update_fields=[
+        'validated_count', 'error_count', 'skipped_claims', 'processed_claims', 'checkpoint_row',
+        'checkpoint_at', 'heartbeat_at', 'data_validation_completed', 'static_rule_evaluation_completed',
+        'analytics_pipeline_completed',
+    ])
+
+
+def process_claim_chunk(job: ValidationJob, chunk, checkpoint_row: int, rule_validator: RuleValidator,
+                        timer: StageTimer = None, record=record_chunk):
+    """
+    Validate one chunk of file rows and commit it together with the job checkpoint
+    
+    Static rules run before the transaction; the master/refined writes and
+    ``record(job, checkpoint_row, counts)`` (by default: the job counters and
+    checkpoint) then commit atomically, so a chunk is either fully recorded
+    or redone on resume. Redoing a chunk is harmless: claims are upserted by
+    claim_id and rows already stored with the same content hash and rules
+    fingerprint are skipped. Claims with errors are then queued for LLM
+    enrichment on the llm queue (enrich_claims).
+    
+    Each step is timed into ``timer`` (see claims/instrumentation.py).
+    """
+    timer = timer or StageTimer()
+    validated_count = 0
+    error_count = 0
+    
+    with timer.stage('ingestion', rows=len(chunk)):
+        # ============================================
+        # DATA PIPELINE: Stage 1 - Data Validation
+        # ============================================
+        # Validate claim data format and completeness
+        # (Basic validation happens here - data type checks, required fields, etc.)
+        rows = []
+        for idx, row in chunk.iterrows():
+            try:
+                claim_data = row_to_claim_data(idx, row)
+                service_date = pd.to_datetime(claim_data['service_date']).date() if pd.notna(claim_data['service_date']) else None
+                content_hash = claim_content_hash({**claim_data, 'service_date': service_date})
+                rows.append((idx, claim_data, service_date, content_hash))
+            except Exception as e:
+                print(f"Error processing claim at row {idx}: {str(e)}")
+                error_count += 1
+        
+        # Compare content hashes against the stored claims of this chunk in one query
+        stored = {
+            claim_id: (content_hash, rules_fingerprint, claim_status)
+            for claim_id, content_hash, rules_fingerprint, claim_status in Claim.objects.filter(
+                claim_id__in=[claim_data['claim_id'] for _, claim_data, _, _ in rows]
+            ).values_list('claim_id', 'content_hash', 'rules_fingerprint', 'status')
+        }
+    skipped_claim_ids = []
+    static_results = []
+    results = []
+    
+    with timer.stage('static_rules') as static_stage:
+        for idx, claim_data, service_date, content_hash in rows:
+            existing = stored.get(claim_data['claim_id'])
+            if existing and existing[:2] == (content_hash, rule_validator.fingerprint):
+                # Unchanged row already validated with the current rules: no validation, LLM or writes
+                skipped_claim_ids.append(claim_data['claim_id'])
+                if existing[2] == 'validated':
+                    validated_count += 1
+                else:
+                    error_count += 1
+                continue
+            
+            try:
                 # ============================================
                 # DATA PIPELINE: Stage 3 - Validation
                 # ============================================
                 # ANALYTICS PIPELINE Component 1: Static Rule Evaluation
                 static_validation_result = rule_validator.validate_claim(claim_data)
-                static_rule_validated = True
-                static_rule_errors = static_validation_result.get('explanations', '')
-                
-                # ANALYTICS PIPELINE Component 2: LLM-based Evaluation
-                llm_validated = False
-                llm_analysis = ''
-                final_validation_result = static_validation_result.copy()
-                
-                if static_validation_result['error_type'] != 'no_error':
-                    try:
-                        llm_result = llm_validator.validate_claim(claim_data, static_validation_result)
-                        llm_validated = True
-                        if llm_result.get('llm_enhanced'):
-                            # Merge LLM insights
-                            if llm_result.get('llm_explanation'):
-                                llm_analysis = llm_result['llm_explanation']
-                                final_validation_result['explanations'] += f"\n\nLLM Analysis:\n{llm_result['llm_explanation']}"
-                            if llm_result.get('llm_recommendations'):
-                                llm_analysis += f"\n\nLLM Recommendations:\n{llm_result['llm_recommendations']}"
-                                final_validation_result['recommended_actions'] += f"\n\nLLM Recommendations:\n{llm_result['llm_recommendations']}"
-                    except Exception as e:
-                        print(f"LLM validation failed for claim {claim_data['claim_id']}: {str(e)}")
-                        llm_analysis = f"LLM validation skipped: {str(e)}"
-                
-                # Update master table with final validation results
-                claim.status = final_validation_result['status']
-                claim.error_type = final_validation_result['error_type']
-                claim.error_explanation = final_validation_result['explanations']
-                claim.recommended_action = final_validation_result['recommended_actions']
-                claim.validated_by = job.created_by
-                claim.save()
-                
-                # ============================================
-                # DATA PIPELINE: Stage 4 - Refined Table
-                # ============================================
-                # Store validated/refined claim in RefinedClaim table
-                refined_claim, refined_created = RefinedClaim.objects.update_or_create(
-                    claim=claim,
-                    defaults={
-                        'service_code': claim.service_code,
-                        'paid_amount_aed': claim.paid_amount_aed,
-                        'status': final_validation_result['status'],
-                        'error_type': final_validation_result['error_type'],
-                        'error_explanation': final_validation_result['explanations'],
-                        'recommended_action': final_validation_result['recommended_actions'],
-                        'static_rule_validated': static_rule_validated,
-                        'llm_validated': llm_validated,
-                        'static_rule_errors': static_rule_errors,
-                        'llm_analysis': llm_analysis,
-                        'processed_by_job': job,
-                    }
-                )
-                
-                if final_validation_result['status'] == 'validated':
-                    validated_count += 1
-                else:
-                    error_count += 1
-                
-                job.processed_claims = idx + 1
-                job.validated_count = validated_count
-                job.error_count = error_count
-                job.data_validation_completed = True
-                job.static_rule_evaluation_completed = True
-                job.llm_evaluation_completed = True
-                job.analytics_pipeline_completed = True
-                job.save()
-                
+            except Exception as e:
+                print(f"Error processing claim at row {idx}: {str(e)}")
+                error_count += 1
+                continue
+            static_results.append((idx, claim_data, service_date, content_hash, static_validation_result))
+        static_stage['rows'] += len(static_results)
+    
+    for idx, claim_data, service_date, content_hash, static_validation_result in static_results:
+        # ANALYTICS PIPELINE Component 2 (LLM) runs later on the llm queue
+        final_validation_result, pipeline_fields = static_evaluation(static_validation_result)
+        results.append((idx, claim_data, service_date, content_hash, final_validation_result, pipeline_fields))
+    
+    stored_error_types = []
+    stored_claims = []
+    with timer.stage('persistence', rows=len(results)), transaction.atomic():
+        for idx, claim_data, service_date, content_hash, final_validation_result, pipeline_fields in results:
+            try:
+                # One savepoint per row, so a failed row does not abort the chunk
+                with transaction.atomic():
+                    # ============================================
+                    # DATA PIPELINE: Stage 2 - Master Table
+                    # ============================================
+                    # Store in master table (Claim) with final validation results
+                    claim, created = Claim.objects.update_or_create(
+                        claim_id=claim_data['claim_id'],
+                        defaults={
+                            'encounter_type': claim_data['encounter_type'],
+                            'service_date': service_date,
+                            'national_id': claim_data['national_id'],
+                            'member_id': claim_data['member_id'],
+                            'facility_id': claim_data['facility_id'],
+                            'unique_id': claim_data['unique_id'],
+                            'diagnosis_codes': claim_data['diagnosis_codes'],
+                            'service_code': claim_data['service_code'],
+                            'paid_amount_aed': claim_data['paid_amount_aed'],
+                            'approval_number': claim_data['approval_number'],
+                            'uploaded_by': job.created_by,
+                            'status': final_validation_result['status'],
+                            'error_type': final_validation_result['error_type'],
+                            'error_explanation': final_validation_result['explanations'],
+                            'recommended_action': final_validation_result['recommended_actions'],
+                            'validated_by': job.created_by,
+                            'content_hash': content_hash,
+                            'rules_fingerprint': rule_validator.fingerprint,
+                        }
+                    )
+                    
+                    # ============================================
+                    # DATA PIPELINE: Stage 4 - Refined Table
+                    # ============================================
+                    # Store validated/refined claim in RefinedClaim table
+                    RefinedClaim.objects.update_or_create(
+                        claim=claim,
+                        defaults={
+                            'service_code': claim.service_code,
+                            'paid_amount_aed': claim.paid_amount_aed,
+                            'status': final_validation_result['status'],
+                            'error_type': final_validation_result['error_type'],
+                            'error_explanation': final_validation_result['explanations'],
+                            'recommended_action': final_validation_result['recommended_actions'],
+                            **pipeline_fields,
+                            'rules_fingerprint': rule_validator.fingerprint,
+                            'processed_by_job': job,
+                        }
+                    )
             except Exception as e:
                 # Log error but continue processing
                 print(f"Error processing claim at row {idx}: {str(e)}")
                 error_count += 1
                 continue
+            
+            stored_error_types.append(final_validation_result['error_type'])
+            stored_claims.append((
+                {**claim_data, 'service_date': service_date.isoformat() if service_date else ''},
+                content_hash,
+                final_validation_result,
+            ))
+            if final_validation_result['status'] == 'validated':
+                validated_count += 1
+            else:
+                error_count += 1
+        
+        if skipped_claim_ids:
+            # Keep the stored results of skipped rows in this job's metrics
+            RefinedClaim.objects.filter(claim__claim_id__in=skipped_claim_ids).update(processed_by_job=job)
+        
+        record(job, checkpoint_row, {
+            'validated': validated_count,
+            'errors': error_count,
+            'skipped': len(skipped_claim_ids),
+        })
+        queue_llm_enrichment(stored_claims, rule_validator.fingerprint, job)
+    
+    # Stored results act as a cache keyed by content hash and rules fingerprint
+    monitoring.record_cache('claim_results', hits=len(skipped_claim_ids), misses=len(rows) - len(skipped_claim_ids))
+    monitoring.record_validated(stored_error_types, source='upload')
+
+
+def job_is_running(job: ValidationJob) -> bool:
+    """Whether a live run holds the job: processing, with a heartbeat within JOB_HEARTBEAT_TIMEOUT_SECONDS"""
+    if job.status != 'processing' or job.heartbeat_at is None:
+        return False
+    return job.heartbeat_at >= timezone.now() - timezone.timedelta(seconds=settings.JOB_HEARTBEAT_TIMEOUT_SECONDS)
+
+
+def claim_job(job_id: str, task_id: str = None) -> bool:
+    """
+    Mark the job processing for the run ``task_id``, unless another live run holds it
+    
+    A single conditional UPDATE, so of two runs started for one job only one
+    proceeds. The run that holds the job may claim it again (a message
+    redelivered after its worker died).
+    """
+    stale_before = timezone.now() - timezone.timedelta(seconds=settings.JOB_HEARTBEAT_TIMEOUT_SECONDS)
+    claimable = ~Q(status='processing') | Q(heartbeat_at__isnull=True) | Q(heartbeat_at__lt=stale_before)
+    if task_id:
+        claimable |= Q(task_id=task_id)
+    return ValidationJob.objects.filter(claimable, job_id=job_id).update(
+        status='processing', task_id=task_id or '', heartbeat_at=timezone.now(), error_message=''
+    ) == 1
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def process_claims_file(self, job_id: str, resume: bool = False):
+    """
+    Process claims file asynchronously
+    
+    Rows are processed in chunks of INGEST_CHUNK_SIZE, each committed with a
+    checkpoint on the job. With ``resume`` (or when the job is still marked
+    processing, i.e. a previous run died and the message was redelivered)
+    processing continues from the last committed chunk instead of row zero.
+    The job is claimed first (``claim_job``): a run started while another
+    live run holds the job exits without touching it.
+    
+    Wall time, rows/sec and query counts of each stage are saved as
+    JobStageTiming rows of the job when the run ends.
+    """
+    timer = None
+    try:
+        job = ValidationJob.objects.get(job_id=job_id)
+        resume = resume or job.status == 'processing'
+        if not claim_job(job_id, self.request.id):
+            print(f"Job {job_id} is being processed by another run, not starting a second one")
+            return {'status': 'skipped', 'error': 'Job is already being processed'}
+        job.refresh_from_db()
+        # Replaces a terminal snapshot of a previous run (the job's status is processing now)
+        progress.publish_job_progress(job)
+        timer = StageTimer(job=job, task_id=self.request.id)
+        if not resume:
+            job.checkpoint_row = 0
+            job.validated_count = 0
+            job.error_count = 0
+            job.skipped_claims = 0
+            job.llm_evaluation_completed = False
+            job.save(update_fields=['checkpoint_row', 'validated_count', 'error_count', 'skipped_claims', 'llm_evaluation_completed'])
+        
+        with timer.stage('load_rules'):
+            # Load rules with multi-tenant support (compiled rules are cached per worker)
+            rule_validator = get_rule_validator(job)
+            job.rules_fingerprint = rule_validator.fingerprint
+        
+        with timer.stage('ingestion'):
+            # Read claims file
+            df = read_claims_file(job.claims_file.path)
+            
+            # Normalize column names (handle case variations and aliases)
+            df.columns = canonical_columns(df.columns)
+            missing = missing_columns(df.columns)
+            if missing:
+                raise ValueError(f"Claims file is missing required columns: {', '.join(missing)}")
+        
+        job.total_claims = len(df)
+        job.save(update_fields=['total_claims', 'rules_fingerprint'])
+        progress.publish_job_progress(job, stages=timer.summary())
+        
+        chunk_size = settings.INGEST_CHUNK_SIZE
+        if job.checkpoint_row:
+            print(f"Resuming job {job.job_id} from row {job.checkpoint_row} of {len(df)}")
+        
+        # Process the file one chunk of rows at a time
+        for chunk_start in range(job.checkpoint_row, len(df), chunk_size):
+            chunk_end = min(chunk_start + chunk_size, len(df))
+            process_claim_chunk(job, df.iloc[chunk_start:chunk_end], chunk_end, rule_validator, timer)
+            progress.publish_job_progress(job, stages=timer.summary())
+        
+        if job.skipped_claims:
+            print(f"Skipped {job.skipped_claims} unchanged claims already validated with the current rules")
         
         # ============================================
         # DATA PIPELINE: Stage 5 - Analytics Pipeline → Metrics Table
         # ============================================
         # Generate metrics from refined claims
         print("Generating metrics from refined claims...")
-        generate_metrics_for_job(job)
+        with timer.stage('metrics'):
+            generate_metrics_for_job(job)
         job.metrics_generated = True
-        job.save()
+        job.save(update_fields=['metrics_generated'])
         
         # Mark job as completed
         job.status = 'completed'
         job.completed_at = timezone.now()
-        job.save()
+        job.save(update_fields=['status', 'completed_at'])
+        complete_llm_evaluation(job)
+        timer.save()
+        progress.publish_job_progress(job)
         
         return {
             'status': 'completed',
             'total': job.total_claims,
-            'validated': validated_count,
-            'errors': error_count
+            'validated': job.validated_count,
+            'errors': job.error_count,
+            'skipped': job.skipped_claims
         }
     
     except ValidationJob.DoesNotExist:
         return {'status': 'failed', 'error': 'Job not found'}
     except Exception as e:
-        job.status = 'failed'
-        job.error_message = str(e)
-        job.save()
+        # Update by query: the in-memory job may hold counters of a chunk that was rolled back
+        ValidationJob.objects.filter(job_id=job_id).update(status='failed', error_message=str(e))
+        if timer:
+            timer.save()
+        failed_job = ValidationJob.objects.filter(job_id=job_id).first()
+        if failed_job:
+            progress.publish_job_progress(failed_job)
         return {'status': 'failed', 'error': str(e)}
 
 
+def start_validation_job(job):
+    """Queue processing of a new job"""
+    try:
+        process_claims_file.apply_async(args=[job.job_id], queue=queue_for_job(job))
+    except Exception as e:
+        # If Celery is not running, log error but don't fail the request
+        print(f"Warning: Could not start Celery task: {str(e)}")
+        # Optionally, process synchronously in development
+        if settings.DEBUG:
+            print("Processing synchronously in DEBUG mode...")
+            process_claims_file(job.job_id)
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def assemble_upload(self, upload_id: str):
+    """
+    Assemble a completed chunked upload and start its ValidationJob (claims/uploads.py)
+    
+    The session was moved from open to assembling by the complete endpoint.
+    A checksum mismatch reopens it (the parts are kept, so the client can
+    re-send the bad ones); a file that fails pre-flight aborts it. Either
+    way the reason is stored in the session's error_message.
+    """
+    session = UploadSession.objects.filter(upload_id=upload_id, status='assembling').first()
+    if session is None:
+        return {'status': 'skipped', 'error': 'Upload is not being assembled'}
+    
+    try:
+        name = assemble(session)
+    except UploadError as e:
+        session.status = 'open'
+        session.error_message = str(e)
+        session.save(update_fields=['status', 'error_message', 'updated_at'])
+        return {'status': 'failed', 'error': str(e)}
+    
+    try:
+        preflight = preflight_claims_file(default_storage.path(name), session.filename)
+    except ValidationError as e:
+        # The parts are gone once assembled: the upload cannot be retried
+        default_storage.delete(name)
+        session.status = 'aborted'
+        session.error_message = str(e.detail[0])
+        session.save(update_fields=['status', 'error_message', 'updated_at'])
+        return {'status': 'failed', 'error': session.error_message}
+    
+    with transaction.atomic():
+        job = ValidationJob(
+            job_id=str(uuid.uuid4()),
+            created_by=session.created_by,
+            rule_set=session.rule_set or rules_cache.active_ruleset(),
+            total_claims=preflight['estimated_rows'],
+        )
+        job.claims_file.name = name
+        job.save()
+        session.status = 'completed'
+        session.job = job
+        session.save(update_fields=['status', 'job', 'updated_at'])
+    start_validation_job(job)
+    return {'status': 'completed', 'job_id': job.job_id}
+
+
+def record_stream_batch(job: ValidationJob, start_row: int, end_row: int, final: bool, counts: dict) -> bool:
+    """
+    Record a streamed batch and advance the job's checkpoint over the batches contiguous with it
+    
+    Runs inside the batch's transaction; the job row is locked only for this
+    bookkeeping. Returns True when the checkpoint reached the end of the
+    final batch, i.e. every row of the stream is committed.
+    """
+    StreamBatch.objects.update_or_create(
+        job=job, start_row=start_row,
+        defaults={
+            'end_row': end_row,
+            'final': final,
+            'validated_count': counts['validated'],
+            'error_count': counts['errors'],
+            'skipped_claims': counts['skipped'],
+        },
+    )
+    locked = ValidationJob.objects.select_for_update().get(pk=job.pk)
+    pending = {batch.start_row: batch for batch in locked.stream_batches.filter(start_row__gte=locked.checkpoint_row)}
+    finished = False
+    while locked.checkpoint_row in pending and not finished:
+        batch = pending.pop(locked.checkpoint_row)
+        locked.validated_count += batch.validated_count
+        locked.error_count += batch.error_count
+        locked.skipped_claims += batch.skipped_claims
+        locked.checkpoint_row = batch.end_row
+        finished = batch.final
+    locked.total_claims = max(locked.total_claims, end_row)
+    locked.processed_claims = locked.checkpoint_row
+    locked.checkpoint_at = timezone.now()
+    locked.heartbeat_at = locked.checkpoint_at
+    locked.rules_fingerprint = job.rules_fingerprint
+    locked.save()
+    job.refresh_from_db()
+    return finished
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def process_claim_batch(self, job_id: str, claims: list, start_row: int, final: bool = False):
+    """
+    Validate one micro-batch of a streamed job (POST /api/jobs/ingest/)
+    through the same chunk pipeline as process_claims_file
+    
+    Batches run in any order and in parallel: each is validated and stored
+    without a lock, then ``record_stream_batch`` advances the checkpoint and
+    counters under a short lock on the job row. The batch that completes the
+    stream (the final one, or the last missing one before it) generates the
+    job's metrics and completes it. Batches wholly behind the checkpoint
+    (e.g. committed by a resume) are skipped.
+    """
+    end_row = start_row + len(claims)
+    timer = None
+    try:
+        job = ValidationJob.objects.get(job_id=job_id)
+        if job.status != 'processing':
+            return {'status': job.status, 'skipped': True}
+        if start_row < end_row <= job.checkpoint_row:
+            return {'status': job.status, 'skipped': True}
+        
+        timer = StageTimer(job=job, task_id=self.request.id)
+        with timer.stage('load_rules'):
+            # Compiled rules are cached per worker, so only the first batch parses them
+            rule_validator = get_rule_validator(job)
+            job.rules_fingerprint = rule_validator.fingerprint
+        
+        finished = []
+        
+        def record(job, checkpoint_row, counts):
+            finished.append(record_stream_batch(job, start_row, end_row, final, counts))
+        
+        process_claim_chunk(job, claims_frame(claims, start_row), end_row, rule_validator, timer, record=record)
+        
+        if finished[0]:
+            with timer.stage('metrics'):
+                generate_metrics_for_job(job)
+            job.stream_batches.all().delete()
+            ValidationJob.objects.filter(pk=job.pk).update(
+                metrics_generated=True, status='completed', completed_at=timezone.now()
+            )
+            complete_llm_evaluation(job)
+            job.refresh_from_db()
+        
+        timer.save()
+        progress.publish_job_progress(job)
+        return {
+            'status': job.status,
+            'rows': end_row - start_row,
+            'checkpoint_row': job.checkpoint_row,
+        }
+    
+    except ValidationJob.DoesNotExist:
+        return {'status': 'failed', 'error': 'Job not found'}
+    except Exception as e:
+        error = str(e)
+    
+    ValidationJob.objects.filter(job_id=job_id).update(status='failed', error_message=error)
+    if timer:
+        timer.save()
+    failed_job = ValidationJob.objects.filter(job_id=job_id).first()
+    if failed_job:
+        progress.publish_job_progress(failed_job)
+    return {'status': 'failed', 'error': error}
+
+
 def generate_metrics_for_job(job: ValidationJob):
     """Generate metrics from refined claims for a specific job"""
     try:
@@ -359,281 +936,602 @@ def generate_metrics_for_job(job: ValidationJob):
         print(f"Error generating metrics for job {job.job_id}: {str(e)}")
 
 
-@shared_task(bind=True)
-def revalidate_all_claims(self=None, user_id=None):
-    """Revalidate all claims in database with current rules"""
-    try:
-        from django.contrib.auth.models import User
+def claim_to_data(claim: Claim) -> dict:
+    """Convert a stored claim to the dict format used by the validators"""
+    return {
+        'claim_id': claim.claim_id,
+        'encounter_type': claim.encounter_type,
+        'service_date': claim.service_date.isoformat() if claim.service_date else '',
+        'national_id': claim.national_id,
+        'member_id': claim.member_id,
+        'facility_id': claim.facility_id,
+        'unique_id': claim.unique_id,
+        'diagnosis_codes': claim.diagnosis_codes,
+        'service_code': claim.service_code,
+        'paid_amount_aed': float(claim.paid_amount_aed),
+        'approval_number': claim.approval_number or '',
+    }
+
+
+REFINED_UPDATE_FIELDS = [
+    'service_code', 'paid_amount_aed', 'status', 'error_type', 'error_explanation',
+    'recommended_action', 'static_rule_validated', 'llm_validated', 'static_rule_errors',
+    'llm_analysis', 'rules_fingerprint', 'processed_by_job', 'updated_at',
+]
+
+
+def revalidate_claim_batch(claims, rule_validator: RuleValidator, validated_by_user=None, timer: StageTimer = None):
+    """
+    Revalidate a batch of stored claims and write the results back in bulk
+    
+    Static rules run over the whole batch in one call; the master and refined
+    tables are then updated with one bulk_update and one bulk upsert inside a
+    single transaction, and claims with errors are queued for LLM enrichment
+    (enrich_claims). Returns (validated_count, error_count).
+    """
+    timer = timer or StageTimer()
+    claims_data = [claim_to_data(claim) for claim in claims]
+    
+    with timer.stage('static_rules', rows=len(claims_data)):
+        # ============================================
+        # DATA PIPELINE: Stage 3 - Validation
+        # ============================================
+        # ANALYTICS PIPELINE Component 1: Static Rule Evaluation
+        static_results = rule_validator.validate_claims(claims_data)
+    
+    now = timezone.now()
+    updated_claims = []
+    refined_claims = []
+    validated_count = 0
+    error_count = 0
+    
+    for claim, claim_data, static_validation_result in zip(claims, claims_data, static_results):
+        # ANALYTICS PIPELINE Component 2 (LLM) runs later on the llm queue
+        final_validation_result, pipeline_fields = static_evaluation(static_validation_result)
         
-        # Get the user who triggered the revalidation
-        validated_by_user = None
-        if user_id:
-            try:
-                validated_by_user = User.objects.get(id=user_id)
-            except User.DoesNotExist:
-                pass
+        # Master table values with final validation results
+        claim.status = final_validation_result['status']
+        claim.error_type = final_validation_result['error_type']
+        claim.error_explanation = final_validation_result['explanations']
+        claim.recommended_action = final_validation_result['recommended_actions']
+        claim.validated_by = validated_by_user
+        claim.rules_fingerprint = rule_validator.fingerprint
+        claim.updated_at = now
+        updated_claims.append(claim)
         
-        # Fallback to system user if no user provided
-        if not validated_by_user:
-            validated_by_user = User.objects.filter(is_superuser=True).first()
+        # Refined table row for this claim
+        refined_claims.append(RefinedClaim(
+            claim=claim,
+            service_code=claim.service_code,
+            paid_amount_aed=claim.paid_amount_aed,
+            status=final_validation_result['status'],
+            error_type=final_validation_result['error_type'],
+            error_explanation=final_validation_result['explanations'],
+            recommended_action=final_validation_result['recommended_actions'],
+            processed_by_job=None,  # Revalidation doesn't have a job
+            rules_fingerprint=rule_validator.fingerprint,
+            **pipeline_fields,
+        ))
         
+        if final_validation_result['status'] == 'validated':
+            validated_count += 1
+        else:
+            error_count += 1
+    
+    # ============================================
+    # DATA PIPELINE: Stage 4 - Master + Refined Tables
+    # ============================================
+    with timer.stage('persistence', rows=len(updated_claims)), transaction.atomic():
+        Claim.objects.bulk_update(
+            updated_claims,
+            ['status', 'error_type', 'error_explanation', 'recommended_action', 'validated_by', 'rules_fingerprint', 'updated_at'],
+        )
+        RefinedClaim.objects.bulk_create(
+            refined_claims,
+            update_conflicts=True,
+            unique_fields=['claim'],
+            update_fields=REFINED_UPDATE_FIELDS,
+        )
+    monitoring.record_validated([refined.error_type for refined in refined_claims], source='revalidation')
+    queue_llm_enrichment(
+        [(claim_data, claim.content_hash, static_validation_result)
+         for claim, claim_data, static_validation_result in zip(claims, claims_data, static_results)],
+        rule_validator.fingerprint,
+    )
+    
+    return validated_count, error_count
+
+
+def get_revalidation_user(user_id=None):
+    """User recorded as validated_by: the requesting user, else the first superuser"""
+    from django.contrib.auth.models import User
+    
+    if user_id:
+        try:
+            return User.objects.get(id=user_id)
+        except User.DoesNotExist:
+            pass
+    return User.objects.filter(is_superuser=True).first()
+
+
+def revalidate_claim_range(start_pk, end_pk, validated_by_user=None, on_batch=None, force=False, timer: StageTimer = None, ruleset: RuleSet = None):
+    """
+    Revalidate claims with start_pk <= pk <= end_pk (end_pk None = no upper bound)
+    
+    Claims are validated with ``ruleset`` (the default rule files if None);
+    those whose stored result already carries its fingerprint
+    are skipped unless ``force`` is set. Walks the range in primary-key order one batch at a time, so only one
+    batch of claims is ever held in memory. ``on_batch(processed, validated,
+    errors)`` is called with the counts of each finished batch.
+    Stages are timed into ``timer``.
+    Returns (processed, validated_count, error_count).
+    """
+    timer = timer or StageTimer()
+    with timer.stage('load_rules'):
         # Load rules with multi-tenant support (same logic as process_claims_file)
-        technical_rules = {}
-        medical_rules = {}
+        rule_validator = get_rule_validator(ruleset=ruleset)
+    
+    claims = Claim.objects.defer('error_explanation', 'recommended_action').order_by('pk')
+    if not force:
+        claims = claims.exclude(rules_fingerprint=rule_validator.fingerprint)
+    if end_pk is not None:
+        claims = claims.filter(pk__lte=end_pk)
+    batch_size = settings.REVALIDATION_BATCH_SIZE
+    processed = 0
+    validated_count = 0
+    error_count = 0
+    
+    last_pk = start_pk - 1
+    while True:
+        with timer.stage('ingestion') as ingestion:
+            batch = list(claims.filter(pk__gt=last_pk)[:batch_size])
+            ingestion['rows'] += len(batch)
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        
+        batch_validated, batch_errors = revalidate_claim_batch(
+            batch, rule_validator, validated_by_user, timer
+        )
+        processed += len(batch)
+        validated_count += batch_validated
+        error_count += batch_errors
+        
+        if on_batch:
+            on_batch(len(batch), batch_validated, batch_errors)
+    
+    return processed, validated_count, error_count
+
+
+def get_claim_shards(shard_size: int):
+    """Split the claim primary-key space into inclusive (start_pk, end_pk) ranges of shard_size ids"""
+    bounds = Claim.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return []
+    return [
+        (start, min(start + shard_size - 1, bounds['high']))
+        for start in range(bounds['low'], bounds['high'] + 1, shard_size)
+    ]
+
+
+def revalidation_progress(processed, total, validated, errors, **extra):
+    """Progress meta stored under the revalidation task id"""
+    return {
+        'processed': processed,
+        'total': total,
+        'validated': validated,
+        'errors': errors,
+        'percentage': (processed / total * 100) if total > 0 else 0,
+        **extra,
+    }
+
+
+def generate_overall_metrics():
+    """Generate overall metrics from all refined claims (not tied to a job)"""
+    # ============================================
+    # DATA PIPELINE: Stage 5 - Analytics Pipeline → Metrics Table
+    # ============================================
+    print("Generating overall metrics from refined claims...")
+    try:
+        refined_claims = RefinedClaim.objects.all()
         
-        # Check for active RuleSet first (multi-tenant support)
-        active_ruleset = RuleSet.objects.filter(is_active=True).first()
-        threshold_override = None
-        if active_ruleset:
-            threshold_override = float(active_ruleset.paid_amount_threshold) if active_ruleset.paid_amount_threshold else None
-            print(f"Using active RuleSet: {active_ruleset.name} (threshold: {threshold_override or 'from PDF'})")
+        if refined_claims.exists():
+            # Calculate aggregate metrics
+            total_refined = refined_claims.count()
+            validated_refined = refined_claims.filter(status='validated').count()
+            not_validated_refined = refined_claims.filter(status='not_validated').count()
+            
+            no_error_count = refined_claims.filter(error_type='no_error').count()
+            medical_error_count = refined_claims.filter(error_type='medical_error').count()
+            technical_error_count = refined_claims.filter(error_type='technical_error').count()
+            both_error_count = refined_claims.filter(error_type='both').count()
+            
+            paid_amount_no_error = refined_claims.filter(error_type='no_error').aggregate(total=Sum('paid_amount_aed'))['total'] or Decimal('0.00')
+            paid_amount_medical_error = refined_claims.filter(error_type='medical_error').aggregate(total=Sum('paid_amount_aed'))['total'] or Decimal('0.00')
+            paid_amount_technical_error = refined_claims.filter(error_type='technical_error').aggregate(total=Sum('paid_amount_aed'))['total'] or Decimal('0.00')
+            paid_amount_both_error = refined_claims.filter(error_type='both').aggregate(total=Sum('paid_amount_aed'))['total'] or Decimal('0.00')
+            
+            validation_rate = (validated_refined / total_refined * 100) if total_refined > 0 else Decimal('0.00')
+            static_rule_processed_count = refined_claims.filter(static_rule_validated=True).count()
+            llm_processed_count = refined_claims.filter(llm_validated=True).count()
+            
+            # Create overall metrics (no job association for revalidation)
+            period_start = timezone.now() - timezone.timedelta(days=1)
+            period_end = timezone.now()
+            
+            Metrics.objects.update_or_create(
+                job=None,
+                period_type='job',
+                period_start=period_start,
+                period_end=period_end,
+                defaults={
+                    'total_claims': total_refined,
+                    'validated_count': validated_refined,
+                    'not_validated_count': not_validated_refined,
+                    'no_error_count': no_error_count,
+                    'medical_error_count': medical_error_count,
+                    'technical_error_count': technical_error_count,
+                    'both_error_count': both_error_count,
+                    'paid_amount_no_error': paid_amount_no_error,
+                    'paid_amount_medical_error': paid_amount_medical_error,
+                    'paid_amount_technical_error': paid_amount_technical_error,
+                    'paid_amount_both_error': paid_amount_both_error,
+                    'validation_rate': validation_rate,
+                    'static_rule_processed_count': static_rule_processed_count,
+                    'llm_processed_count': llm_processed_count,
+                }
+            )
+            print(f"Overall metrics generated: {total_refined} claims, {validated_refined} validated, {validation_rate:.2f}% rate")
+    except Exception as e:
+        print(f"Error generating overall metrics: {str(e)}")
+
+
+def stale_claims(force=False, ruleset: RuleSet = None):
+    """Claims whose stored result was not produced by ``ruleset``'s rules (all claims if force)"""
+    if force:
+        return Claim.objects.all()
+    return Claim.objects.exclude(rules_fingerprint=get_rule_validator(ruleset=ruleset).fingerprint)
+
+
+def get_ruleset(rule_set_id=None):
+    """RuleSet by id (None for no id: the default rule files)"""
+    return RuleSet.objects.get(pk=rule_set_id) if rule_set_id else None
+
+
+@shared_task(bind=True)
+def revalidate_all_claims(self, user_id=None, force=False, rule_set_id=None):
+    """
+    Revalidate all claims in database with current rules
+    
+    On a worker the claim id space is split into shards of
+    REVALIDATION_SHARD_SIZE ids, one revalidate_claim_shard task per shard,
+    and finalize_revalidation runs as the chord callback. Shards report
+    aggregated progress under this task's id, and the callback stores the
+    final result there too. Run eagerly (``.apply()``) the whole table is
+    revalidated in-process instead.
+    
+    Claims are validated with RuleSet ``rule_set_id``, by default the one
+    active when the task starts; every shard uses that same RuleSet even if
+    another is activated mid-run. Claims already validated with its rules
+    fingerprint are skipped unless ``force`` is set.
+    """
+    try:
+        ruleset = get_ruleset(rule_set_id) if rule_set_id else rules_cache.active_ruleset()
+        rule_set_id = ruleset.pk if ruleset else None
+        total = stale_claims(force, ruleset).count()
+        
+        if self.request.is_eager or not self.request.id:
+            return revalidate_claims_inline(self, total, user_id, force, ruleset)
+        
+        shards = get_claim_shards(settings.REVALIDATION_SHARD_SIZE)
+        if not shards or not total:
+            return {'status': 'completed', 'total': 0, 'processed': 0, 'validated': 0, 'errors': 0}
+        parent_task_id = self.request.id
+        print(f"Revalidating {total} claims in {len(shards)} shards of {settings.REVALIDATION_SHARD_SIZE} ids...")
         
-        # Try to load technical rules
         try:
-            # Priority 1: Active RuleSet technical rules file
-            if active_ruleset and active_ruleset.technical_rules_file:
-                parser = TechnicalRuleParser(active_ruleset.technical_rules_file.path)
-                technical_rules = parser.parse()
-                print(f"Loaded technical rules from RuleSet: {active_ruleset.name}")
-            # Priority 2: Default technical rules file
-            else:
-                default_tech_rules = Path(settings.TENANT_CONFIG_PATH) / 'Humaein_Technical_Rules.pdf'
-                if default_tech_rules.exists():
-                    parser = TechnicalRuleParser(str(default_tech_rules))
-                    technical_rules = parser.parse()
-                    print(f"Loaded technical rules from default file: {len(technical_rules.get('service_approvals', {}))} service approvals")
-                else:
-                    print(f"Warning: Default technical rules file not found at {default_tech_rules}")
+            progress.start(parent_task_id, total=total, shards=len(shards))
         except Exception as e:
-            print(f"Error loading technical rules: {str(e)}")
-            technical_rules = {
-                'service_approvals': {},
-                'diagnosis_approvals': {},
-                'amount_threshold': 250.00,
-                'id_format_rules': {}
-            }
+            print(f"Could not initialise revalidation progress: {str(e)}")
+        self.update_state(state='PROGRESS', meta=revalidation_progress(0, total, 0, 0, shards=len(shards)))
         
-        # Try to load medical rules
+        chord(group(
+            revalidate_claim_shard.s(
+                start_pk, end_pk, user_id=user_id, parent_task_id=parent_task_id, force=force, rule_set_id=rule_set_id,
+            )
+            for start_pk, end_pk in shards
+        ))(finalize_revalidation.s(parent_task_id=parent_task_id, total=total))
+    except Exception as e:
+        print(f"Error in revalidate_all_claims: {str(e)}")
+        return {'status': 'failed', 'error': str(e)}
+    
+    # finalize_revalidation stores the result under this task id
+    raise Ignore()
+
+
+def revalidate_claims_inline(task, total, user_id=None, force=False, ruleset: RuleSet = None):
+    """Revalidate every claim in this process, reporting progress once per batch"""
+    validated_by_user = get_revalidation_user(user_id)
+    counts = {'processed': 0, 'validated': 0, 'errors': 0}
+    
+    def on_batch(processed, validated, errors):
+        counts['processed'] += processed
+        counts['validated'] += validated
+        counts['errors'] += errors
         try:
-            # Priority 1: Active RuleSet medical rules file
-            if active_ruleset and active_ruleset.medical_rules_file:
-                parser = MedicalRuleParser(active_ruleset.medical_rules_file.path)
-                medical_rules = parser.parse()
-                print(f"Loaded medical rules from RuleSet: {active_ruleset.name}")
-            # Priority 2: Default medical rules file
-            else:
-                default_med_rules = Path(settings.TENANT_CONFIG_PATH) / 'Humaein_Medical_Rules.pdf'
-                if default_med_rules.exists():
-                    parser = MedicalRuleParser(str(default_med_rules))
-                    medical_rules = parser.parse()
-                    print(f"Loaded medical rules from default file: {len(medical_rules.get('encounter_type_restrictions', {}))} encounter restrictions")
-                else:
-                    print(f"Warning: Default medical rules file not found at {default_med_rules}")
+            task.update_state(state='PROGRESS', meta=revalidation_progress(total=total, **counts))
+        except Exception:
+            pass  # No result backend (sync mode)
+    
+    timer = StageTimer(task_id=task.request.id)
+    print(f"Revalidating {total} claims in batches of {settings.REVALIDATION_BATCH_SIZE}...")
+    processed, validated_count, error_count = revalidate_claim_range(
+        1, None, validated_by_user, on_batch=on_batch, force=force, timer=timer, ruleset=ruleset
+    )
+    
+    with timer.stage('metrics'):
+        generate_overall_metrics()
+    timer.save()
+    
+    print(f"Revalidation completed: {processed}/{total} claims processed, {validated_count} validated, {error_count} errors")
+    
+    return {
+        'status': 'completed',
+        'total': total,
+        'processed': processed,
+        'validated': validated_count,
+        'errors': error_count,
+        'stages': timer.summary(),
+    }
+
+
+@shared_task(bind=True)
+def revalidate_claim_shard(self, start_pk, end_pk, user_id=None, parent_task_id=None, force=False, rule_set_id=None):
+    """Revalidate one shard of claims (start_pk <= pk <= end_pk) for revalidate_all_claims (no rule_set_id: default rules)"""
+    def on_batch(processed, validated, errors):
+        if not parent_task_id:
+            return
+        try:
+            totals = progress.increment(parent_task_id, processed=processed, validated=validated, errors=errors)
+            self.backend.store_result(parent_task_id, revalidation_progress(**totals), 'PROGRESS')
         except Exception as e:
-            print(f"Error loading medical rules: {str(e)}")
-            medical_rules = {
-                'encounter_type_restrictions': {},
-                'facility_type_restrictions': {},
-                'diagnosis_requirements': {},
-                'facility_registry': {},
-                'mutually_exclusive': []
-            }
-        
-        # Apply threshold override from RuleSet (configurable without code changes)
-        if threshold_override is not None:
-            technical_rules['amount_threshold'] = threshold_override
-            print(f"Threshold overridden by RuleSet: AED {threshold_override}")
-        elif not technical_rules.get('amount_threshold'):
-            technical_rules['amount_threshold'] = 250.00
-            print(f"Using default threshold: AED 250.00")
-        
-        # Initialize validators
-        rule_validator = RuleValidator(technical_rules, medical_rules)
-        llm_validator = LLMValidator()
-        
-        # Get all claims
-        all_claims = Claim.objects.all()
-        total = all_claims.count()
-        processed = 0
-        validated_count = 0
-        error_count = 0
-        
-        print(f"Revalidating {total} claims...")
-        
-        # Process each claim through full data pipeline
-        for claim in all_claims:
-            try:
-                # Convert claim to dict format
-                claim_data = {
-                    'claim_id': claim.claim_id,
-                    'encounter_type': claim.encounter_type,
-                    'service_date': claim.service_date.isoformat() if claim.service_date else '',
-                    'national_id': claim.national_id,
-                    'member_id': claim.member_id,
-                    'facility_id': claim.facility_id,
-                    'unique_id': claim.unique_id,
-                    'diagnosis_codes': claim.diagnosis_codes,
-                    'service_code': claim.service_code,
-                    'paid_amount_aed': float(claim.paid_amount_aed),
-                    'approval_number': claim.approval_number or '',
-                }
-                
-                # ============================================
-                # DATA PIPELINE: Stage 3 - Validation
-                # ============================================
-                # ANALYTICS PIPELINE Component 1: Static Rule Evaluation
-                static_validation_result = rule_validator.validate_claim(claim_data)
-                static_rule_validated = True
-                static_rule_errors = static_validation_result.get('explanations', '')
-                
-                # ANALYTICS PIPELINE Component 2: LLM-based Evaluation
-                llm_validated = False
-                llm_analysis = ''
-                final_validation_result = static_validation_result.copy()
-                
-                if static_validation_result['error_type'] != 'no_error':
-                    try:
-                        llm_result = llm_validator.validate_claim(claim_data, static_validation_result)
-                        llm_validated = True
-                        if llm_result.get('llm_enhanced'):
-                            if llm_result.get('llm_explanation'):
-                                llm_analysis = llm_result['llm_explanation']
-                                final_validation_result['explanations'] += f"\n\nLLM Analysis:\n{llm_result['llm_explanation']}"
-                            if llm_result.get('llm_recommendations'):
-                                llm_analysis += f"\n\nLLM Recommendations:\n{llm_result['llm_recommendations']}"
-                                final_validation_result['recommended_actions'] += f"\n\nLLM Recommendations:\n{llm_result['llm_recommendations']}"
-                    except Exception as e:
-                        print(f"LLM validation failed for claim {claim.claim_id}: {str(e)}")
-                        llm_analysis = f"LLM validation skipped: {str(e)}"
-                
-                # Update master table with final validation results
-                claim.status = final_validation_result['status']
-                claim.error_type = final_validation_result['error_type']
-                claim.error_explanation = final_validation_result['explanations']
-                claim.recommended_action = final_validation_result['recommended_actions']
-                claim.validated_by = validated_by_user
-                claim.save()
-                
-                # ============================================
-                # DATA PIPELINE: Stage 4 - Refined Table
-                # ============================================
-                # Store validated/refined claim in RefinedClaim table
-                refined_claim, refined_created = RefinedClaim.objects.update_or_create(
-                    claim=claim,
-                    defaults={
-                        'service_code': claim.service_code,
-                        'paid_amount_aed': claim.paid_amount_aed,
-                        'status': final_validation_result['status'],
-                        'error_type': final_validation_result['error_type'],
-                        'error_explanation': final_validation_result['explanations'],
-                        'recommended_action': final_validation_result['recommended_actions'],
-                        'static_rule_validated': static_rule_validated,
-                        'llm_validated': llm_validated,
-                        'static_rule_errors': static_rule_errors,
-                        'llm_analysis': llm_analysis,
-                        'processed_by_job': None,  # Revalidation doesn't have a job
-                    }
-                )
-                
-                if final_validation_result['status'] == 'validated':
-                    validated_count += 1
-                else:
-                    error_count += 1
-                
-                processed += 1
-                
-                # Update progress every 10 claims (only if Celery task is available)
-                if self and processed % 10 == 0:
-                    try:
-                        self.update_state(
-                            state='PROGRESS',
-                            meta={
-                                'processed': processed,
-                                'total': total,
-                                'validated': validated_count,
-                                'errors': error_count,
-                                'percentage': (processed / total * 100) if total > 0 else 0
-                            }
-                        )
-                    except:
-                        pass  # Ignore if update_state fails (sync mode)
-                
-            except Exception as e:
-                print(f"Error revalidating claim {claim.claim_id}: {str(e)}")
-                error_count += 1
-                processed += 1
-                continue
-        
-        # ============================================
-        # DATA PIPELINE: Stage 5 - Analytics Pipeline → Metrics Table
-        # ============================================
-        # Generate overall metrics from all refined claims
-        print("Generating overall metrics from refined claims...")
+            print(f"Could not report progress for {parent_task_id}: {str(e)}")
+    
+    # Timings are stored under the parent id, one row per stage and shard
+    timer = StageTimer(task_id=parent_task_id or self.request.id)
+    try:
+        processed, validated_count, error_count = revalidate_claim_range(
+            start_pk, end_pk, get_revalidation_user(user_id), on_batch=on_batch, force=force, timer=timer,
+            ruleset=get_ruleset(rule_set_id),
+        )
+    except Exception as e:
+        print(f"Error revalidating claims {start_pk}-{end_pk}: {str(e)}")
+        return {'processed': 0, 'validated': 0, 'errors': 0, 'error': f'claims {start_pk}-{end_pk}: {str(e)}'}
+    finally:
+        timer.save()
+    
+    print(f"Revalidated claims {start_pk}-{end_pk}: {processed} processed, {validated_count} validated, {error_count} errors")
+    return {'processed': processed, 'validated': validated_count, 'errors': error_count}
+
+
+@shared_task(bind=True)
+def finalize_revalidation(self, shard_results, parent_task_id=None, total=0):
+    """Chord callback: recompute overall metrics and store the final result under the parent task id"""
+    processed = sum(result['processed'] for result in shard_results)
+    validated_count = sum(result['validated'] for result in shard_results)
+    error_count = sum(result['errors'] for result in shard_results)
+    shard_errors = [result['error'] for result in shard_results if result.get('error')]
+    
+    timer = StageTimer(task_id=parent_task_id or self.request.id)
+    with timer.stage('metrics'):
+        generate_overall_metrics()
+    timer.save()
+    
+    result = {
+        'status': 'failed' if shard_errors else 'completed',
+        'total': total,
+        'processed': processed,
+        'validated': validated_count,
+        'errors': error_count,
+        'shards': len(shard_results),
+        'stages': stage_totals(JobStageTiming.objects.filter(task_id=timer.task_id)),
+    }
+    if shard_errors:
+        result['error'] = '; '.join(shard_errors)
+    print(f"Revalidation {result['status']}: {processed}/{total} claims processed in {len(shard_results)} shards, {validated_count} validated, {error_count} errors")
+    
+    if parent_task_id:
         try:
-            from .models import RefinedClaim
-            refined_claims = RefinedClaim.objects.all()
-            
-            if refined_claims.exists():
-                # Calculate aggregate metrics
-                total_refined = refined_claims.count()
-                validated_refined = refined_claims.filter(status='validated').count()
-                not_validated_refined = refined_claims.filter(status='not_validated').count()
-                
-                no_error_count = refined_claims.filter(error_type='no_error').count()
-                medical_error_count = refined_claims.filter(error_type='medical_error').count()
-                technical_error_count = refined_claims.filter(error_type='technical_error').count()
-                both_error_count = refined_claims.filter(error_type='both').count()
-                
-                paid_amount_no_error = refined_claims.filter(error_type='no_error').aggregate(total=Sum('paid_amount_aed'))['total'] or Decimal('0.00')
-                paid_amount_medical_error = refined_claims.filter(error_type='medical_error').aggregate(total=Sum('paid_amount_aed'))['total'] or Decimal('0.00')
-                paid_amount_technical_error = refined_claims.filter(error_type='technical_error').aggregate(total=Sum('paid_amount_aed'))['total'] or Decimal('0.00')
-                paid_amount_both_error = refined_claims.filter(error_type='both').aggregate(total=Sum('paid_amount_aed'))['total'] or Decimal('0.00')
-                
-                validation_rate = (validated_refined / total_refined * 100) if total_refined > 0 else Decimal('0.00')
-                static_rule_processed_count = refined_claims.filter(static_rule_validated=True).count()
-                llm_processed_count = refined_claims.filter(llm_validated=True).count()
-                
-                # Create overall metrics (no job association for revalidation)
-                period_start = timezone.now() - timezone.timedelta(days=1)
-                period_end = timezone.now()
-                
-                Metrics.objects.update_or_create(
-                    job=None,
-                    period_type='job',
-                    period_start=period_start,
-                    period_end=period_end,
-                    defaults={
-                        'total_claims': total_refined,
-                        'validated_count': validated_refined,
-                        'not_validated_count': not_validated_refined,
-                        'no_error_count': no_error_count,
-                        'medical_error_count': medical_error_count,
-                        'technical_error_count': technical_error_count,
-                        'both_error_count': both_error_count,
-                        'paid_amount_no_error': paid_amount_no_error,
-                        'paid_amount_medical_error': paid_amount_medical_error,
-                        'paid_amount_technical_error': paid_amount_technical_error,
-                        'paid_amount_both_error': paid_amount_both_error,
-                        'validation_rate': validation_rate,
-                        'static_rule_processed_count': static_rule_processed_count,
-                        'llm_processed_count': llm_processed_count,
-                    }
-                )
-                print(f"Overall metrics generated: {total_refined} claims, {validated_refined} validated, {validation_rate:.2f}% rate")
+            self.backend.store_result(parent_task_id, result, states.SUCCESS)
+            progress.clear(parent_task_id)
         except Exception as e:
-            print(f"Error generating overall metrics: {str(e)}")
+            print(f"Could not store revalidation result for {parent_task_id}: {str(e)}")
+    return result
+
+
+# Stored claim fields a dry run reads (claim_to_data plus the stored result)
+IMPACT_FIELDS = [
+    'claim_id', 'encounter_type', 'service_date', 'national_id', 'member_id', 'facility_id',
+    'unique_id', 'diagnosis_codes', 'service_code', 'paid_amount_aed', 'approval_number',
+    'status', 'error_type',
+]
+
+
+def evaluate_claim_range_impact(start_pk, end_pk, ruleset: RuleSet = None, sample_size=0, on_batch=None, timer: StageTimer = None,
+                                compare=False, baseline_ruleset: RuleSet = None):
+    """
+    Evaluate claims with start_pk <= pk <= end_pk (end_pk None = no upper
+    bound) with ``ruleset``'s rules without writing anything
+    
+    Results are compared with the stored ones, or with ``compare`` with
+    ``baseline_ruleset``'s rules (the default rule files if None): both
+    plans then evaluate the same claim data, so every claim is read and
+    normalised once for the two. Walks the range one
+    REVALIDATION_BATCH_SIZE batch at a time like revalidate_claim_range.
+    ``on_batch(processed, changed)`` is called after each batch. Returns an
+    ImpactSummary.
+    """
+    timer = timer or StageTimer()
+    with timer.stage('load_rules'):
+        rule_validator = get_rule_validator(ruleset=ruleset)
+        baseline_validator = get_rule_validator(ruleset=baseline_ruleset) if compare else None
+    
+    claims = Claim.objects.only(*IMPACT_FIELDS).order_by('pk')
+    if end_pk is not None:
+        claims = claims.filter(pk__lte=end_pk)
+    batch_size = settings.REVALIDATION_BATCH_SIZE
+    summary = ImpactSummary(sample_size)
+    
+    last_pk = start_pk - 1
+    while True:
+        with timer.stage('ingestion') as ingestion:
+            batch = list(claims.filter(pk__gt=last_pk)[:batch_size])
+            ingestion['rows'] += len(batch)
+        if not batch:
+            break
+        last_pk = batch[-1].pk
         
-        print(f"Revalidation completed: {processed}/{total} claims processed, {validated_count} validated, {error_count} errors")
+        changed = summary.changed
+        with timer.stage('static_rules', rows=len(batch)):
+            claims_data = [claim_to_data(claim) for claim in batch]
+            results = rule_validator.validate_claims(claims_data)
+            baselines = baseline_validator.validate_claims(claims_data) if compare else [None] * len(batch)
+            for claim, result, baseline in zip(batch, results, baselines):
+                summary.add(claim, result, baseline)
         
-        return {
-            'status': 'completed',
-            'total': total,
-            'processed': processed,
-            'validated': validated_count,
-            'errors': error_count
-        }
+        if on_batch:
+            on_batch(len(batch), summary.changed - changed)
+    
+    return summary
+
+
+def impact_result(summary: ImpactSummary, rule_set_id=None, total=0, compare=False, baseline_rule_set_id=None, **extra):
+    """Final result of a dry run, as stored under its task id"""
+    return {
+        'status': 'completed',
+        'dry_run': True,
+        'rule_set': rule_set_id,
+        # 'stored': compared with the stored results
+        'baseline': baseline_rule_set_id if compare else 'stored',
+        'total': total,
+        **summary.as_dict(),
+        **extra,
+    }
+
+
+@shared_task(bind=True)
+def rule_set_impact(self, rule_set_id=None, sample_size=0, compare=False, baseline_rule_set_id=None):
+    """
+    Dry run: how stored claims would change if validated with RuleSet
+    ``rule_set_id`` (the default rule files if None). Read-only.
+    
+    With ``compare`` (A/B mode) the baseline is RuleSet
+    ``baseline_rule_set_id`` (default rule files if None) evaluated in the
+    same pass instead of the stored results.
+    
+    Sharded like revalidate_all_claims: one rule_set_impact_shard per
+    REVALIDATION_SHARD_SIZE claim ids and finalize_rule_set_impact as the
+    chord callback, which merges the partial summaries and stores the result
+    under this task's id. Run eagerly the claims are evaluated in-process.
+    """
+    try:
+        ruleset = get_ruleset(rule_set_id)
+        baseline_ruleset = get_ruleset(baseline_rule_set_id) if compare else None
+        total = Claim.objects.count()
+        
+        if self.request.is_eager or not self.request.id:
+            timer = StageTimer(task_id=self.request.id)
+            summary = evaluate_claim_range_impact(
+                1, None, ruleset, sample_size, timer=timer, compare=compare, baseline_ruleset=baseline_ruleset,
+            )
+            timer.save()
+            print(f"Rule set impact: {summary.changed}/{summary.evaluated} claims would change, {summary.flipped['count']} flip status")
+            return impact_result(summary, rule_set_id, total, compare, baseline_rule_set_id, stages=timer.summary())
+        
+        shards = get_claim_shards(settings.REVALIDATION_SHARD_SIZE)
+        if not shards:
+            return impact_result(ImpactSummary(sample_size), rule_set_id, total, compare, baseline_rule_set_id)
+        parent_task_id = self.request.id
+        print(f"Evaluating rule set impact on {total} claims in {len(shards)} shards...")
+        
+        try:
+            progress.start(parent_task_id, total=total, shards=len(shards), changed=0)
+        except Exception as e:
+            print(f"Could not initialise impact progress: {str(e)}")
+        self.update_state(state='PROGRESS', meta={'processed': 0, 'total': total, 'changed': 0, 'percentage': 0})
         
+        chord(group(
+            rule_set_impact_shard.s(
+                start_pk, end_pk, rule_set_id=rule_set_id, sample_size=sample_size, parent_task_id=parent_task_id,
+                compare=compare, baseline_rule_set_id=baseline_rule_set_id,
+            )
+            for start_pk, end_pk in shards
+        ))(finalize_rule_set_impact.s(
+            parent_task_id=parent_task_id, rule_set_id=rule_set_id, sample_size=sample_size, total=total,
+            compare=compare, baseline_rule_set_id=baseline_rule_set_id,
+        ))
     except Exception as e:
-        print(f"Error in revalidate_all_claims: {str(e)}")
-        return {'status': 'failed', 'error': str(e)}
+        print(f"Error in rule_set_impact: {str(e)}")
+        return {'status': 'failed', 'dry_run': True, 'error': str(e)}
+    
+    # finalize_rule_set_impact stores the result under this task id
+    raise Ignore()
+
 
+@shared_task(bind=True)
+def rule_set_impact_shard(self, start_pk, end_pk, rule_set_id=None, sample_size=0, parent_task_id=None,
+                          compare=False, baseline_rule_set_id=None):
+    """Partial impact summary of one shard of claims (start_pk <= pk <= end_pk) for rule_set_impact"""
+    def on_batch(processed, changed):
+        if not parent_task_id:
+            return
+        try:
+            totals = progress.increment(parent_task_id, processed=processed, changed=changed)
+            self.backend.store_result(parent_task_id, {
+                'processed': totals['processed'],
+                'total': totals['total'],
+                'changed': totals['changed'],
+                'percentage': (totals['processed'] / totals['total'] * 100) if totals['total'] > 0 else 0,
+            }, 'PROGRESS')
+        except Exception as e:
+            print(f"Could not report progress for {parent_task_id}: {str(e)}")
+    
+    timer = StageTimer(task_id=parent_task_id or self.request.id)
+    try:
+        summary = evaluate_claim_range_impact(
+            start_pk, end_pk, get_ruleset(rule_set_id), sample_size, on_batch=on_batch, timer=timer,
+            compare=compare, baseline_ruleset=get_ruleset(baseline_rule_set_id) if compare else None,
+        )
+    except Exception as e:
+        print(f"Error evaluating impact on claims {start_pk}-{end_pk}: {str(e)}")
+        return {**ImpactSummary().as_dict(), 'error': f'claims {start_pk}-{end_pk}: {str(e)}'}
+    finally:
+        timer.save()
+    return summary.as_dict()
+
+
+@shared_task(bind=True)
+def finalize_rule_set_impact(self, shard_results, parent_task_id=None, rule_set_id=None, sample_size=0, total=0,
+                             compare=False, baseline_rule_set_id=None):
+    """Chord callback: merge the shard summaries and store the result under the parent task id"""
+    summary = ImpactSummary(sample_size)
+    for shard_result in shard_results:
+        summary.merge(shard_result)
+    shard_errors = [shard_result['error'] for shard_result in shard_results if shard_result.get('error')]
+    
+    result = impact_result(
+        summary, rule_set_id, total, compare, baseline_rule_set_id, shards=len(shard_results),
+        stages=stage_totals(JobStageTiming.objects.filter(task_id=parent_task_id or self.request.id)),
+    )
+    if shard_errors:
+        result['status'] = 'failed'
+        result['error'] = '; '.join(shard_errors)
+    print(f"Rule set impact {result['status']}: {summary.changed}/{summary.evaluated} claims would change, {summary.flipped['count']} flip status")
+    
+    if parent_task_id:
+        try:
+            self.backend.store_result(parent_task_id, result, states.SUCCESS)
+            progress.clear(parent_task_id)
+        except Exception as e:
+            print(f"Could not store impact result for {parent_task_id}: {str(e)}")
+    return result
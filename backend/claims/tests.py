@@ -1,6 +1,11 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
+from django.conf import settings
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
-from .models import Claim, ValidationJob
+from rest_framework.test import APIClient
+from django.utils import timezone
+from .models import Claim, ValidationJob, RefinedClaim, Metrics, JobStageTiming, UploadSession
 
 
 class ClaimModelTest(TestCase):
@@ -32,3 +37,1063 @@ class ValidationJobModelTest(TestCase):
             created_by=self.user
         )
         self.assertEqual(str(job), 'Job test-job-001 - pending')
+
+
+class ClaimPaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i in range(7):
+            Claim.objects.create(
+                claim_id=f'PAGE{i:03d}',
+                encounter_type='outpatient',
+                service_date=date(2025, 1, 1),
+                service_code='SRV2001',
+                paid_amount_aed=Decimal('100.00'),
+            )
+    
+    def test_cursor_pagination_walks_all_claims(self):
+        seen = []
+        url = '/api/claims/?pagination=cursor&page_size=3&ordering=paid_amount_aed'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen.extend(row['claim_id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(sorted(seen), sorted(Claim.objects.values_list('claim_id', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+    
+    def test_cursor_previous_link_returns_prior_page(self):
+        first = self.client.get('/api/claims/?pagination=cursor&page_size=3')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [row['claim_id'] for row in back.data['results']],
+            [row['claim_id'] for row in first.data['results']],
+        )
+    
+    def test_page_number_without_count(self):
+        response = self.client.get('/api/claims/?count=none&page_size=5&page=2')
+        self.assertIsNone(response.data['count'])
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['next'])
+
+
+class ClaimListShapingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i in range(5):
+            Claim.objects.create(
+                claim_id=f'SHAPE{i:03d}',
+                encounter_type='outpatient',
+                service_date=date(2025, 1, 1),
+                service_code='SRV2001',
+                paid_amount_aed=Decimal('100.00'),
+                error_explanation='x' * 500,
+                uploaded_by=self.user,
+                validated_by=self.user,
+            )
+    
+    def test_summary_view_omits_text_blobs(self):
+        response = self.client.get('/api/claims/?view=summary')
+        row = response.data['results'][0]
+        self.assertNotIn('error_explanation', row)
+        self.assertNotIn('uploaded_by_username', row)
+        self.assertIn('error_type', row)
+    
+    def test_fields_param_selects_columns_without_n_plus_one(self):
+        with self.assertNumQueries(2):  # page count + one joined select
+            response = self.client.get('/api/claims/?fields=claim_id,status,uploaded_by_username')
+        row = response.data['results'][0]
+        self.assertEqual(set(row), {'claim_id', 'status', 'uploaded_by_username'})
+        self.assertEqual(row['uploaded_by_username'], 'testuser')
+    
+    def test_full_list_joins_users(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/claims/')
+        self.assertEqual(response.data['results'][0]['validated_by_username'], 'testuser')
+
+
+class ClaimSearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Claim.objects.create(
+            claim_id='SEARCH001', encounter_type='inpatient', service_date=date(2025, 1, 1),
+            member_id='UZF615NA', service_code='SRV1001', paid_amount_aed=Decimal('10.00'),
+            error_explanation='Service code SRV1001 requires prior approval',
+        )
+        Claim.objects.create(
+            claim_id='SEARCH002', encounter_type='inpatient', service_date=date(2025, 1, 1),
+            member_id='B1G36XGM', service_code='SRV1001', paid_amount_aed=Decimal('10.00'),
+        )
+    
+    def test_partial_member_id(self):
+        response = self.client.get('/api/claims/?search=f615')
+        self.assertEqual([row['claim_id'] for row in response.data['results']], ['SEARCH001'])
+    
+    def test_error_explanation_is_searchable(self):
+        response = self.client.get('/api/claims/?search=approval')
+        self.assertEqual([row['claim_id'] for row in response.data['results']], ['SEARCH001'])
+
+
+@override_settings(OPENAI_API_KEY='')
+class ClaimValidateTest(TestCase):
+    def setUp(self):
+        from datetime import datetime
+        from claims.synthetic import generate_claim_rows
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        row = next(row for row in generate_claim_rows(20, error_rate=0, seed=1) if not row['approval_number'])
+        self.claim = dict(
+            row, claim_id='LIVE-1', paid_amount_aed=100,
+            service_date=datetime.strptime(row['service_date'], '%m/%d/%y').date().isoformat(),
+        )
+    
+    def test_claims_are_validated_without_being_stored(self):
+        response = self.client.post('/api/claims/validate/', self.claim, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results']['claim_id'], 'LIVE-1')
+        self.assertEqual(response.data['results']['error_type'], 'no_error')
+        self.assertIn('duration_ms', response.data)
+        
+        over_threshold = dict(self.claim, claim_id='LIVE-2', paid_amount_aed=100000)
+        response = self.client.post('/api/claims/validate/?llm=true', [self.claim, over_threshold], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['error_type'] for result in response.data['results']], ['no_error', 'technical_error'])
+        self.assertIn('llm_task_id', response.data)
+        self.assertFalse(Claim.objects.exists())
+    
+    def test_invalid_claims_are_rejected(self):
+        response = self.client.post('/api/claims/validate/', dict(self.claim, service_date='not a date'), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('service_date', response.data['errors'])
+        with override_settings(VALIDATE_MAX_CLAIMS=1):
+            response = self.client.post('/api/claims/validate/', [self.claim, self.claim], format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ClaimExportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i, error_type in enumerate(['no_error', 'technical_error', 'technical_error']):
+            Claim.objects.create(
+                claim_id=f'EXPORT{i:03d}', encounter_type='outpatient', service_date=date(2025, 1, 1),
+                service_code='SRV2001', paid_amount_aed=Decimal('12.50'), error_type=error_type,
+            )
+    
+    def test_csv_export_honours_filters(self):
+        response = self.client.get('/api/claims/export/?format=csv&error_type=technical_error')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[0], 'claim_id')
+        self.assertEqual(len(lines), 3)
+    
+    @override_settings(CLAIMS_EXPORT_CHUNK_SIZE=1)
+    def test_export_is_streamed_chunk_by_chunk(self):
+        response = self.client.get('/api/claims/export/?format=csv')
+        self.assertFalse(response.is_async)
+        chunks = iter(response.streaming_content)
+        # The first chunk is sent before the remaining rows are read
+        self.assertEqual(len(next(chunks).decode().splitlines()), 2)
+        self.assertEqual(len(b''.join(chunks).decode().splitlines()), 2)
+    
+    def test_parquet_export(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest('pyarrow not installed')
+        import io
+        response = self.client.get('/api/claims/export/?format=parquet')
+        self.assertEqual(response.status_code, 200)
+        table = pq.read_table(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(sorted(table.column('claim_id').to_pylist()), ['EXPORT000', 'EXPORT001', 'EXPORT002'])
+
+
+class RevalidationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        for i in range(5):
+            Claim.objects.create(
+                claim_id=f'REVAL{i:03d}', encounter_type='inpatient', service_date=date(2025, 1, 1),
+                national_id='ABCD1234', member_id='EFGH5678', facility_id='IJKL9012',
+                unique_id='ABCD-EFGH-IJKL', service_code='SRV1001',
+                paid_amount_aed=Decimal('100.00') if i % 2 else Decimal('900.00'),
+            )
+    
+    @override_settings(REVALIDATION_BATCH_SIZE=2, OPENAI_API_KEY='')
+    def test_revalidation_updates_claims_in_batches(self):
+        from .tasks import revalidate_all_claims
+        result = revalidate_all_claims.apply(kwargs={'user_id': self.user.id}).get()
+        self.assertEqual(result['processed'], 5)
+        self.assertEqual(RefinedClaim.objects.count(), 5)
+        self.assertFalse(Claim.objects.filter(validated_by__isnull=True).exists())
+        # Running again upserts the refined rows instead of duplicating them
+        revalidate_all_claims.apply(kwargs={'user_id': self.user.id}).get()
+        self.assertEqual(RefinedClaim.objects.count(), 5)
+        refined = RefinedClaim.objects.get(claim__claim_id='REVAL000')
+        self.assertEqual(refined.error_type, Claim.objects.get(claim_id='REVAL000').error_type)
+    
+    @override_settings(OPENAI_API_KEY='')
+    def test_revalidation_skips_claims_at_current_rules(self):
+        from .tasks import revalidate_all_claims
+        revalidate_all_claims.apply(kwargs={'user_id': self.user.id}).get()
+        fingerprints = set(Claim.objects.values_list('rules_fingerprint', flat=True))
+        self.assertEqual(len(fingerprints), 1)
+        self.assertNotIn('', fingerprints)
+        self.assertEqual(RefinedClaim.objects.get(claim__claim_id='REVAL000').rules_fingerprint, fingerprints.pop())
+        # Nothing is stale until the rules change, unless the run is forced
+        result = revalidate_all_claims.apply(kwargs={'user_id': self.user.id}).get()
+        self.assertEqual(result['processed'], 0)
+        result = revalidate_all_claims.apply(kwargs={'user_id': self.user.id, 'force': True}).get()
+        self.assertEqual(result['processed'], 5)
+    
+    @override_settings(REVALIDATION_BATCH_SIZE=2, OPENAI_API_KEY='')
+    def test_shards_cover_all_claims(self):
+        from .tasks import finalize_revalidation, get_claim_shards, revalidate_claim_shard
+        shards = get_claim_shards(2)
+        self.assertEqual(len(shards), 3)
+        results = [
+            revalidate_claim_shard.apply(args=shard, kwargs={'user_id': self.user.id}).get()
+            for shard in shards
+        ]
+        self.assertEqual([result['processed'] for result in results], [2, 2, 1])
+        summary = finalize_revalidation.apply(args=(results,), kwargs={'total': 5}).get()
+        self.assertEqual(summary['status'], 'completed')
+        self.assertEqual(summary['processed'], 5)
+        self.assertEqual(RefinedClaim.objects.count(), 5)
+        self.assertTrue(Metrics.objects.filter(job=None).exists())
+
+
+@override_settings(REVALIDATION_BATCH_SIZE=2, OPENAI_API_KEY='')
+class RuleSetImpactTest(TestCase):
+    def setUp(self):
+        from rules import cache
+        from rules.models import RuleSet
+        from claims.synthetic import generate_claim_rows
+        from .tasks import process_claims_file
+        cache.invalidate()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        # Clean claims without approval: only the paid amount threshold decides
+        row = next(row for row in generate_claim_rows(20, error_rate=0, seed=1) if not row['approval_number'])
+        rows = [dict(row, claim_id=f'IMPACT{i}', paid_amount_aed=amount) for i, amount in enumerate([100, 300, 900, 2000])]
+        process_claims_file.apply(args=(create_claims_job(self.user, rows).job_id,)).get()
+        self.ruleset = RuleSet.objects.create(name='Candidate', paid_amount_threshold=Decimal('1000.00'), is_active=False)
+    
+    def test_dry_run_summarises_changes_without_writing(self):
+        from .tasks import finalize_rule_set_impact, get_claim_shards, rule_set_impact, rule_set_impact_shard
+        stored = list(Claim.objects.order_by('pk').values_list('status', 'error_type', 'rules_fingerprint', 'updated_at'))
+        
+        result = rule_set_impact.apply(kwargs={'rule_set_id': self.ruleset.pk, 'sample_size': 10}).get()
+        self.assertTrue(result['dry_run'])
+        self.assertEqual(result['evaluated'], 4)
+        self.assertEqual(result['to_validated'], {'count': 2, 'paid_amount': '1200.00'})
+        self.assertEqual(result['by_error_type'], {'technical_error->no_error': {'count': 2, 'paid_amount': '1200.00'}})
+        self.assertEqual([bucket['count'] for bucket in result['by_service'].values()], [2])
+        self.assertEqual(sorted(result['sample']), ['IMPACT1', 'IMPACT2'])
+        self.assertEqual(stored, list(Claim.objects.order_by('pk').values_list('status', 'error_type', 'rules_fingerprint', 'updated_at')))
+        
+        # Shards merged by the chord callback give the same summary
+        shard_results = [
+            rule_set_impact_shard.apply(args=shard, kwargs={'rule_set_id': self.ruleset.pk, 'sample_size': 1}).get()
+            for shard in get_claim_shards(2)
+        ]
+        merged = finalize_rule_set_impact.apply(
+            args=(shard_results,), kwargs={'rule_set_id': self.ruleset.pk, 'sample_size': 1, 'total': 4}
+        ).get()
+        for field in ('changed', 'flipped', 'by_error_type', 'by_service', 'by_facility'):
+            self.assertEqual(merged[field], result[field])
+        self.assertEqual(len(merged['sample']), 1)
+    
+    def test_compare_evaluates_two_rule_sets_in_one_pass(self):
+        from rules.models import RuleSet
+        strict = RuleSet.objects.create(name='Strict', paid_amount_threshold=Decimal('200.00'), is_active=False)
+        response = self.client.post(
+            f'/api/rulesets/{self.ruleset.pk}/compare/', {'baseline': strict.pk, 'sample': 5}, format='json'
+        )
+        self.assertIn(response.status_code, (200, 202))
+        from .tasks import rule_set_impact
+        result = rule_set_impact.apply(kwargs={
+            'rule_set_id': self.ruleset.pk, 'compare': True, 'baseline_rule_set_id': strict.pk,
+        }).get()
+        self.assertEqual(result['baseline'], strict.pk)
+        self.assertEqual(result['matrix'], {
+            'no_error': {'no_error': 1},
+            'technical_error': {'no_error': 2, 'technical_error': 1},
+        })
+        self.assertEqual(result['paid_amount_by_error_type']['no_error'], {
+            'baseline': '100.00', 'candidate': '1300.00', 'delta': '1200.00',
+        })
+        self.assertEqual(result['paid_amount_by_error_type']['technical_error']['delta'], '-1200.00')
+    
+    def test_impact_endpoint(self):
+        response = self.client.post(f'/api/rulesets/{self.ruleset.pk}/impact/', {'sample': 'x'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(f'/api/rulesets/{self.ruleset.pk}/impact/', {'sample': 2}, format='json')
+        self.assertIn(response.status_code, (200, 202))
+
+
+def create_claims_job(user, rows):
+    """ValidationJob for an xlsx file built from synthetic claim rows"""
+    import io
+    import pandas as pd
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    buffer = io.BytesIO()
+    pd.DataFrame(rows).to_excel(buffer, index=False)
+    return ValidationJob.objects.create(
+        job_id=f'job-{ValidationJob.objects.count()}', created_by=user,
+        claims_file=SimpleUploadedFile('claims.xlsx', buffer.getvalue()),
+    )
+
+
+@override_settings(OPENAI_API_KEY='', UPLOAD_PART_MAX_BYTES=4096)
+class ChunkedUploadTest(TestCase):
+    def setUp(self):
+        import hashlib
+        import io
+        import pandas as pd
+        from claims.synthetic import generate_claim_rows
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        buffer = io.BytesIO()
+        pd.DataFrame(list(generate_claim_rows(5, seed=2))).to_excel(buffer, index=False)
+        self.content = buffer.getvalue()
+        self.checksum = hashlib.sha256(self.content).hexdigest()
+    
+    def start(self, **overrides):
+        data = {'filename': 'claims.xlsx', 'size': len(self.content), 'checksum': self.checksum, **overrides}
+        response = self.client.post('/api/uploads/', data, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['upload_id']
+    
+    def put_parts(self, upload_id, parts):
+        for number, data in parts:
+            response = self.client.put(f'/api/uploads/{upload_id}/parts/{number}/', data, content_type='application/octet-stream')
+            self.assertEqual(response.status_code, 200)
+    
+    def test_parts_are_assembled_into_a_job(self):
+        upload_id = self.start()
+        parts = [(i // 4000 + 1, self.content[i:i + 4000]) for i in range(0, len(self.content), 4000)]
+        # A dropped connection is recovered by re-sending the missing parts
+        self.put_parts(upload_id, parts[:-1])
+        self.assertEqual(self.client.post(f'/api/uploads/{upload_id}/complete/').status_code, 400)
+        session = self.client.get(f'/api/uploads/{upload_id}/').data
+        self.assertEqual(list(session['parts']), [number for number, _ in parts[:-1]])
+        self.put_parts(upload_id, parts[-1:])
+        
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 202)
+        # Assembly ran in the (eager) assemble_upload task
+        self.assertEqual(response.data['status'], 'completed')
+        job = ValidationJob.objects.get(pk=response.data['job'])
+        self.assertEqual(job.created_by, self.user)
+        self.assertEqual(job.total_claims, 5)
+        with job.claims_file.open('rb') as claims_file:
+            self.assertEqual(claims_file.read(), self.content)
+        self.assertEqual(self.client.post(f'/api/uploads/{upload_id}/complete/').status_code, 409)
+    
+    def test_checksum_and_part_size_are_enforced(self):
+        upload_id = self.start(checksum='0' * 64)
+        response = self.client.put(f'/api/uploads/{upload_id}/parts/1/', b'x' * 5000, content_type='application/octet-stream')
+        self.assertEqual(response.status_code, 413)
+        self.put_parts(upload_id, [(i // 4000 + 1, self.content[i:i + 4000]) for i in range(0, len(self.content), 4000)])
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 202)
+        # The parts are kept so the upload can be fixed and completed again
+        self.assertEqual(response.data['status'], 'open')
+        self.assertIn('Checksum', response.data['error_message'])
+        self.assertTrue(response.data['parts'])
+        self.assertFalse(ValidationJob.objects.exists())
+    
+    def test_part_without_body_is_rejected(self):
+        upload_id = self.start()
+        response = self.client.put(f'/api/uploads/{upload_id}/parts/1/', b'', content_type='application/octet-stream',
+                                   CONTENT_LENGTH='0')
+        self.assertEqual(response.status_code, 400)
+        # Chunked transfer encoding: no Content-Length, so the body is never read
+        response = self.client.put(f'/api/uploads/{upload_id}/parts/1/', b'', content_type='application/octet-stream')
+        self.assertEqual(response.status_code, 411)
+    
+    def test_upload_is_assembled_once(self):
+        from unittest import mock
+        upload_id = self.start()
+        self.put_parts(upload_id, [(i // 4000 + 1, self.content[i:i + 4000]) for i in range(0, len(self.content), 4000)])
+        with mock.patch('claims.views.assemble_upload.apply_async') as apply_async:
+            first = self.client.post(f'/api/uploads/{upload_id}/complete/')
+            second = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(first.data['status'], 'assembling')
+        self.assertEqual(second.status_code, 409)
+        apply_async.assert_called_once_with(args=[upload_id])
+        # Parts being assembled are not deleted by an abort
+        self.assertEqual(self.client.delete(f'/api/uploads/{upload_id}/').status_code, 204)
+        self.assertEqual(UploadSession.objects.get(upload_id=upload_id).status, 'assembling')
+
+
+@override_settings(OPENAI_API_KEY='')
+class ClaimReuploadTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+    
+    def upload(self, rows):
+        from .tasks import process_claims_file
+        job = create_claims_job(self.user, rows)
+        process_claims_file.apply(args=(job.job_id,)).get()
+        job.refresh_from_db()
+        return job
+    
+    def test_unchanged_rows_are_not_revalidated(self):
+        from claims.synthetic import generate_claim_rows
+        rows = list(generate_claim_rows(4, seed=1))
+        first = self.upload(rows)
+        self.assertEqual(first.status, 'completed')
+        self.assertTrue(first.rules_fingerprint)
+        self.assertFalse(Claim.objects.filter(rules_fingerprint='').exists())
+        stamps = dict(Claim.objects.values_list('claim_id', 'updated_at'))
+        
+        self.assertEqual(first.skipped_claims, 0)
+        
+        rows[2]['paid_amount_aed'] += 1
+        with override_settings(INGEST_CHUNK_SIZE=3):
+            second = self.upload(rows)
+        self.assertEqual(second.processed_claims, 4)
+        self.assertEqual(second.skipped_claims, 3)
+        self.assertEqual(second.validated_count + second.error_count, 4)
+        self.assertEqual(RefinedClaim.objects.filter(processed_by_job=second).count(), 4)
+        changed = {
+            claim_id for claim_id, updated_at in Claim.objects.values_list('claim_id', 'updated_at')
+            if updated_at != stamps[claim_id]
+        }
+        self.assertEqual(changed, {'CLAIM_3'})
+
+
+class FakeRedis:
+    """In-memory stand-in for the progress Redis client (get/set/delete/publish)"""
+    def __init__(self):
+        self.values = {}
+    
+    def pipeline(self):
+        return self
+    
+    def execute(self):
+        return []
+    
+    def get(self, key):
+        return self.values.get(key)
+    
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+    
+    def delete(self, key):
+        self.values.pop(key, None)
+    
+    def publish(self, channel, payload):
+        pass
+
+
+@override_settings(OPENAI_API_KEY='', INGEST_CHUNK_SIZE=2)
+class JobStageTimingTest(TestCase):
+    def setUp(self):
+        from claims.synthetic import generate_claim_rows
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.job = create_claims_job(self.user, list(generate_claim_rows(5, seed=3)))
+    
+    def test_job_stages_are_recorded_and_returned_by_status(self):
+        from .tasks import process_claims_file
+        # The llm stage is recorded by the enrichment queued after each chunk commits
+        with self.captureOnCommitCallbacks(execute=True):
+            process_claims_file.apply(args=(self.job.job_id,)).get()
+        stages = {timing.stage: timing for timing in self.job.stage_timings.all()}
+        self.assertEqual(set(stages), {'load_rules', 'ingestion', 'static_rules', 'llm', 'persistence', 'metrics'})
+        self.assertEqual(stages['ingestion'].rows, 5)
+        self.assertEqual(stages['persistence'].rows, 5)
+        self.assertGreater(stages['persistence'].query_count, 0)
+        
+        response = self.client.get(f'/api/jobs/{self.job.pk}/status/')
+        self.assertEqual([stage['stage'] for stage in response.data['stages']], list(stages))
+    
+    def test_enrichment_republishes_status_and_completes_llm_evaluation(self):
+        from unittest import mock
+        from .tasks import process_claims_file
+        with mock.patch('claims.progress.get_client', return_value=FakeRedis()):
+            with self.captureOnCommitCallbacks() as callbacks:
+                process_claims_file.apply(args=(self.job.job_id,)).get()
+            response = self.client.get(f'/api/jobs/{self.job.pk}/status/')
+            self.assertNotIn('llm', [stage['stage'] for stage in response.data['stages']])
+            self.job.refresh_from_db()
+            self.assertEqual(self.job.status, 'completed')
+            self.assertFalse(self.job.llm_evaluation_completed)
+            
+            for callback in callbacks:
+                callback()
+            response = self.client.get(f'/api/jobs/{self.job.pk}/status/')
+            self.assertIn('llm', [stage['stage'] for stage in response.data['stages']])
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.llm_enrichment_pending, 0)
+        self.assertTrue(self.job.llm_evaluation_completed)
+    
+    def test_llm_evaluation_completes_with_job_when_nothing_is_enriched(self):
+        from claims.synthetic import generate_claim_rows
+        from .tasks import process_claims_file
+        job = create_claims_job(self.user, list(generate_claim_rows(3, error_rate=0, seed=3)))
+        process_claims_file.apply(args=(job.job_id,)).get()
+        job.refresh_from_db()
+        self.assertEqual(job.error_count, 0)
+        self.assertTrue(job.llm_evaluation_completed)
+    
+    def test_revalidation_stages_are_recorded_under_task_id(self):
+        from .tasks import process_claims_file, revalidate_all_claims
+        process_claims_file.apply(args=(self.job.job_id,)).get()
+        result = revalidate_all_claims.apply(kwargs={'user_id': self.user.id, 'force': True})
+        stages = {stage['stage']: stage for stage in result.get()['stages']}
+        self.assertEqual(stages['static_rules']['rows'], 5)
+        self.assertEqual(
+            set(JobStageTiming.objects.filter(task_id=result.id, job=None).values_list('stage', flat=True)),
+            set(stages),
+        )
+
+
+@override_settings(OPENAI_API_KEY='')
+class PrometheusMetricsTest(TestCase):
+    def setUp(self):
+        from claims.synthetic import generate_claim_rows
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.job = create_claims_job(self.user, list(generate_claim_rows(3, seed=4)))
+    
+    def test_metrics_endpoint_exposes_pipeline_metrics(self):
+        from .tasks import process_claims_file
+        process_claims_file.apply(args=(self.job.job_id,)).get()
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        for name in ('rcm_claims_validated_total', 'rcm_rule_evaluation_seconds_count',
+                     'rcm_cache_requests_total', 'rcm_celery_task_seconds_count'):
+            self.assertIn(name, body)
+        self.assertIn('rcm_http_request_db_seconds_count{method="GET",view="metrics"}', self.client.get('/metrics').content.decode())
+    
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+        with override_settings(METRICS_TOKEN='', METRICS_PUBLIC=False):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+    
+    def test_worker_metrics_port_requires_multiprocess_dir(self):
+        import os
+        from unittest import mock
+        from rcm_project.celery import serve_worker_metrics
+        with override_settings(CELERY_METRICS_PORT=9808), mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': ''}):
+            with self.assertRaises(SystemExit):
+                serve_worker_metrics()
+    
+    def test_middleware_is_async_capable(self):
+        import asyncio
+        from asgiref.sync import iscoroutinefunction
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from rcm_project.middleware import RequestMetricsMiddleware
+        
+        async def view(request):
+            return HttpResponse('ok')
+        
+        middleware = RequestMetricsMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = asyncio.run(middleware(RequestFactory().get('/')))
+        self.assertEqual(response.content, b'ok')
+
+
+class BenchValidationCommandTest(TestCase):
+    def test_bench_outputs_stage_timings_and_cleans_up(self):
+        import io
+        import json
+        from django.core.management import call_command
+        out = io.StringIO()
+        call_command('bench_validation', rows=10, repeat=2, chunk_size=4, stdout=out, stderr=io.StringIO())
+        results = json.loads(out.getvalue())
+        self.assertEqual(len(results['runs']), 2)
+        self.assertEqual(results['runs'][0]['validated'] + results['runs'][0]['errors'], 10)
+        self.assertIn('persistence', results['median']['stages'])
+        self.assertEqual([run['rules_cache'] for run in results['runs']], ['cold', 'cold'])
+        self.assertFalse(Claim.objects.exists())
+        self.assertFalse(ValidationJob.objects.exists())
+    
+    def test_each_run_parses_rules_unless_warm_rules(self):
+        import io
+        import json
+        from unittest import mock
+        from django.core.management import call_command
+        from rules import cache as rules_cache
+        with mock.patch.object(rules_cache, 'invalidate', wraps=rules_cache.invalidate) as invalidate:
+            out = io.StringIO()
+            call_command('bench_validation', rows=5, repeat=3, stdout=out, stderr=io.StringIO())
+            self.assertEqual(invalidate.call_count, 3)
+            
+            invalidate.reset_mock()
+            out = io.StringIO()
+            call_command('bench_validation', rows=5, repeat=3, warm_rules=True, stdout=out, stderr=io.StringIO())
+            self.assertEqual(invalidate.call_count, 1)
+        results = json.loads(out.getvalue())
+        self.assertEqual([run['rules_cache'] for run in results['runs']], ['cold', 'warm', 'warm'])
+
+
+class ExplainClaimQueriesCommandTest(TestCase):
+    def test_prints_a_plan_per_query_and_rolls_back(self):
+        import io
+        import re
+        from django.core.management import call_command
+        out = io.StringIO()
+        call_command('explain_claim_queries', claims=50, jobs=2, repeat=1, stdout=out)
+        output = out.getvalue()
+        headings = re.findall(r'^(.+): [\d.]+ ms -> [\d.]+ ms$', output, re.MULTILINE)
+        self.assertEqual(len(headings), 7)
+        self.assertIn('job LLM-processed count', headings)
+        # A non-empty before and after plan under every heading
+        for section in re.split(r'^.+: [\d.]+ ms -> [\d.]+ ms$', output, flags=re.MULTILINE)[1:]:
+            before, after = section.split('  after:')
+            self.assertRegex(before, r'  before:\n    \S')
+            self.assertRegex(after, r'^\n    \S')
+        self.assertFalse(Claim.objects.exists())
+        self.assertFalse(ValidationJob.objects.exists())
+
+
+class RulesCacheTest(TestCase):
+    def setUp(self):
+        from rules import cache
+        cache.invalidate()
+    
+    def test_compiled_rules_are_reused_until_the_rule_set_changes(self):
+        from rules import cache
+        from rules.models import RuleSet
+        from .tasks import get_rule_validator
+        
+        default_plan = get_rule_validator()
+        self.assertIs(get_rule_validator(), default_plan)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            ruleset = RuleSet.objects.create(name='Tenant A', paid_amount_threshold=Decimal('500.00'))
+        self.assertEqual(cache._plans, {})
+        plan = get_rule_validator(ruleset=ruleset)
+        self.assertEqual(plan.technical_rules['amount_threshold'], 500.0)
+        self.assertIs(get_rule_validator(ruleset=ruleset), plan)
+        
+        # A new threshold is a new RuleSet version, even without an invalidation message
+        RuleSet.objects.filter(pk=ruleset.pk).update(paid_amount_threshold=Decimal('600.00'), updated_at=timezone.now())
+        ruleset.refresh_from_db()
+        self.assertEqual(get_rule_validator(ruleset=ruleset).technical_rules['amount_threshold'], 600.0)
+    
+    @override_settings(RULES_CACHE_SIZE=2)
+    def test_plans_are_evicted_least_recently_used_first(self):
+        from rules import cache
+        built = []
+        for key in ('a', 'b', 'a', 'c'):
+            cache.get_plan(key, lambda: built.append(key) or key)
+        self.assertEqual(built, ['a', 'b', 'c'])
+        self.assertEqual(list(cache._plans), ['a', 'c'])
+
+
+@override_settings(OPENAI_API_KEY='')
+class JobRuleSetTest(TestCase):
+    """Jobs and revalidations use the RuleSet bound at submission, not whichever is active later"""
+    def setUp(self):
+        from rules import cache
+        from rules.models import RuleSet
+        cache.invalidate()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.strict = RuleSet.objects.create(name='Strict', paid_amount_threshold=Decimal('100.00'), is_active=False)
+        self.lenient = RuleSet.objects.create(name='Lenient', paid_amount_threshold=Decimal('10000.00'), is_active=True)
+    
+    def test_jobs_validate_with_their_own_rule_set(self):
+        from claims.synthetic import generate_claim_rows
+        from .tasks import process_claims_file
+        # A clean claim without approval: only the paid amount threshold decides
+        row = next(row for row in generate_claim_rows(20, error_rate=0, seed=1) if not row['approval_number'])
+        row['paid_amount_aed'] = 500
+        for name, ruleset in (('STRICT', self.strict), ('LENIENT', self.lenient)):
+            job = create_claims_job(self.user, [dict(row, claim_id=f'RS-{name}')])
+            job.rule_set = ruleset
+            job.save()
+            process_claims_file.apply(args=(job.job_id,)).get()
+        self.assertIn(Claim.objects.get(claim_id='RS-STRICT').error_type, ('technical_error', 'both'))
+        self.assertEqual(Claim.objects.get(claim_id='RS-LENIENT').error_type, 'no_error')
+    
+    def test_revalidation_uses_the_given_rule_set(self):
+        from .tasks import get_rule_validator, revalidate_all_claims
+        Claim.objects.create(
+            claim_id='RS-REVAL', encounter_type='inpatient', service_date=date(2025, 1, 1),
+            national_id='ABCD1234', member_id='EFGH5678', facility_id='IJKL9012',
+            unique_id='ABCD-EFGH-IJKL', service_code='SRV1001', paid_amount_aed=Decimal('500.00'),
+        )
+        revalidate_all_claims.apply(kwargs={'user_id': self.user.id, 'rule_set_id': self.strict.pk}).get()
+        claim = Claim.objects.get(claim_id='RS-REVAL')
+        self.assertEqual(claim.rules_fingerprint, get_rule_validator(ruleset=self.strict).fingerprint)
+        
+        # Without a rule_set the endpoint binds the active one
+        response = self.client.post('/api/claims/revalidate/', {}, format='json')
+        self.assertIn(response.status_code, (200, 202))
+        claim.refresh_from_db()
+        self.assertEqual(claim.rules_fingerprint, get_rule_validator(ruleset=self.lenient).fingerprint)
+
+
+@override_settings(OPENAI_API_KEY='', INGEST_CHUNK_SIZE=2)
+class ValidationJobResumeTest(TestCase):
+    def setUp(self):
+        from claims.synthetic import generate_claim_rows
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.job = create_claims_job(self.user, list(generate_claim_rows(5, seed=2)))
+    
+    def test_resume_continues_from_last_checkpoint(self):
+        from unittest import mock
+        from . import tasks
+        
+        original = tasks.process_claim_chunk
+        def crash_after_first_chunk(job, chunk, checkpoint_row, *args):
+            if checkpoint_row > 2:
+                raise RuntimeError('worker lost')
+            return original(job, chunk, checkpoint_row, *args)
+        
+        with mock.patch.object(tasks, 'process_claim_chunk', side_effect=crash_after_first_chunk):
+            tasks.process_claims_file.apply(args=(self.job.job_id,)).get()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'failed')
+        self.assertEqual(self.job.checkpoint_row, 2)
+        self.assertEqual(Claim.objects.count(), 2)
+        first_chunk = dict(Claim.objects.values_list('claim_id', 'updated_at'))
+        
+        response = self.client.post(f'/api/jobs/{self.job.pk}/resume/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['resumed_from_row'], 2)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'completed')
+        self.assertEqual(self.job.processed_claims, 5)
+        self.assertEqual(self.job.validated_count + self.job.error_count, 5)
+        self.assertEqual(Claim.objects.count(), 5)
+        # Committed chunks are not processed again
+        for claim_id, updated_at in first_chunk.items():
+            self.assertEqual(Claim.objects.get(claim_id=claim_id).updated_at, updated_at)
+    
+    def test_resume_replaces_the_failed_snapshot(self):
+        from unittest import mock
+        from . import progress, tasks
+        ValidationJob.objects.filter(pk=self.job.pk).update(status='failed', error_message='worker lost')
+        self.job.refresh_from_db()
+        with mock.patch('claims.progress.get_client', return_value=FakeRedis()):
+            progress.publish_job_progress(self.job)
+            self.assertEqual(self.client.get(f'/api/jobs/{self.job.pk}/status/').data['status'], 'failed')
+            
+            # Queued: status reports processing before the resumed run publishes
+            with mock.patch.object(tasks.process_claims_file, 'apply_async') as apply_async:
+                response = self.client.post(f'/api/jobs/{self.job.pk}/resume/')
+            self.assertEqual(response.status_code, 202)
+            apply_async.assert_called_once()
+            self.assertEqual(self.client.get(f'/api/jobs/{self.job.pk}/status/').data['status'], 'processing')
+            
+            # The run publishes its own snapshot right after claiming the job
+            progress.publish_job_progress(self.job)
+            statuses = []
+            def load_rules(job):
+                statuses.append(progress.get_job_progress(job.pk)['status'])
+                raise RuntimeError('rules unavailable')
+            with mock.patch.object(tasks, 'get_rule_validator', side_effect=load_rules):
+                tasks.process_claims_file.apply(args=(self.job.job_id,), kwargs={'resume': True}).get()
+            self.assertEqual(statuses, ['processing'])
+    
+    def test_running_job_is_not_processed_twice(self):
+        from datetime import timedelta
+        from . import tasks
+        
+        ValidationJob.objects.filter(pk=self.job.pk).update(
+            status='processing', task_id='live-run', heartbeat_at=timezone.now()
+        )
+        response = self.client.post(f'/api/jobs/{self.job.pk}/resume/')
+        self.assertEqual(response.status_code, 409)
+        # A run started anyway does not touch the job
+        result = tasks.process_claims_file.apply(args=(self.job.job_id,), kwargs={'resume': True}).get()
+        self.assertEqual(result['status'], 'skipped')
+        self.assertFalse(Claim.objects.exists())
+        
+        # Once the live run stops sending heartbeats the job can be resumed
+        stale = timezone.now() - timedelta(seconds=settings.JOB_HEARTBEAT_TIMEOUT_SECONDS + 1)
+        ValidationJob.objects.filter(pk=self.job.pk).update(heartbeat_at=stale)
+        response = self.client.post(f'/api/jobs/{self.job.pk}/resume/')
+        self.assertEqual(response.status_code, 202)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'completed')
+        self.assertEqual(self.job.processed_claims, 5)
+
+
+@override_settings(OPENAI_API_KEY='')
+class UploadPreflightTest(TestCase):
+    def setUp(self):
+        from claims.synthetic import generate_claim_rows
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.rows = list(generate_claim_rows(6, seed=4))
+    
+    def upload(self, name, content):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        return self.client.post('/api/jobs/', {'claims_file': SimpleUploadedFile(name, content)}, format='multipart')
+    
+    def test_missing_columns_are_rejected_before_a_job_exists(self):
+        import io
+        import pandas as pd
+        buffer = io.BytesIO()
+        pd.DataFrame(self.rows).drop(columns=['service_code']).to_excel(buffer, index=False)
+        response = self.upload('claims.xlsx', buffer.getvalue())
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('service_code', str(response.data))
+        self.assertFalse(ValidationJob.objects.exists())
+    
+    def test_csv_with_aliased_headers_is_estimated_and_processed(self):
+        import pandas as pd
+        frame = pd.DataFrame(self.rows).rename(columns={'paid_amount_aed': 'Paid Amount (AED)', 'encounter_type': 'Encounter Type'})
+        response = self.upload('claims.csv', frame.to_csv(index=False).encode())
+        self.assertEqual(response.status_code, 201)
+        job = ValidationJob.objects.get()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.total_claims, 6)
+        self.assertEqual(Claim.objects.count(), 6)
+    
+    def test_large_csv_row_count_is_estimated_from_a_sample(self):
+        import os
+        import tempfile
+        import pandas as pd
+        from claims.synthetic import generate_claim_rows
+        from .preflight import PREFLIGHT_SAMPLE_BYTES, inspect
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'claims.csv')
+            pd.DataFrame(list(generate_claim_rows(5000, seed=5))).to_csv(path, index=False)
+            self.assertGreater(os.path.getsize(path), PREFLIGHT_SAMPLE_BYTES)
+            result = inspect(path)
+        self.assertEqual(result['missing'], [])
+        self.assertAlmostEqual(result['estimated_rows'], 5000, delta=250)
+
+
+@override_settings(OPENAI_API_KEY='', INGEST_MICRO_BATCH_SIZE=2)
+class StreamIngestTest(TestCase):
+    def setUp(self):
+        from claims.synthetic import generate_claim_rows
+        from rest_framework_simplejwt.tokens import AccessToken
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.token = str(AccessToken.for_user(self.user))
+        self.rows = list(generate_claim_rows(5, seed=6))
+    
+    def ingest(self, chunks, content_type='application/x-ndjson', headers=None):
+        """POST the body to the ASGI ingest app one message per chunk; returns (status, JSON body)"""
+        import json
+        from asgiref.sync import async_to_sync
+        from django.core.signals import request_finished, request_started
+        from django.db import close_old_connections
+        from .stream_ingest import ingest_application
+        
+        if headers is None:
+            headers = {'authorization': f'Bearer {self.token}', 'transfer-encoding': 'chunked'}
+        headers = {**headers, 'content-type': content_type}
+        scope = {
+            'type': 'http', 'method': 'POST', 'path': '/api/jobs/ingest/',
+            'headers': [(name.encode(), value.encode()) for name, value in headers.items()],
+        }
+        messages = [
+            {'type': 'http.request', 'body': chunk.encode(), 'more_body': i < len(chunks) - 1}
+            for i, chunk in enumerate(chunks)
+        ]
+        sent = []
+        
+        async def receive():
+            return messages.pop(0) if messages else {'type': 'http.disconnect'}
+        
+        async def send(message):
+            sent.append(message)
+        
+        # Like the test client: keep the connection holding the test transaction open
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            async_to_sync(ingest_application)(scope, receive, send)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+        return sent[0]['status'], json.loads(sent[1]['body'])
+    
+    def test_ndjson_and_array_bodies_are_validated_in_micro_batches(self):
+        import json
+        from .tasks import read_claims_file
+        
+        # One ASGI message per claim, and one claim split across two messages
+        lines = [json.dumps(row) + '\n' for row in self.rows]
+        status, body = self.ingest(lines[:3] + [lines[3][:20], lines[3][20:]] + lines[4:])
+        self.assertEqual(status, 202)
+        self.assertEqual(body['received'], 5)
+        self.assertEqual(body['batches'], 3)
+        job = ValidationJob.objects.get(job_id=body['job_id'])
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((job.total_claims, job.processed_claims, job.checkpoint_row), (5, 5, 5))
+        self.assertTrue(job.metrics_generated)
+        self.assertEqual(Claim.objects.count(), 5)
+        # The claims file of the job can be re-read by a resume
+        self.assertEqual(len(read_claims_file(job.claims_file.path)), 5)
+        
+        array = json.dumps(self.rows, indent=2)
+        status, body = self.ingest([array], content_type='application/json',
+                                   headers={'authorization': f'Bearer {self.token}', 'content-length': str(len(array))})
+        self.assertEqual(status, 202)
+        self.assertEqual(ValidationJob.objects.get(job_id=body['job_id']).status, 'completed')
+    
+    def test_invalid_bodies_are_rejected(self):
+        import json
+        row = dict(self.rows[0])
+        del row['service_code']
+        status, body = self.ingest([json.dumps(row)])
+        self.assertEqual(status, 400)
+        self.assertIn('service_code', body['error'])
+        self.assertFalse(ValidationJob.objects.exists())
+        
+        # Claims received before a malformed record are kept
+        status, body = self.ingest([''.join(json.dumps(row) + '\n' for row in self.rows[:3]) + '{"claim_id": '])
+        self.assertEqual(status, 400)
+        self.assertEqual(body['received'], 3)
+        self.assertEqual(ValidationJob.objects.get(job_id=body['job_id']).status, 'completed')
+        self.assertEqual(Claim.objects.count(), 3)
+    
+    def test_length_and_token_are_required(self):
+        self.assertEqual(self.ingest(['{}'], headers={'authorization': f'Bearer {self.token}'})[0], 411)
+        self.assertEqual(self.ingest(['{}'], headers={'transfer-encoding': 'chunked'})[0], 401)
+        self.assertFalse(ValidationJob.objects.exists())
+    
+    def test_batches_commit_out_of_order(self):
+        from . import progress
+        from .tasks import process_claim_batch
+        job = ValidationJob.objects.create(job_id='stream-job', status='processing', created_by=self.user)
+        
+        # The final batch arrives first: its rows are stored, the checkpoint waits for rows 0-1
+        result = process_claim_batch.apply(args=('stream-job', self.rows[2:], 2), kwargs={'final': True}).get()
+        self.assertEqual((result['status'], result['checkpoint_row']), ('processing', 0))
+        self.assertEqual(Claim.objects.count(), 3)
+        
+        result = process_claim_batch.apply(args=('stream-job', self.rows[:2], 0)).get()
+        self.assertEqual((result['status'], result['checkpoint_row']), ('completed', 5))
+        job.refresh_from_db()
+        self.assertEqual((job.total_claims, job.processed_claims), (5, 5))
+        self.assertEqual(job.validated_count + job.error_count, 5)
+        self.assertTrue(job.metrics_generated)
+        self.assertFalse(job.stream_batches.exists())
+        # Status sums the stage timings of both batches
+        stages = {stage['stage']: stage for stage in progress.job_progress_snapshot(job)['stages']}
+        self.assertEqual(stages['persistence']['rows'], 5)
+
+
+class TaskRoutingTest(TestCase):
+    def setUp(self):
+        from claims.synthetic import generate_claim_rows
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.job = create_claims_job(self.user, list(generate_claim_rows(10)))
+    
+    def test_upload_queue_follows_row_estimate(self):
+        from .routing import estimate_row_count, queue_for_job
+        self.assertEqual(estimate_row_count(self.job.claims_file.path), 10)
+        self.assertEqual(queue_for_job(self.job), 'interactive')
+        with override_settings(INTERACTIVE_MAX_ROWS=5):
+            self.assertEqual(queue_for_job(self.job), 'bulk')
+    
+    def test_revalidation_runs_on_bulk_queue(self):
+        from rcm_project.celery import app
+        from .tasks import revalidate_claim_shard
+        self.assertEqual(app.amqp.router.route({}, revalidate_claim_shard.name)['queue'].name, 'bulk')
+    
+    @override_settings(OPENAI_API_KEY='')
+    def test_llm_enrichment_runs_on_llm_queue_after_static_results_are_stored(self):
+        from unittest import mock
+        from rcm_project.celery import app
+        from .tasks import enrich_claims, process_claims_file
+        self.assertEqual(app.amqp.router.route({}, enrich_claims.name)['queue'].name, 'llm')
+        
+        llm_result = {'llm_enhanced': True, 'llm_explanation': 'Check the approval.', 'llm_recommendations': ''}
+        with mock.patch('claims.tasks.LLMValidator.validate_claim', return_value=llm_result) as validate_claim:
+            with self.captureOnCommitCallbacks() as callbacks:
+                process_claims_file.apply(args=(self.job.job_id,)).get()
+            # The upload stores the static results without waiting for the LLM
+            self.assertEqual(validate_claim.call_count, 0)
+            errors = RefinedClaim.objects.exclude(error_type='no_error')
+            self.assertTrue(errors.exists())
+            self.assertFalse(RefinedClaim.objects.filter(llm_validated=True).exists())
+            
+            for callback in callbacks:
+                callback()
+        self.assertEqual(validate_claim.call_count, errors.count())
+        self.assertEqual(RefinedClaim.objects.filter(llm_validated=True).count(), errors.count())
+        claim = Claim.objects.exclude(error_type='no_error').first()
+        self.assertIn('LLM Analysis:\nCheck the approval.', claim.error_explanation)
+        self.assertEqual(Metrics.objects.get(job=self.job).llm_processed_count, errors.count())
+
+
+class JobProgressEventsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.job = ValidationJob.objects.create(
+            job_id='events-job', status='completed', total_claims=4, processed_claims=4, created_by=self.user
+        )
+    
+    async def test_stream_sends_job_snapshot(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        token = str(AccessToken.for_user(self.user))
+        response = await self.async_client.get(f'/api/jobs/{self.job.pk}/events/', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertIn('event: progress', body)
+        self.assertIn('"status": "completed"', body)
+    
+    async def test_stream_requires_authorization_header(self):
+        response = await self.async_client.get(f'/api/jobs/{self.job.pk}/events/')
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(f'/api/jobs/{self.job.pk}/events/', headers={'Authorization': 'Bearer invalid'})
+        self.assertEqual(response.status_code, 401)
+        # Tokens are not accepted in the query string, which ends up in access logs
+        from rest_framework_simplejwt.tokens import AccessToken
+        response = await self.async_client.get(
+            f'/api/jobs/{self.job.pk}/events/', {'token': str(AccessToken.for_user(self.user))}
+        )
+        self.assertEqual(response.status_code, 401)
+    
+    async def test_asgi_app_only_serves_streaming_routes(self):
+        from rcm_project.asgi import application
+        
+        async def request(path):
+            sent = []
+            
+            async def receive():
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            
+            async def send(message):
+                sent.append(message)
+            
+            scope = {
+                'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'', 'headers': [],
+                'server': ('testserver', 80), 'scheme': 'http', 'root_path': '',
+            }
+            await application(scope, receive, send)
+            return sent[0]['status']
+        
+        self.assertEqual(await request('/api/claims/'), 404)
+        self.assertEqual(await request(f'/api/jobs/{self.job.pk}/events/'), 401)
+        # Claim ingestion is served by its own ASGI app (claims/stream_ingest.py)
+        self.assertEqual(await request('/api/jobs/ingest/'), 405)
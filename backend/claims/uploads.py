@@ -0,0 +1,125 @@
+"""
+Staging for chunked claim file uploads (``/api/uploads/``).
+
+Each part is streamed from the request body straight to
+``MEDIA_ROOT/uploads/staging/<upload_id>/`` in UPLOAD_READ_BYTES reads, so
+neither a part nor the file is ever held in memory. A part is written to a
+temporary file and renamed into place once complete: a dropped connection
+leaves no partial part behind, and a part can be re-sent any number of
+times. Completing the upload checks the part sizes against the declared
+size, then the ``assemble_upload`` task concatenates the parts in order into
+``uploads/claims/`` while computing their SHA-256. The file is only kept
+(and the ValidationJob created) when its checksum matches the one declared
+when the upload was started.
+"""
+import hashlib
+import os
+import re
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+# Bytes read from the request / a staged part at a time
+UPLOAD_READ_BYTES = 1024 * 1024
+
+PART_NAME = re.compile(r'^(\d{5})\.part$')
+
+
+class UploadError(ValueError):
+    """A part or the assembled file does not match the upload session"""
+
+
+def staging_dir(session) -> Path:
+    return Path(settings.MEDIA_ROOT) / 'uploads' / 'staging' / session.upload_id
+
+
+def received_parts(session):
+    """{part number: size in bytes} of the parts staged so far"""
+    directory = staging_dir(session)
+    if not directory.is_dir():
+        return {}
+    parts = {}
+    for entry in os.scandir(directory):
+        match = PART_NAME.match(entry.name)
+        if match:
+            parts[int(match.group(1))] = entry.stat().st_size
+    return dict(sorted(parts.items()))
+
+
+def write_part(session, number: int, stream, max_bytes: int) -> int:
+    """Stream one part from ``stream`` to the staging directory; returns its size"""
+    directory = staging_dir(session)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'{number:05d}.part'
+    temp_path = directory / f'{number:05d}.part.tmp'
+
+    size = 0
+    try:
+        with open(temp_path, 'wb') as part:
+            while True:
+                data = stream.read(UPLOAD_READ_BYTES)
+                if not data:
+                    break
+                size += len(data)
+                if size > max_bytes:
+                    raise UploadError(f'Part {number} is larger than {max_bytes} bytes')
+                part.write(data)
+        os.replace(temp_path, path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+    return size
+
+
+def check_parts(session) -> dict:
+    """
+    The staged parts ({number: size}) if they can be assembled
+
+    Parts must be numbered 1..n without gaps and add up to the declared
+    size; otherwise raises UploadError. Only the part sizes are read.
+    """
+    parts = received_parts(session)
+    if not parts:
+        raise UploadError('No parts have been uploaded')
+    missing = sorted(set(range(1, max(parts) + 1)) - set(parts))
+    if missing:
+        raise UploadError(f"Missing parts: {', '.join(str(number) for number in missing)}")
+    size = sum(parts.values())
+    if size != session.size:
+        raise UploadError(f'Uploaded {size} bytes, expected {session.size}')
+    return parts
+
+
+def assemble(session) -> str:
+    """
+    Concatenate the staged parts into a claims file and return its storage name
+
+    Raises UploadError (and keeps the parts, so the client can re-send the
+    bad ones) when the parts fail ``check_parts`` or the result does not
+    match the declared SHA-256.
+    """
+    parts = check_parts(session)
+    name = default_storage.get_available_name(f'uploads/claims/{os.path.basename(session.filename)}')
+    path = Path(default_storage.path(name))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    sha = hashlib.sha256()
+    directory = staging_dir(session)
+    with open(path, 'wb') as output:
+        for number in parts:
+            with open(directory / f'{number:05d}.part', 'rb') as part:
+                for block in iter(lambda: part.read(UPLOAD_READ_BYTES), b''):
+                    sha.update(block)
+                    output.write(block)
+
+    if sha.hexdigest() != session.checksum.lower():
+        path.unlink()
+        raise UploadError('Checksum mismatch: the assembled file does not match the declared SHA-256')
+    discard(session)
+    return name
+
+
+def discard(session):
+    """Delete the staged parts of a session"""
+    shutil.rmtree(staging_dir(session), ignore_errors=True)
@@ -1,12 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ClaimViewSet, ValidationJobViewSet
+from .views import ClaimViewSet, UploadSessionViewSet, ValidationJobViewSet
+from .events import job_events
 
 router = DefaultRouter()
 router.register(r'claims', ClaimViewSet, basename='claim')
 router.register(r'jobs', ValidationJobViewSet, basename='validationjob')
+router.register(r'uploads', UploadSessionViewSet, basename='uploadsession')
 
 urlpatterns = [
+    path('jobs/<int:pk>/events/', job_events, name='validationjob-events'),
     path('', include(router.urls)),
 ]
 
@@ -1,13 +1,29 @@
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from .models import Claim, ValidationJob
-from .serializers import ClaimSerializer, ValidationJobSerializer
-from .tasks import process_claims_file
+from .models import Claim, UploadSession, ValidationJob
+from .serializers import ClaimSerializer, ClaimSummarySerializer, ClaimValidationSerializer, UploadSessionSerializer, ValidationJobSerializer
+from .uploads import UploadError, check_parts, discard, write_part
+from .pagination import ClaimPagination
+from .search import ClaimSearchFilter
+from .export import CSVExportRenderer, ParquetExportRenderer, parquet_available, stream_csv, stream_parquet
+from .tasks import (
+    assemble_upload, explain_claims, get_rule_validator, job_is_running, process_claims_file,
+    start_validation_job,
+)
+from .routing import queue_for_job
+from . import progress
+from rcm_project import monitoring
+from rules import cache as rules_cache
+from rules.models import RuleSet
 from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from celery.result import AsyncResult
+import time
 import uuid
 from django.utils import timezone
 
@@ -17,12 +33,56 @@ class ClaimViewSet(viewsets.ModelViewSet):
     queryset = Claim.objects.all()
     serializer_class = ClaimSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    pagination_class = ClaimPagination
+    filter_backends = [DjangoFilterBackend, ClaimSearchFilter, OrderingFilter]
     filterset_fields = ['status', 'error_type', 'service_code', 'encounter_type']
     search_fields = ['claim_id', 'national_id', 'member_id', 'facility_id']
+    search_fulltext_fields = ['error_explanation']
     ordering_fields = ['created_at', 'paid_amount_aed', 'service_date']
     ordering = ['-created_at']
     
+    def get_list_fields(self):
+        """Serializer fields requested for a list page via ``?view=summary`` or ``?fields=``"""
+        if self.action != 'list':
+            return None
+        if self.request.query_params.get('view') == 'summary':
+            return list(ClaimSummarySerializer.Meta.fields)
+        fields = self.request.query_params.get('fields')
+        if fields:
+            requested = [name.strip() for name in fields.split(',')]
+            return [name for name in ClaimSerializer.Meta.fields if name in requested] or None
+        return None
+    
+    def get_serializer_class(self):
+        if self.action == 'list' and self.request.query_params.get('view') == 'summary':
+            return ClaimSummarySerializer
+        return super().get_serializer_class()
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_list_fields()
+        return context
+    
+    def get_queryset(self):
+        """Load only the columns the response needs and join the users in the same query"""
+        queryset = super().get_queryset()
+        fields = self.get_list_fields()
+        if not fields:
+            return queryset.select_related('uploaded_by', 'validated_by')
+        
+        serializer_fields = self.get_serializer_class()().fields
+        # Ordering columns stay loaded so keyset pagination can read its cursor position
+        columns = {'id', *self.ordering_fields}
+        related = set()
+        for name in fields:
+            source = serializer_fields[name].source
+            columns.add(source.replace('.', '__'))
+            if '.' in source:
+                related.add(source.split('.', 1)[0])
+        if related:
+            queryset = queryset.select_related(*sorted(related))
+        return queryset.only(*sorted(columns))
+    
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Get statistics for claims - uses Metrics table (from analytics pipeline)"""
@@ -88,6 +148,28 @@ class ClaimViewSet(viewsets.ModelViewSet):
                 'source': 'refined_table'  # Indicate data source
             })
     
+    @action(detail=False, methods=['get'], renderer_classes=[CSVExportRenderer, ParquetExportRenderer, JSONRenderer])
+    def export(self, request):
+        """Stream filtered claims as CSV or Parquet (?format=csv|parquet) in constant memory"""
+        export_format = request.accepted_renderer.format
+        if export_format not in ('csv', 'parquet'):
+            export_format = 'csv'
+        if export_format == 'parquet' and not parquet_available():
+            return Response(
+                {'error': 'Parquet export requires pyarrow', 'detail': 'Install pyarrow or use format=csv'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        
+        queryset = self.filter_queryset(Claim.objects.all())
+        chunk_size = settings.CLAIMS_EXPORT_CHUNK_SIZE
+        if export_format == 'parquet':
+            response = StreamingHttpResponse(stream_parquet(queryset, chunk_size=chunk_size), content_type=ParquetExportRenderer.media_type)
+        else:
+            response = StreamingHttpResponse(stream_csv(queryset, chunk_size=chunk_size), content_type='text/csv; charset=utf-8')
+        filename = f"claims-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
     @action(detail=False, methods=['post'])
     def revalidate(self, request):
         """Revalidate all claims in database with current rules"""
@@ -105,9 +187,21 @@ class ClaimViewSet(viewsets.ModelViewSet):
                     'processed': 0
                 }, status=status.HTTP_200_OK)
             
+            # Claims already validated with the current rules are skipped unless forced
+            force = str(request.data.get('force', '')).lower() in ('1', 'true', 'yes')
+            
+            # Revalidate with the given RuleSet, by default the one active now
+            rule_set_id = request.data.get('rule_set')
+            if rule_set_id:
+                if not RuleSet.objects.filter(pk=rule_set_id).exists():
+                    return Response({'error': f'RuleSet {rule_set_id} not found'}, status=status.HTTP_400_BAD_REQUEST)
+            else:
+                active = rules_cache.active_ruleset()
+                rule_set_id = active.pk if active else None
+            
             # Start async revalidation
             try:
-                task = revalidate_all_claims.delay(user_id=request.user.id)
+                task = revalidate_all_claims.delay(user_id=request.user.id, force=force, rule_set_id=rule_set_id)
                 return Response({
                     'message': 'Revalidation started',
                     'task_id': task.id,
@@ -117,15 +211,9 @@ class ClaimViewSet(viewsets.ModelViewSet):
             except Exception as e:
                 # If Celery is not running, process synchronously
                 print(f"Celery not available ({str(e)}), processing synchronously...")
-                # Create a mock task object for sync execution
-                class MockTask:
-                    def __init__(self):
-                        pass
-                    def update_state(self, *args, **kwargs):
-                        pass
-                
-                mock_task = MockTask()
-                result = revalidate_all_claims(mock_task, user_id=request.user.id)
+                result = revalidate_all_claims.apply(
+                    kwargs={'user_id': request.user.id, 'force': force, 'rule_set_id': rule_set_id}
+                ).get()
                 return Response({
                     'message': 'Revalidation completed',
                     'total': result.get('total', 0),
@@ -140,6 +228,78 @@ class ClaimViewSet(viewsets.ModelViewSet):
                 {'error': str(e), 'detail': 'Failed to start revalidation'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    @action(detail=False, methods=['get'], url_path=r'revalidate/(?P<task_id>[^/.]+)')
+    def revalidation_status(self, request, task_id=None):
+        """Aggregated progress or final result of a revalidation task"""
+        return task_status_response(task_id)
+    
+    @action(detail=False, methods=['post'])
+    def validate(self, request):
+        """
+        Validate one claim (object) or a small batch (array) in-process with
+        the cached compiled rules; nothing is stored. ``?llm=true`` queues the
+        LLM evaluation of claims with errors and returns its ``llm_task_id``.
+        """
+        started = time.perf_counter()
+        many = isinstance(request.data, list)
+        items = request.data if many else [request.data]
+        if not items or len(items) > settings.VALIDATE_MAX_CLAIMS:
+            return Response(
+                {'error': f'Send between 1 and {settings.VALIDATE_MAX_CLAIMS} claims'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = ClaimValidationSerializer(data=items, many=True)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors if many else serializer.errors[0]}, status=status.HTTP_400_BAD_REQUEST)
+        claims_data = [
+            ClaimValidationSerializer.claim_data(data, index) for index, data in enumerate(serializer.validated_data)
+        ]
+        
+        rule_validator = get_rule_validator(ruleset=rules_cache.active_ruleset())
+        static_results = rule_validator.validate_claims(claims_data)
+        results = [
+            {'claim_id': claim_data['claim_id'], **static_result}
+            for claim_data, static_result in zip(claims_data, static_results)
+        ]
+        response = {
+            'results': results if many else results[0],
+            'rules_fingerprint': rule_validator.fingerprint,
+        }
+        
+        if str(request.query_params.get('llm', '')).lower() in ('1', 'true', 'yes'):
+            flagged = [
+                (claim_data, static_result) for claim_data, static_result in zip(claims_data, static_results)
+                if static_result['error_type'] != 'no_error'
+            ]
+            if flagged:
+                try:
+                    task = explain_claims.delay([claim for claim, _ in flagged], [result for _, result in flagged])
+                    response['llm_task_id'] = task.id
+                except Exception as e:
+                    print(f"Could not queue LLM evaluation: {str(e)}")
+                    response['llm_error'] = 'LLM evaluation unavailable'
+        
+        response['duration_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return Response(response)
+    
+    @action(detail=False, methods=['get'], url_path=r'validate/(?P<task_id>[^/.]+)')
+    def validation_llm_status(self, request, task_id=None):
+        """LLM evaluation queued by ``validate?llm=true``"""
+        return task_status_response(task_id)
+
+
+def task_status_response(task_id):
+    """State and progress / result of a Celery task, as returned by the task status endpoints"""
+    result = AsyncResult(task_id)
+    info = result.info
+    if isinstance(info, Exception):
+        info = {'status': 'failed', 'error': str(info)}
+    return Response({
+        'task_id': task_id,
+        'state': result.state,
+        **(info if isinstance(info, dict) else {}),
+    })
 
 
 class ValidationJobViewSet(viewsets.ModelViewSet):
@@ -157,21 +317,15 @@ class ValidationJobViewSet(viewsets.ModelViewSet):
         try:
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
+            # Bind the job to its RuleSet now: by default the one active at
+            # submission, so activating another later does not change it
+            rule_set = serializer.validated_data.get('rule_set') or rules_cache.active_ruleset()
             job = serializer.save(
                 job_id=str(uuid.uuid4()),
-                created_by=request.user
+                created_by=request.user,
+                rule_set=rule_set
             )
-            
-            # Start async processing
-            try:
-                process_claims_file.delay(job.job_id)
-            except Exception as e:
-                # If Celery is not running, log error but don't fail the request
-                print(f"Warning: Could not start Celery task: {str(e)}")
-                # Optionally, process synchronously in development
-                if settings.DEBUG:
-                    print("Processing synchronously in DEBUG mode...")
-                    process_claims_file(job.job_id)
+            start_validation_job(job)
             
             headers = self.get_success_headers(serializer.data)
             return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
@@ -183,16 +337,136 @@ class ValidationJobViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def status(self, request, pk=None):
-        """Get job status"""
+        """Get job status (latest published snapshot, falling back to the database)"""
+        try:
+            snapshot = progress.get_job_progress(pk)
+        except Exception:
+            snapshot = None  # Redis unavailable
+        monitoring.record_cache('job_status', hits=int(bool(snapshot)), misses=int(not snapshot))
+        if snapshot:
+            return Response(snapshot)
+        return Response(progress.job_progress_snapshot(self.get_object()))
+    
+    @action(detail=True, methods=['post'])
+    def resume(self, request, pk=None):
+        """Resume a failed or interrupted job from its last committed chunk"""
         job = self.get_object()
+        if job.status == 'completed':
+            return Response(
+                {'error': 'Job already completed', 'detail': 'Only failed or interrupted jobs can be resumed'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if job_is_running(job):
+            return Response(
+                {'error': 'Job is still processing', 'detail': 'Only failed or interrupted jobs can be resumed'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        # The failed run's snapshot would otherwise end /status/ and the events stream until the resumed run publishes
+        progress.publish_job_requeued(job)
+        try:
+            process_claims_file.apply_async(args=[job.job_id], kwargs={'resume': True}, queue=queue_for_job(job))
+        except Exception as e:
+            print(f"Warning: Could not start Celery task: {str(e)}")
+            if not settings.DEBUG:
+                progress.publish_job_progress(job)
+                return Response(
+                    {'error': str(e), 'detail': 'Failed to resume validation job'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+            print("Processing synchronously in DEBUG mode...")
+            process_claims_file(job.job_id, resume=True)
+        
         return Response({
             'job_id': job.job_id,
-            'status': job.status,
-            'progress': {
-                'total': job.total_claims,
-                'processed': job.processed_claims,
-                'validated': job.validated_count,
-                'errors': job.error_count,
-                'percentage': (job.processed_claims / job.total_claims * 100) if job.total_claims > 0 else 0
-            }
-        })
+            'status': 'processing',
+            'resumed_from_row': job.checkpoint_row,
+            'total': job.total_claims,
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin,
+                           mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Chunked, resumable claim file uploads: create a session, PUT the parts,
+    then complete it to create the ValidationJob (see claims/uploads.py)
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'upload_id'
+    
+    def get_queryset(self):
+        return UploadSession.objects.filter(created_by=self.request.user)
+    
+    def perform_create(self, serializer):
+        serializer.save(upload_id=str(uuid.uuid4()), created_by=self.request.user)
+    
+    def perform_destroy(self, instance):
+        """Abort the upload and delete its staged parts (not while they are being assembled)"""
+        if UploadSession.objects.filter(pk=instance.pk, status='open').update(status='aborted', updated_at=timezone.now()):
+            discard(instance)
+    
+    @action(detail=True, methods=['put'], url_path=r'parts/(?P<number>\d+)')
+    def part(self, request, upload_id=None, number=None):
+        """Store one part (raw request body); re-sending a part replaces it"""
+        session = self.get_object()
+        if session.status != 'open':
+            return Response({'error': f'Upload is {session.status}'}, status=status.HTTP_409_CONFLICT)
+        number = int(number)
+        if not 1 <= number <= settings.UPLOAD_MAX_PARTS:
+            return Response({'error': f'Part number must be between 1 and {settings.UPLOAD_MAX_PARTS}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # request.stream is the unparsed body: read in blocks, never buffered whole.
+        # It is None for an empty body, and without a Content-Length (chunked
+        # transfer encoding) the body is not read at all.
+        if request.stream is None:
+            if not request.META.get('CONTENT_LENGTH'):
+                return Response({'error': 'Content-Length required'}, status=status.HTTP_411_LENGTH_REQUIRED)
+            return Response({'error': 'Part is empty'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            size = write_part(session, number, request.stream, settings.UPLOAD_PART_MAX_BYTES)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        session.save(update_fields=['updated_at'])
+        return Response({'upload_id': session.upload_id, 'part': number, 'size': size})
+    
+    @action(detail=True, methods=['post'])
+    def complete(self, request, upload_id=None):
+        """
+        Check the parts add up to the declared size and queue their assembly
+        
+        The assemble_upload task verifies the checksum, pre-flights the file
+        and creates and starts the ValidationJob; poll the session until it
+        is completed (``job`` set), open again (``error_message``: re-send
+        parts) or aborted.
+        """
+        session = self.get_object()
+        if session.status != 'open':
+            return Response({'error': f'Upload is {session.status}'}, status=status.HTTP_409_CONFLICT)
+        try:
+            check_parts(session)
+        except UploadError as e:
+            return Response({'error': str(e), 'detail': 'Upload incomplete or corrupt'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Conditional update: of two concurrent completions only one assembles
+        if not UploadSession.objects.filter(pk=session.pk, status='open').update(
+            status='assembling', error_message='', updated_at=timezone.now()
+        ):
+            session.refresh_from_db()
+            return Response({'error': f'Upload is {session.status}'}, status=status.HTTP_409_CONFLICT)
+        
+        try:
+            assemble_upload.apply_async(args=[session.upload_id])
+        except Exception as e:
+            print(f"Warning: Could not start Celery task: {str(e)}")
+            if not settings.DEBUG:
+                UploadSession.objects.filter(pk=session.pk, status='assembling').update(status='open', updated_at=timezone.now())
+                return Response(
+                    {'error': str(e), 'detail': 'Failed to complete upload'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+            print("Processing synchronously in DEBUG mode...")
+            assemble_upload(session.upload_id)
+        
+        session.refresh_from_db()
+        return Response(self.get_serializer(session).data, status=status.HTTP_202_ACCEPTED)
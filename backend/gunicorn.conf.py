@@ -0,0 +1,7 @@
+# Loaded by gunicorn from the working directory (backend/)
+
+
+def child_exit(server, worker):
+    # Prometheus multiprocess mode: forget the exited worker's live samples
+    from rcm_project.monitoring import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -3,14 +3,47 @@ ASGI config for rcm_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The ASGI app only serves the streaming endpoints (``STREAMING_PATHS``); it
+runs as its own process next to the WSGI app (rcm_project/wsgi.py), which
+serves the rest of the API. Under ASGI, Django runs sync views on a single
+thread per worker and buffers sync streaming responses and request bodies,
+so the regular endpoints stay on WSGI. Other paths get a 404 here.
+
+Streamed claim ingestion (``INGEST_PATH``) bypasses Django's handler, which
+reads the whole request body before calling a view: claims/stream_ingest.py
+reads the body as it arrives.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
 
 import os
+import re
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rcm_project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from claims.stream_ingest import ingest_application  # noqa: E402 (needs the apps loaded)
+
+# Job progress server-sent events
+STREAMING_PATHS = re.compile(r'^/api/jobs/\d+/events/$')
+# Streamed claim ingestion, served without Django's request handling
+INGEST_PATH = '/api/jobs/ingest/'
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == INGEST_PATH:
+        await ingest_application(scope, receive, send)
+        return
+    if scope['type'] == 'http' and not STREAMING_PATHS.match(scope['path']):
+        await send({
+            'type': 'http.response.start',
+            'status': 404,
+            'headers': [(b'content-type', b'application/json')],
+        })
+        await send({'type': 'http.response.body', 'body': b'{"detail": "Not found."}'})
+        return
+    await django_application(scope, receive, send)
@@ -1,7 +1,10 @@
 import os
 import sys
+import time
 from celery import Celery
+from celery.signals import celeryd_init, task_postrun, task_prerun, worker_init, worker_process_shutdown
 from django.conf import settings
+from kombu import Queue
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rcm_project.settings')
 
@@ -13,7 +16,79 @@ app.autodiscover_tasks()
 if sys.platform == 'darwin':
     app.conf.worker_pool = 'solo'
 
+# Task queues (see claims/routing.py): uploads are sent to interactive or bulk
+# by estimated row count when they are enqueued; everything else by task type
+app.conf.task_queues = (
+    Queue('interactive'),
+    Queue('bulk'),
+    Queue('llm'),
+)
+app.conf.task_default_queue = 'interactive'
+app.conf.task_routes = {
+    'claims.tasks.revalidate_all_claims': {'queue': 'bulk'},
+    'claims.tasks.revalidate_claim_shard': {'queue': 'bulk'},
+    'claims.tasks.finalize_revalidation': {'queue': 'bulk'},
+    'claims.tasks.rule_set_impact': {'queue': 'bulk'},
+    'claims.tasks.rule_set_impact_shard': {'queue': 'bulk'},
+    'claims.tasks.finalize_rule_set_impact': {'queue': 'bulk'},
+    'claims.tasks.explain_claims': {'queue': 'llm'},
+    'claims.tasks.enrich_claims': {'queue': 'llm'},
+    'claims.tasks.process_claim_batch': {'queue': 'interactive'},
+}
+
+
+@celeryd_init.connect
+def configure_queue_concurrency(sender=None, conf=None, options=None, **kwargs):
+    """
+    Give a worker that consumes a single queue that queue's concurrency
+    from CELERY_QUEUE_CONCURRENCY (an explicit --concurrency still wins)
+    """
+    queues = (options or {}).get('queues') or []
+    if isinstance(queues, str):
+        queues = queues.split(',')
+    queues = [queue.strip() for queue in queues if queue.strip()]
+    if len(queues) == 1 and not (options or {}).get('concurrency'):
+        concurrency = settings.CELERY_QUEUE_CONCURRENCY.get(queues[0])
+        if concurrency:
+            conf.worker_concurrency = concurrency
+
+
+# Prometheus: task durations, and metrics for workers on hosts that /metrics cannot see
+_task_started = {}
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def observe_task_duration(task_id=None, task=None, state=None, **kwargs):
+    from rcm_project.monitoring import CELERY_TASK_SECONDS
+    started = _task_started.pop(task_id, None)
+    if started is not None and task is not None:
+        CELERY_TASK_SECONDS.labels(task=task.name, state=state or 'UNKNOWN').observe(time.perf_counter() - started)
+
+
+@worker_init.connect
+def serve_worker_metrics(**kwargs):
+    if settings.CELERY_METRICS_PORT:
+        from prometheus_client import start_http_server
+        from rcm_project.monitoring import multiprocess_enabled, registry
+        if not multiprocess_enabled():
+            # Tasks run in prefork children: without the shared directory the
+            # parent would serve its own, empty metrics. SystemExit, because
+            # Celery logs and ignores other exceptions raised by signal handlers.
+            raise SystemExit('CELERY_METRICS_PORT requires PROMETHEUS_MULTIPROC_DIR to be set to an empty, writable directory')
+        start_http_server(settings.CELERY_METRICS_PORT, registry=registry())
+
+
+@worker_process_shutdown.connect
+def forget_worker_process(pid=None, **kwargs):
+    from rcm_project.monitoring import mark_process_dead
+    mark_process_dead(pid or os.getpid())
+
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
-
@@ -0,0 +1,58 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connection
+
+from .monitoring import HTTP_REQUEST_DB_SECONDS, HTTP_REQUEST_SECONDS
+
+
+class RequestMetricsMiddleware:
+    """
+    Record request time and time spent in DB queries per view (see rcm_project/monitoring.py)
+
+    Sync and async capable, so the ASGI app (job event streams) runs without
+    a sync hop per request. Async views run their queries in sync_to_async
+    threads this middleware cannot wrap, so only their request time is recorded.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        db_seconds = [0.0]
+
+        def time_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                db_seconds[0] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(time_query):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        view = self._view_name(request)
+        HTTP_REQUEST_SECONDS.labels(view=view, method=request.method).observe(elapsed)
+        HTTP_REQUEST_DB_SECONDS.labels(view=view, method=request.method).observe(db_seconds[0])
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        HTTP_REQUEST_SECONDS.labels(view=self._view_name(request), method=request.method).observe(
+            time.perf_counter() - started
+        )
+        return response
+
+    def _view_name(self, request):
+        # Label by URL name rather than path, so ids do not multiply the series
+        match = getattr(request, 'resolver_match', None)
+        return (match.view_name if match else None) or 'unmatched'
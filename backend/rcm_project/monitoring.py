@@ -0,0 +1,85 @@
+"""
+Prometheus metrics, rendered by ``GET /metrics``.
+
+The pipeline (claims/tasks.py, rules/), the Celery signal handlers in
+rcm_project/celery.py and RequestMetricsMiddleware update the metrics below.
+
+With several processes - gunicorn workers, Celery prefork children - set
+``PROMETHEUS_MULTIPROC_DIR`` to an empty, writable directory before they
+start. Each process then writes its samples to files there and a scrape
+merges them (prometheus_client multiprocess mode). Processes on other hosts
+cannot share the directory: a Celery worker serves its own processes'
+metrics on ``CELERY_METRICS_PORT`` instead.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+CLAIMS_VALIDATED = Counter(
+    'rcm_claims_validated_total', 'Claims validated and stored, by resulting error type',
+    ['error_type', 'source'],
+)
+RULE_EVALUATION_SECONDS = Histogram(
+    'rcm_rule_evaluation_seconds', 'Static rule evaluation time per claim',
+    buckets=(.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1),
+)
+LLM_REQUEST_SECONDS = Histogram(
+    'rcm_llm_request_seconds', 'LLM API call latency', ['outcome'],
+    buckets=(.25, .5, 1, 2, 4, 8, 15, 30, 60),
+)
+CACHE_REQUESTS = Counter(
+    'rcm_cache_requests_total', 'Cache lookups by cache and result (hit/miss)', ['cache', 'result'],
+)
+CELERY_TASK_SECONDS = Histogram(
+    'rcm_celery_task_seconds', 'Celery task run time', ['task', 'state'],
+    buckets=(.1, .5, 1, 5, 15, 30, 60, 300, 900, 1800, 3600),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    'rcm_http_request_seconds', 'Request handling time', ['view', 'method'],
+)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    'rcm_http_request_db_seconds', 'Time spent in database queries per request', ['view', 'method'],
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5),
+)
+
+
+def multiprocess_enabled():
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def registry():
+    """Registry to expose: all processes' samples in multiprocess mode, else this process's"""
+    if multiprocess_enabled():
+        merged = CollectorRegistry()
+        multiprocess.MultiProcessCollector(merged)
+        return merged
+    return REGISTRY
+
+
+def render():
+    """(body, content type) of a scrape"""
+    return generate_latest(registry()), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """Drop the live-gauge files of an exited worker process (multiprocess mode only)"""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid)
+
+
+def record_cache(cache, hits=0, misses=0):
+    if hits:
+        CACHE_REQUESTS.labels(cache=cache, result='hit').inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels(cache=cache, result='miss').inc(misses)
+
+
+def record_validated(error_types, source):
+    """Count stored validation results per error type"""
+    counts = {}
+    for error_type in error_types:
+        counts[error_type] = counts.get(error_type, 0) + 1
+    for error_type, count in counts.items():
+        CLAIMS_VALIDATED.labels(error_type=error_type, source=source).inc(count)
@@ -52,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'rcm_project.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -143,6 +144,11 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Chunked claim file uploads (/api/uploads/): parts are streamed to MEDIA_ROOT
+CHUNKED_UPLOAD_MAX_BYTES = int(os.getenv('CHUNKED_UPLOAD_MAX_BYTES', str(500 * 1024 * 1024)))
+UPLOAD_PART_MAX_BYTES = int(os.getenv('UPLOAD_PART_MAX_BYTES', str(8 * 1024 * 1024)))
+UPLOAD_MAX_PARTS = int(os.getenv('UPLOAD_MAX_PARTS', '10000'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -165,6 +171,9 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Rows fetched per server-side cursor round trip by /api/claims/export/
+CLAIMS_EXPORT_CHUNK_SIZE = int(os.getenv('CLAIMS_EXPORT_CHUNK_SIZE', '2000'))
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=24),
@@ -185,6 +194,64 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+# process_claims_file is acked late, so a job whose worker dies is redelivered and
+# resumes from its last checkpoint. Redis redelivers unacked messages after the
+# visibility timeout, which must therefore exceed the longest job.
+CELERY_BROKER_TRANSPORT_OPTIONS = {'visibility_timeout': int(os.getenv('CELERY_VISIBILITY_TIMEOUT', str(6 * 60 * 60)))}
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Worker processes per queue for workers started with a single -Q (see rcm_project/celery.py)
+CELERY_QUEUE_CONCURRENCY = {
+    'interactive': int(os.getenv('CELERY_INTERACTIVE_CONCURRENCY', '4')),
+    'bulk': int(os.getenv('CELERY_BULK_CONCURRENCY', '2')),
+    'llm': int(os.getenv('CELERY_LLM_CONCURRENCY', '8')),
+}
+# Most claims accepted by one synchronous POST /api/claims/validate/ request
+VALIDATE_MAX_CLAIMS = int(os.getenv('VALIDATE_MAX_CLAIMS', '100'))
+# Uploads with up to this many (estimated) rows run on the interactive queue
+INTERACTIVE_MAX_ROWS = int(os.getenv('INTERACTIVE_MAX_ROWS', '5000'))
+# Row estimate for claims files without a stored worksheet dimension
+CLAIMS_FILE_BYTES_PER_ROW = 64
+
+# Rows of an uploaded claims file processed per chunk by process_claims_file
+INGEST_CHUNK_SIZE = int(os.getenv('INGEST_CHUNK_SIZE', '500'))
+# A processing job whose run has not claimed it or committed a chunk for this long is
+# considered interrupted: it can be resumed, and a new run may take it over
+JOB_HEARTBEAT_TIMEOUT_SECONDS = int(os.getenv('JOB_HEARTBEAT_TIMEOUT_SECONDS', '900'))
+
+# POST /api/jobs/ingest/ queues a micro-batch every INGEST_MICRO_BATCH_SIZE claims,
+# or with whatever arrived once INGEST_MICRO_BATCH_SECONDS have passed
+INGEST_MICRO_BATCH_SIZE = int(os.getenv('INGEST_MICRO_BATCH_SIZE', '500'))
+INGEST_MICRO_BATCH_SECONDS = float(os.getenv('INGEST_MICRO_BATCH_SECONDS', '2'))
+
+# Claims loaded, validated and written back per transaction by revalidate_all_claims
+REVALIDATION_BATCH_SIZE = int(os.getenv('REVALIDATION_BATCH_SIZE', '500'))
+# Claim ids per revalidate_claim_shard task; shards run in parallel across workers
+REVALIDATION_SHARD_SIZE = int(os.getenv('REVALIDATION_SHARD_SIZE', '5000'))
+# Redis holding shared task progress counters and job progress snapshots/events
+PROGRESS_REDIS_URL = os.getenv('PROGRESS_REDIS_URL', CELERY_RESULT_BACKEND)
+# /api/jobs/{id}/events/: keepalive comment interval and maximum stream length (clients reconnect)
+JOB_EVENTS_KEEPALIVE_SECONDS = 15
+JOB_EVENTS_MAX_SECONDS = int(os.getenv('JOB_EVENTS_MAX_SECONDS', '300'))
+
+# Redis channel for rules cache invalidations (rules/cache.py)
+RULES_CACHE_REDIS_URL = os.getenv('RULES_CACHE_REDIS_URL', CELERY_RESULT_BACKEND)
+# Compiled rule plans each worker process keeps (one per RuleSet version in use)
+RULES_CACHE_SIZE = int(os.getenv('RULES_CACHE_SIZE', '8'))
+
+# Largest sample of flipped claim ids a rule set impact analysis returns
+RULE_SET_IMPACT_MAX_SAMPLE = int(os.getenv('RULE_SET_IMPACT_MAX_SAMPLE', '1000'))
+
+# Rule PDFs with at least this many pages are extracted in a process pool
+# (rules/pdf_text.py) of RULE_PDF_WORKERS processes (0 = one per CPU); 0 disables it
+RULE_PDF_PARALLEL_MIN_PAGES = int(os.getenv('RULE_PDF_PARALLEL_MIN_PAGES', '40'))
+RULE_PDF_WORKERS = int(os.getenv('RULE_PDF_WORKERS', '0'))
+
+# Prometheus metrics (rcm_project/monitoring.py): bearer token for /metrics, which
+# without a token is only served when METRICS_PUBLIC (default: in DEBUG), and the
+# port a Celery worker serves its own metrics on (0 = off; needs PROMETHEUS_MULTIPROC_DIR)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_PUBLIC = os.getenv('METRICS_PUBLIC', str(DEBUG)).lower() == 'true'
+CELERY_METRICS_PORT = int(os.getenv('CELERY_METRICS_PORT', '0'))
 
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
@@ -1,6 +1,10 @@
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
 from django.views.decorators.http import require_http_methods
 
+from . import monitoring
+
 
 @require_http_methods(["GET"])
 def health_check(request):
@@ -11,3 +15,18 @@ def health_check(request):
         'version': '1.0.0'
     })
 
+
+@require_http_methods(["GET"])
+def metrics(request):
+    """
+    Prometheus scrape endpoint: requires ``Authorization: Bearer <METRICS_TOKEN>``,
+    and without a token is only served with METRICS_PUBLIC (by default in DEBUG)
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.METRICS_PUBLIC:
+            return HttpResponse('Set METRICS_TOKEN to enable /metrics', status=403, content_type='text/plain')
+    elif not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    body, content_type = monitoring.render()
+    return HttpResponse(body, content_type=content_type)
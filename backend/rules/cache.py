@@ -0,0 +1,157 @@
+"""
+Per-process cache of compiled rules.
+
+Parsing the rule PDFs dominates the start of every job and revalidation
+shard, so each worker process keeps the compiled plans it has built
+(``get_plan``), keyed by the rule sources: RuleSet id and ``updated_at``
+plus the SHA-256 of each rules file (see ``claims.tasks.rules_cache_key``).
+Jobs bound to different RuleSets run side by side, so up to RULES_CACHE_SIZE
+plans are kept, least recently used evicted first. The active RuleSet lookup
+itself is memoised too (``active_ruleset``).
+
+Saving or deleting a RuleSet (``set_active`` included) broadcasts an
+invalidation over Redis pub/sub (rules/signals.py). Every process listens on
+a background thread and drops its plans and memoised lookup on each
+message, so a change applies to the next job everywhere within a second.
+The active RuleSet is only memoised while that subscription is live; without
+Redis it is looked up on every call, and plans are still keyed by
+``updated_at`` and file hashes, so a stale plan is never used.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+from django.conf import settings
+
+from rcm_project import monitoring
+
+CHANNEL = 'rcm:rules:invalidate'
+# Pause before resubscribing after the Redis connection is lost
+RETRY_SECONDS = 5
+
+_lock = threading.Lock()
+_plans = OrderedDict()
+_active = {}
+_file_hashes = {}
+_generation = 0
+_subscribed = threading.Event()
+_listener_pid = None
+
+
+def get_client():
+    return redis.Redis.from_url(settings.RULES_CACHE_REDIS_URL)
+
+
+def invalidate():
+    """Drop this process's compiled plans and memoised active RuleSet"""
+    global _generation
+    with _lock:
+        _generation += 1
+        _plans.clear()
+        _active.clear()
+
+
+def broadcast_invalidation():
+    """Invalidate here and publish to every other process; Redis errors are logged, never raised"""
+    invalidate()
+    try:
+        get_client().publish(CHANNEL, 'invalidate')
+    except Exception as e:
+        print(f"Could not broadcast rules cache invalidation: {str(e)}")
+
+
+def get_plan(key, build):
+    """Cached plan for ``key``, else ``build()`` (not cached if invalidated meanwhile)"""
+    ensure_listener()
+    with _lock:
+        plan = _plans.get(key)
+        if plan is not None:
+            _plans.move_to_end(key)
+        generation = _generation
+    if plan is not None:
+        monitoring.record_cache('rules', hits=1)
+        return plan
+    monitoring.record_cache('rules', misses=1)
+
+    plan = build()
+    with _lock:
+        if generation == _generation:
+            _plans[key] = plan
+            while len(_plans) > max(settings.RULES_CACHE_SIZE, 1):
+                _plans.popitem(last=False)
+    return plan
+
+
+def active_ruleset():
+    """The active RuleSet (or None), memoised while invalidations are being received"""
+    from .models import RuleSet
+
+    ensure_listener()
+    with _lock:
+        if _subscribed.is_set() and 'ruleset' in _active:
+            return _active['ruleset']
+        generation = _generation
+
+    ruleset = RuleSet.objects.filter(is_active=True).first()
+    with _lock:
+        if _subscribed.is_set() and generation == _generation:
+            _active['ruleset'] = ruleset
+    return ruleset
+
+
+def file_hash(path):
+    """SHA-256 of a rules file, rehashed only when its size or mtime changes ('' if missing)"""
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError, ValueError):
+        return ''
+    signature = (path, stat.st_size, stat.st_mtime_ns)
+    digest = _file_hashes.get(signature)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as rules_file:
+            for block in iter(lambda: rules_file.read(1 << 20), b''):
+                sha.update(block)
+        digest = sha.hexdigest()
+        _file_hashes[signature] = digest
+    return digest
+
+
+def ensure_listener():
+    """Start the invalidation listener of this process (again after a fork)"""
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _lock:
+        if _listener_pid == os.getpid():
+            return
+        _listener_pid = os.getpid()
+        _subscribed.clear()
+        _plans.clear()
+        _active.clear()
+    threading.Thread(target=_listen, name='rules-cache-invalidation', daemon=True).start()
+
+
+def _listen():
+    reported = False
+    while True:
+        try:
+            pubsub = get_client().pubsub()
+            pubsub.subscribe(CHANNEL)
+            for message in pubsub.listen():
+                if message['type'] == 'subscribe':
+                    # Anything memoised before the subscription may have missed an update
+                    invalidate()
+                    _subscribed.set()
+                    reported = False
+                elif message['type'] == 'message':
+                    invalidate()
+        except Exception as e:
+            _subscribed.clear()
+            if not reported:
+                print(f"Rules cache invalidation listener disconnected, retrying: {str(e)}")
+                reported = True
+            time.sleep(RETRY_SECONDS)
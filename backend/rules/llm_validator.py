@@ -1,8 +1,11 @@
 import os
+import time
 from typing import Dict, Any
 from openai import OpenAI
 from django.conf import settings
 
+from rcm_project.monitoring import LLM_REQUEST_SECONDS
+
 
 class LLMValidator:
     """Use LLM to validate claims and provide additional insights"""
@@ -38,21 +41,27 @@ class LLMValidator:
             prompt = self._build_prompt(claim_data, static_validation_result)
             
             # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",  # Using mini for cost efficiency
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a medical claims validation expert. Analyze claims and provide clear, actionable feedback."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.3,
-                max_tokens=500
-            )
+            started = time.perf_counter()
+            try:
+                response = self.client.chat.completions.create(
+                    model="gpt-4o-mini",  # Using mini for cost efficiency
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are a medical claims validation expert. Analyze claims and provide clear, actionable feedback."
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    temperature=0.3,
+                    max_tokens=500
+                )
+            except Exception:
+                LLM_REQUEST_SECONDS.labels(outcome='error').observe(time.perf_counter() - started)
+                raise
+            LLM_REQUEST_SECONDS.labels(outcome='success').observe(time.perf_counter() - started)
             
             llm_response = response.choices[0].message.content
             
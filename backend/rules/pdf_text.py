@@ -0,0 +1,130 @@
+"""
+Text extraction for rule PDFs.
+
+Each PDF is read once into a ``RuleDocument``: the page texts, the full text
+and its lines. Parsers share the document instead of re-extracting or
+re-splitting the text, and their section scanners (``LineScanner``) all
+advance together in one pass over the lines (``RuleDocument.scan``).
+
+Pages are concatenated without a separator, exactly as the parsers have
+always read them, so parsed rules (and their fingerprint) do not change.
+
+PDFs with at least RULE_PDF_PARALLEL_MIN_PAGES pages are extracted in a
+process pool of RULE_PDF_WORKERS processes, one contiguous page range per
+process, and reassembled in page order. Daemonic processes (Celery prefork
+children) cannot start a pool and always extract sequentially.
+"""
+import math
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, Optional
+
+import pdfplumber
+from django.conf import settings
+
+
+class RuleDocument:
+    """Extracted text of one rule PDF, indexed by page and line"""
+
+    def __init__(self, pages: List[str]):
+        self.pages = pages
+        self.text = ''.join(pages)
+        self.lines = self.text.split('\n')
+    
+    def scan(self, scanners: Iterable['LineScanner']):
+        """Feed every line to all scanners in one pass, dropping each once it has finished"""
+        active = list(scanners)
+        for line in self.lines:
+            if not active:
+                break
+            active = [scanner for scanner in active if scanner.feed(line)]
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[str]:
+    """Text of pages start..end-1 ('' for pages without text); runs in pool processes"""
+    with pdfplumber.open(pdf_path) as pdf:
+        return [page.extract_text() or '' for page in pdf.pages[start:end]]
+
+
+def page_ranges(page_count: int, parts: int):
+    """Split 0..page_count into at most ``parts`` contiguous (start, end) ranges"""
+    size = max(math.ceil(page_count / max(parts, 1)), 1)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def extract_pages(pdf_path: str, min_parallel_pages: int = None, workers: int = None) -> List[str]:
+    """
+    Text of each page of the PDF ('' for pages without text)
+    
+    Large PDFs are extracted in a process pool (see module docstring);
+    in daemonic processes, or if the pool fails, the pages are extracted
+    in this process.
+    """
+    if min_parallel_pages is None:
+        min_parallel_pages = settings.RULE_PDF_PARALLEL_MIN_PAGES
+    if workers is None:
+        workers = settings.RULE_PDF_WORKERS or os.cpu_count() or 1
+    
+    with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        if (workers < 2 or not min_parallel_pages or page_count < min_parallel_pages
+                or multiprocessing.current_process().daemon):
+            return [page.extract_text() or '' for page in pdf.pages]
+    
+    ranges = page_ranges(page_count, workers)
+    try:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            parts = pool.map(
+                _extract_page_range, [pdf_path] * len(ranges),
+                [start for start, _ in ranges], [end for _, end in ranges],
+            )
+            return [text for part in parts for text in part]
+    except Exception as e:
+        print(f"Parallel extraction of {pdf_path} failed, extracting sequentially: {str(e)}")
+        return _extract_page_range(pdf_path, 0, page_count)
+
+
+def extract_document(pdf_path: str) -> RuleDocument:
+    return RuleDocument(extract_pages(pdf_path))
+
+
+class LineScanner:
+    """
+    Incremental scan of a table in the document's lines.
+
+    A line containing any of ``start_markers`` (re)opens the table and is
+    skipped; without start markers the table is open from the first line.
+    While the table is open, each line matching ``row_pattern`` is passed to
+    ``on_row`` as a match (every match in the line with ``find_all``); the
+    first non-matching line for which ``is_end(line)`` is true closes the
+    scan for good.
+    """
+
+    def __init__(self, start_markers: Iterable[str], row_pattern, on_row: Callable[[re.Match], None],
+                 is_end: Callable[[str], bool], find_all: bool = False):
+        self.start_markers = tuple(start_markers)
+        self.row_pattern = re.compile(row_pattern)
+        self.on_row = on_row
+        self.is_end = is_end
+        self.find_all = find_all
+        self.in_table = not self.start_markers
+
+    def feed(self, line: str) -> bool:
+        """Consume one line; returns False once the table has ended"""
+        if any(marker in line for marker in self.start_markers):
+            self.in_table = True
+            return True
+        if not self.in_table:
+            return True
+        if self.find_all:
+            matches = list(self.row_pattern.finditer(line))
+        else:
+            match: Optional[re.Match] = self.row_pattern.search(line)
+            matches = [match] if match else []
+        if matches:
+            for match in matches:
+                self.on_row(match)
+            return True
+        return not self.is_end(line)
@@ -1,8 +1,9 @@
-import pdfplumber
 import re
 from typing import Dict, List, Any
 from pathlib import Path
 
+from .pdf_text import LineScanner, RuleDocument, extract_document
+
 
 class TechnicalRuleParser:
     """Parse technical adjudication rules from PDF"""
@@ -18,66 +19,50 @@ class TechnicalRuleParser:
     
     def parse(self) -> Dict[str, Any]:
         """Extract rules from PDF"""
-        with pdfplumber.open(self.pdf_path) as pdf:
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-        
-        self._parse_service_approvals(text)
-        self._parse_diagnosis_approvals(text)
-        self._parse_amount_threshold(text)
-        self._parse_id_format_rules(text)
+        return self.parse_document(extract_document(self.pdf_path))
+    
+    def parse_document(self, document: RuleDocument) -> Dict[str, Any]:
+        """Extract rules from an already extracted PDF; the tables are read in one pass"""
+        document.scan([
+            self._service_approvals_scanner(),
+            self._diagnosis_approvals_scanner(),
+        ])
+        self._parse_amount_threshold(document.text)
+        self._parse_id_format_rules(document.text)
         
         return self.rules
     
-    def _parse_service_approvals(self, text: str):
+    def _service_approvals_scanner(self) -> LineScanner:
         """Parse service codes requiring approval"""
-        # Look for service code table
-        lines = text.split('\n')
-        in_service_table = False
+        def add_service(match):
+            self.rules['service_approvals'][match.group(1).strip()] = {
+                'description': match.group(2).strip(),
+                'requires_approval': match.group(3).strip() == 'YES'
+            }
         
-        for i, line in enumerate(lines):
-            if 'Services Requiring Prior Approval' in line or 'Service Code' in line:
-                in_service_table = True
-                continue
-            
-            if in_service_table:
-                # Match service codes like SRV1001, SRV2001, etc.
-                match = re.search(r'(SRV\d+)\s+([A-Za-z\s]+?)\s+(YES|NO)', line)
-                if match:
-                    service_code = match.group(1).strip()
-                    description = match.group(2).strip()
-                    requires_approval = match.group(3).strip() == 'YES'
-                    self.rules['service_approvals'][service_code] = {
-                        'description': description,
-                        'requires_approval': requires_approval
-                    }
-                elif 'Diagnosis Codes' in line or 'Paid Amount' in line:
-                    break
-    
-    def _parse_diagnosis_approvals(self, text: str):
+        # Service code table rows like "SRV1001 ... YES"
+        return LineScanner(
+            ('Services Requiring Prior Approval', 'Service Code'),
+            r'(SRV\d+)\s+([A-Za-z\s]+?)\s+(YES|NO)',
+            add_service,
+            is_end=lambda line: 'Diagnosis Codes' in line or 'Paid Amount' in line,
+        )
+    
+    def _diagnosis_approvals_scanner(self) -> LineScanner:
         """Parse diagnosis codes requiring approval"""
-        lines = text.split('\n')
-        in_diagnosis_table = False
+        def add_diagnosis(match):
+            self.rules['diagnosis_approvals'][match.group(1).strip()] = {
+                'description': match.group(2).strip(),
+                'requires_approval': match.group(3).strip() == 'YES'
+            }
         
-        for i, line in enumerate(lines):
-            if 'Diagnosis Codes Requiring Approval' in line or 'Diagnosis Code' in line:
-                in_diagnosis_table = True
-                continue
-            
-            if in_diagnosis_table:
-                # Match diagnosis codes like E11.9, R07.9, etc.
-                match = re.search(r'([A-Z]\d+\.\d+)\s+([A-Za-z\s]+?)\s+(YES|NO)', line)
-                if match:
-                    diagnosis_code = match.group(1).strip()
-                    description = match.group(2).strip()
-                    requires_approval = match.group(3).strip() == 'YES'
-                    self.rules['diagnosis_approvals'][diagnosis_code] = {
-                        'description': description,
-                        'requires_approval': requires_approval
-                    }
-                elif 'Paid Amount' in line or 'ID & Unique ID' in line:
-                    break
+        # Diagnosis code rows like "E11.9 ... YES"
+        return LineScanner(
+            ('Diagnosis Codes Requiring Approval', 'Diagnosis Code'),
+            r'([A-Z]\d+\.\d+)\s+([A-Za-z\s]+?)\s+(YES|NO)',
+            add_diagnosis,
+            is_end=lambda line: 'Paid Amount' in line or 'ID & Unique ID' in line,
+        )
     
     def _parse_amount_threshold(self, text: str):
         """Parse paid amount threshold"""
@@ -110,101 +95,102 @@ class MedicalRuleParser:
     
     def parse(self) -> Dict[str, Any]:
         """Extract rules from PDF"""
-        with pdfplumber.open(self.pdf_path) as pdf:
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-        
-        self._parse_encounter_type_restrictions(text)
-        self._parse_facility_type_restrictions(text)
-        self._parse_diagnosis_requirements(text)
-        self._parse_facility_registry(text)
-        self._parse_mutually_exclusive_diagnoses(text)
+        return self.parse_document(extract_document(self.pdf_path))
+    
+    def parse_document(self, document: RuleDocument) -> Dict[str, Any]:
+        """Extract rules from an already extracted PDF; all sections are read in one pass"""
+        self.rules['facility_registry'] = {}
+        document.scan([
+            self._encounter_type_scanner('Inpatient-only services:', 'inpatient',
+                                         is_end=lambda line: 'Outpatient-only services:' in line),
+            self._encounter_type_scanner('Outpatient-only services:', 'outpatient',
+                                         is_end=lambda line: 'B.' in line or 'Services limited by Facility' in line),
+            FacilityTypeScanner(self.rules['facility_type_restrictions']),
+            self._diagnosis_requirements_scanner(),
+            self._facility_registry_scanner(),
+            self._mutually_exclusive_scanner(),
+        ])
         
         return self.rules
     
-    def _parse_encounter_type_restrictions(self, text: str):
-        """Parse encounter type restrictions"""
-        # Inpatient-only services
-        inpatient_match = re.search(r'Inpatient-only services:([\s\S]*?)Outpatient-only services:', text)
-        if inpatient_match:
-            services = re.findall(r'(SRV\d+)', inpatient_match.group(1))
-            for service in services:
-                self.rules['encounter_type_restrictions'][service] = 'inpatient'
-        
-        # Outpatient-only services
-        outpatient_match = re.search(r'Outpatient-only services:([\s\S]*?)(?:B\.|Services limited by Facility)', text)
-        if outpatient_match:
-            services = re.findall(r'(SRV\d+)', outpatient_match.group(1))
-            for service in services:
-                self.rules['encounter_type_restrictions'][service] = 'outpatient'
-    
-    def _parse_facility_type_restrictions(self, text: str):
-        """Parse facility type restrictions"""
-        # Parse facility type mappings
-        facility_patterns = [
-            (r'MATERNITY_HOSPITAL:\s*([SRV\d,\s]+)', 'MATERNITY_HOSPITAL'),
-            (r'DIALYSIS_CENTER:\s*([SRV\d,\s]+)', 'DIALYSIS_CENTER'),
-            (r'CARDIOLOGY_CENTER:\s*([SRV\d,\s]+)', 'CARDIOLOGY_CENTER'),
-            (r'GENERAL_HOSPITAL:\s*([SRV\d,\s]+)', 'GENERAL_HOSPITAL'),
-        ]
+    def _encounter_type_scanner(self, start_marker: str, encounter_type: str, is_end) -> LineScanner:
+        """Parse services restricted to one encounter type"""
+        def add_service(match):
+            self.rules['encounter_type_restrictions'][match.group(0)] = encounter_type
         
-        for pattern, facility_type in facility_patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
-                services = re.findall(r'(SRV\d+)', match)
-                for service in services:
-                    if service not in self.rules['facility_type_restrictions']:
-                        self.rules['facility_type_restrictions'][service] = []
-                    self.rules['facility_type_restrictions'][service].append(facility_type)
-    
-    def _parse_facility_registry(self, text: str):
+        # Every service code listed under the heading, up to the next heading
+        return LineScanner((start_marker,), r'SRV\d+', add_service, is_end=is_end, find_all=True)
+    
+    def _facility_registry_scanner(self) -> LineScanner:
         """Parse facility ID to facility type mapping"""
-        # Extract facility registry table
-        facility_registry = {}
-        lines = text.split('\n')
-        in_registry = False
-        
-        for line in lines:
-            if 'Facility Registry' in line or 'IDs present in claims' in line:
-                in_registry = True
-                continue
-            
-            if in_registry:
-                # Match facility ID and type: "0DBYE6KP DIALYSIS_CENTER"
-                match = re.search(r'([A-Z0-9]{8,})\s+([A-Z_]+)', line)
-                if match:
-                    facility_id = match.group(1).strip()
-                    facility_type = match.group(2).strip()
-                    facility_registry[facility_id] = facility_type
-                elif line.strip() and not match:
-                    # End of registry
-                    break
+        def add_facility(match):
+            self.rules['facility_registry'][match.group(1).strip()] = match.group(2).strip()
         
-        self.rules['facility_registry'] = facility_registry
+        # Registry rows like "0DBYE6KP DIALYSIS_CENTER"; the first other non-blank line ends it
+        return LineScanner(
+            ('Facility Registry', 'IDs present in claims'),
+            r'([A-Z0-9]{8,})\s+([A-Z_]+)',
+            add_facility,
+            is_end=lambda line: bool(line.strip()),
+        )
     
-    def _parse_diagnosis_requirements(self, text: str):
+    def _diagnosis_requirements_scanner(self) -> LineScanner:
         """Parse services requiring specific diagnoses"""
-        # Pattern: "E11.9 Diabetes Mellitus: SRV2007 HbA1c Test"
-        pattern = r'([A-Z]\d+\.\d+)\s+[^:]+:\s*(SRV\d+)'
-        matches = re.findall(pattern, text)
-        
-        for diagnosis_code, service_code in matches:
+        def add_requirement(match):
+            diagnosis_code, service_code = match.groups()
             if service_code not in self.rules['diagnosis_requirements']:
                 self.rules['diagnosis_requirements'][service_code] = []
             self.rules['diagnosis_requirements'][service_code].append(diagnosis_code)
+        
+        # Pattern: "E11.9 Diabetes Mellitus: SRV2007 HbA1c Test"
+        return LineScanner((), r'([A-Z]\d+\.\d+)\s+[^:]+:\s*(SRV\d+)', add_requirement,
+                           is_end=lambda line: False, find_all=True)
     
-    def _parse_mutually_exclusive_diagnoses(self, text: str):
+    def _mutually_exclusive_scanner(self) -> LineScanner:
         """Parse mutually exclusive diagnoses"""
-        # Pattern: "R73.03 Prediabetes cannot coexist with E11.9 Diabetes Mellitus"
-        # Pattern: "E66.9 Obesity cannot coexist with E66.3 Overweight"
-        # Pattern: "R51 Headache cannot coexist with G43.9 Migraine"
-        pattern = r'([A-Z]\d+\.?\d*)\s+[^c]+cannot coexist with\s+([A-Z]\d+\.?\d*)'
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        
-        for diag1, diag2 in matches:
+        def add_pair(match):
             # Add both directions (diag1 + diag2 and diag2 + diag1)
-            pair = tuple(sorted([diag1.strip(), diag2.strip()]))
+            pair = tuple(sorted([match.group(1).strip(), match.group(2).strip()]))
             if pair not in self.rules['mutually_exclusive']:
                 self.rules['mutually_exclusive'].append(pair)
+        
+        # Pattern: "R73.03 Prediabetes cannot coexist with E11.9 Diabetes Mellitus"
+        # Pattern: "E66.9 Obesity cannot coexist with E66.3 Overweight"
+        # Pattern: "R51 Headache cannot coexist with G43.9 Migraine"
+        pattern = re.compile(r'([A-Z]\d+\.?\d*)\s+[^c]+cannot coexist with\s+([A-Z]\d+\.?\d*)', re.IGNORECASE)
+        return LineScanner((), pattern, add_pair, is_end=lambda line: False, find_all=True)
 
+
+class FacilityTypeScanner:
+    """
+    Scan of "FACILITY_TYPE: SRV..., SRV..." lines for facility type restrictions.
+    
+    Fed by ``RuleDocument.scan`` like a ``LineScanner``. A service list that
+    runs to the end of its line continues on the next line.
+    """
+    
+    FACILITY_TYPES = ('MATERNITY_HOSPITAL', 'DIALYSIS_CENTER', 'CARDIOLOGY_CENTER', 'GENERAL_HOSPITAL')
+    ENTRY = re.compile(r'(' + '|'.join(FACILITY_TYPES) + r'):\s*([SRV\d,\s]*)')
+    CONTINUATION = re.compile(r'[SRV\d,\s]*')
+    
+    def __init__(self, restrictions: Dict[str, List[str]]):
+        self.restrictions = restrictions
+        self.continuing = None
+    
+    def feed(self, line: str) -> bool:
+        if self.continuing:
+            services = self.CONTINUATION.match(line).group(0)
+            self._add(self.continuing, services)
+            if len(services) == len(line):
+                return True
+            self.continuing = None
+        for match in self.ENTRY.finditer(line):
+            self._add(match.group(1), match.group(2))
+            self.continuing = match.group(1) if match.end() == len(line) else None
+        return True
+    
+    def _add(self, facility_type: str, services: str):
+        for service in re.findall(r'(SRV\d+)', services):
+            if service not in self.restrictions:
+                self.restrictions[service] = []
+            self.restrictions[service].append(facility_type)
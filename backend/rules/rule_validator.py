@@ -1,7 +1,24 @@
 import re
+import json
+import hashlib
 from typing import Dict, List, Tuple, Any
 from decimal import Decimal
 
+from rcm_project.monitoring import RULE_EVALUATION_SECONDS
+
+# Bump whenever validation logic changes, so results stored under an older
+# fingerprint are treated as stale even if the rules themselves are unchanged
+VALIDATOR_VERSION = 1
+
+
+def rules_fingerprint(technical_rules: Dict, medical_rules: Dict) -> str:
+    """SHA-256 of the compiled technical and medical rules (threshold included)"""
+    payload = json.dumps(
+        {'version': VALIDATOR_VERSION, 'technical': technical_rules, 'medical': medical_rules},
+        sort_keys=True, separators=(',', ':'), default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
 
 class RuleValidator:
     """Validate claims against technical and medical rules"""
@@ -9,7 +26,14 @@ class RuleValidator:
     def __init__(self, technical_rules: Dict, medical_rules: Dict):
         self.technical_rules = technical_rules
         self.medical_rules = medical_rules
+        # Identifies the rule version that produced a validation result
+        self.fingerprint = rules_fingerprint(technical_rules, medical_rules)
+    
+    def validate_claims(self, claims_data: List[Dict]) -> List[Dict[str, Any]]:
+        """Validate a batch of claims; results are in the same order as the input"""
+        return [self.validate_claim(claim_data) for claim_data in claims_data]
     
+    @RULE_EVALUATION_SECONDS.time()
     def validate_claim(self, claim_data: Dict) -> Dict[str, Any]:
         """
         Validate a single claim and return results
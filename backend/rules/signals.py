@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache
+from .models import RuleSet
+
+
+@receiver(post_save, sender=RuleSet)
+@receiver(post_delete, sender=RuleSet)
+def invalidate_rules_cache(sender, **kwargs):
+    """Drop compiled rules in every worker once the change is committed (see rules/cache.py)"""
+    transaction.on_commit(cache.broadcast_invalidation)
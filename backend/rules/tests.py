@@ -1,5 +1,9 @@
+from unittest import mock
+
 from django.test import TestCase
 from .rule_validator import RuleValidator
+from .pdf_text import RuleDocument, extract_pages, page_ranges
+from .rule_parser import MedicalRuleParser, TechnicalRuleParser
 
 
 class RuleValidatorTest(TestCase):
@@ -43,3 +47,63 @@ class RuleValidatorTest(TestCase):
         self.assertEqual(result['status'], 'not_validated')
         self.assertEqual(result['error_type'], 'technical_error')
         self.assertGreater(len(result['errors']), 0)
+
+
+
+class RuleDocumentParserTest(TestCase):
+    def test_tables_are_parsed_from_shared_document(self):
+        # Pages are joined without a separator, as pdfplumber text always was
+        document = RuleDocument([
+            'Services Requiring Prior Approval\nSRV1001 Major Surgery YES\nSRV2001 ECG NO\n',
+            'Diagnosis Codes Requiring Approval\nE11.9 Diabetes Mellitus YES\nPaid Amount\n'
+            'Approval required when paid_amount_aed > AED 300\n',
+        ])
+        rules = TechnicalRuleParser('unused.pdf').parse_document(document)
+        self.assertEqual(set(rules['service_approvals']), {'SRV1001', 'SRV2001'})
+        self.assertTrue(rules['service_approvals']['SRV1001']['requires_approval'])
+        self.assertEqual(set(rules['diagnosis_approvals']), {'E11.9'})
+        self.assertEqual(rules['amount_threshold'], 300.0)
+    
+    def test_facility_registry_ends_at_first_other_line(self):
+        document = RuleDocument([
+            'Facility Registry\n0DBYE6KP DIALYSIS_CENTER\n\n96GUDLMT GENERAL_HOSPITAL\nNotes\nAAAABBBB MATERNITY_HOSPITAL',
+        ])
+        rules = MedicalRuleParser('unused.pdf').parse_document(document)
+        self.assertEqual(rules['facility_registry'], {'0DBYE6KP': 'DIALYSIS_CENTER', '96GUDLMT': 'GENERAL_HOSPITAL'})
+    
+    def test_medical_sections_are_parsed_in_one_pass(self):
+        document = RuleDocument([
+            'Inpatient-only services:\nSRV1001 Major Surgery\nOutpatient-only services:\nSRV2001 ECG\n',
+            'B. Services limited by Facility Type\nDIALYSIS_CENTER: SRV1003\nGENERAL_HOSPITAL: SRV1001,\n'
+            'SRV2001\nE11.9 Diabetes Mellitus: SRV2007 HbA1c Test\n'
+            'R73.03 Prediabetes cannot coexist with E11.9 Diabetes Mellitus',
+        ])
+        rules = MedicalRuleParser('unused.pdf').parse_document(document)
+        self.assertEqual(rules['encounter_type_restrictions'], {'SRV1001': 'inpatient', 'SRV2001': 'outpatient'})
+        self.assertEqual(rules['facility_type_restrictions'], {
+            'SRV1003': ['DIALYSIS_CENTER'], 'SRV1001': ['GENERAL_HOSPITAL'], 'SRV2001': ['GENERAL_HOSPITAL'],
+        })
+        self.assertEqual(rules['diagnosis_requirements'], {'SRV2007': ['E11.9']})
+        self.assertEqual(rules['mutually_exclusive'], [('E11.9', 'R73.03')])
+
+    
+    def test_parallel_extraction_matches_sequential(self):
+        from django.conf import settings
+        pdf_path = str(settings.TENANT_CONFIG_PATH / 'Humaein_Medical_Rules.pdf')
+        self.assertEqual(page_ranges(5, 2), [(0, 3), (3, 5)])
+        self.assertEqual(page_ranges(2, 8), [(0, 1), (1, 2)])
+        sequential = extract_pages(pdf_path, min_parallel_pages=0)
+        self.assertEqual(extract_pages(pdf_path, min_parallel_pages=1, workers=2), sequential)
+    
+    def test_daemonic_process_extracts_sequentially(self):
+        from django.conf import settings
+        pdf_path = str(settings.TENANT_CONFIG_PATH / 'Humaein_Medical_Rules.pdf')
+        sequential = extract_pages(pdf_path, min_parallel_pages=0)
+        # Celery prefork children are daemonic and may not have children of their own
+        with mock.patch('rules.pdf_text.multiprocessing.current_process') as current_process, \
+                mock.patch('rules.pdf_text.ProcessPoolExecutor') as pool, \
+                mock.patch('builtins.print') as log:
+            current_process.return_value.daemon = True
+            self.assertEqual(extract_pages(pdf_path, min_parallel_pages=1, workers=2), sequential)
+        pool.assert_not_called()
+        log.assert_not_called()
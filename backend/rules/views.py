@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
 from rest_framework.filters import SearchFilter, OrderingFilter
 from .models import RuleSet, TechnicalRule, MedicalRule
 from .serializers import RuleSetSerializer, TechnicalRuleSerializer, MedicalRuleSerializer
@@ -61,6 +62,62 @@ class RuleSetViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(ruleset)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['post'])
+    def impact(self, request, pk=None):
+        """Dry run: how stored claims would change under this rule set (nothing is written)"""
+        return self._start_impact(request, {'rule_set_id': self.get_object().pk})
+    
+    @action(detail=True, methods=['post'])
+    def compare(self, request, pk=None):
+        """A/B dry run: this rule set against a baseline rule set, evaluated in one pass over the claims"""
+        ruleset = self.get_object()
+        if 'baseline' not in request.data:
+            # Default baseline: the rule set active now
+            baseline = RuleSet.objects.filter(is_active=True).first()
+        elif request.data['baseline'] in (None, ''):
+            baseline = None  # The default rule files
+        else:
+            try:
+                baseline = RuleSet.objects.filter(pk=request.data['baseline']).first()
+            except (TypeError, ValueError):
+                baseline = None
+            if baseline is None:
+                return Response({'error': f"RuleSet {request.data['baseline']} not found"}, status=status.HTTP_400_BAD_REQUEST)
+        return self._start_impact(request, {
+            'rule_set_id': ruleset.pk,
+            'compare': True,
+            'baseline_rule_set_id': baseline.pk if baseline else None,
+        })
+    
+    def _start_impact(self, request, kwargs):
+        from claims.tasks import rule_set_impact
+        
+        try:
+            sample_size = min(max(int(request.data.get('sample', 0)), 0), settings.RULE_SET_IMPACT_MAX_SAMPLE)
+        except (TypeError, ValueError):
+            return Response({'error': 'sample must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        kwargs['sample_size'] = sample_size
+        
+        try:
+            task = rule_set_impact.apply_async(kwargs=kwargs)
+            return Response({
+                'message': 'Impact analysis started',
+                'task_id': task.id,
+                'status': 'processing'
+            }, status=status.HTTP_202_ACCEPTED)
+        except Exception as e:
+            # If Celery is not running, evaluate synchronously
+            print(f"Celery not available ({str(e)}), evaluating impact synchronously...")
+            result = rule_set_impact.apply(kwargs=kwargs).get()
+            return Response(result, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get'], url_path=r'impact/(?P<task_id>[^/.]+)')
+    def impact_status(self, request, task_id=None):
+        """Progress or final summary of an impact analysis task"""
+        from claims.views import task_status_response
+        
+        return task_status_response(task_id)
+    
     @action(detail=False, methods=['get'], url_path='active', url_name='active')
     def active(self, request):
         """Get the currently active rule set"""
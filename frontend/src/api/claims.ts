@@ -1,5 +1,11 @@
 import api from './axios';
 
+// Job progress events are served by the ASGI process: behind nginx in production
+// (same /api prefix), on its own port in development (REACT_APP_EVENTS_URL)
+const EVENTS_BASE_URL = api.defaults.baseURL === '/api'
+  ? '/api'
+  : process.env.REACT_APP_EVENTS_URL || api.defaults.baseURL;
+
 export interface Claim {
   id: number;
   claim_id: string;
@@ -92,6 +98,91 @@ export const claimsAPI = {
     return response.data;
   },
   
+  // Follow job status over server-sent events, falling back to polling if the stream
+  // cannot be opened. Returns a function that stops watching.
+  watchJobStatus: (id: number, onStatus: (status: any) => void) => {
+    let stopped = false;
+    let pollTimer: ReturnType<typeof setInterval> | undefined;
+    const controller = new AbortController();
+    
+    const isFinished = (status: any) => status.status === 'completed' || status.status === 'failed';
+    const stop = () => {
+      stopped = true;
+      controller.abort();
+      if (pollTimer) clearInterval(pollTimer);
+    };
+    const poll = () => {
+      pollTimer = setInterval(async () => {
+        try {
+          const status = await claimsAPI.getJobStatus(id);
+          onStatus(status);
+          if (isFinished(status)) stop();
+        } catch (error) {
+          console.error('Failed to get job status:', error);
+          stop();
+        }
+      }, 2000);
+    };
+    
+    if (typeof ReadableStream === 'undefined' || typeof TextDecoder === 'undefined') {
+      poll();
+      return stop;
+    }
+    
+    // Read the stream with fetch rather than EventSource, so the access token travels in the
+    // Authorization header instead of the URL (and the access logs)
+    const follow = async () => {
+      while (!stopped) {
+        const response = await fetch(`${EVENTS_BASE_URL}/jobs/${id}/events/`, {
+          headers: {
+            Accept: 'text/event-stream',
+            Authorization: `Bearer ${localStorage.getItem('access_token') || ''}`,
+          },
+          signal: controller.signal,
+        });
+        if (!response.ok || !response.body) {
+          throw new Error(`Job events unavailable (${response.status})`);
+        }
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let retry = 0;
+        for (;;) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          let end = buffer.indexOf('\n\n');
+          while (end >= 0) {
+            for (const line of buffer.slice(0, end).split('\n')) {
+              if (line.startsWith('retry: ')) {
+                retry = Number(line.slice('retry: '.length));
+              } else if (line.startsWith('data: ')) {
+                const status = JSON.parse(line.slice('data: '.length));
+                onStatus(status);
+                if (isFinished(status)) {
+                  stop();
+                  return;
+                }
+              }
+            }
+            buffer = buffer.slice(end + 2);
+            end = buffer.indexOf('\n\n');
+          }
+        }
+        // The server closes long streams (and sends a retry delay when Redis is down): reconnect
+        await new Promise((resolve) => setTimeout(resolve, retry || 1000));
+      }
+    };
+    follow().catch((error) => {
+      if (!stopped) {
+        console.error('Job events failed, polling instead:', error);
+        poll();
+      }
+    });
+    return stop;
+  },
+  
   getJobs: async () => {
     const response = await api.get('/jobs/');
     return response.data;
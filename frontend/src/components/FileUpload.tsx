@@ -39,6 +39,7 @@ const FileUpload: React.FC<FileUploadProps> = ({ onUploadComplete }) => {
     accept: {
       'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': ['.xlsx'],
       'application/vnd.ms-excel': ['.xls'],
+      'text/csv': ['.csv'],
     },
   });
 
@@ -133,25 +134,16 @@ const FileUpload: React.FC<FileUploadProps> = ({ onUploadComplete }) => {
   };
 
   const pollJobStatus = async (jobId: number) => {
-    const interval = setInterval(async () => {
-      try {
-        const status = await claimsAPI.getJobStatus(jobId);
-        setJobStatus(status);
+    const stop = claimsAPI.watchJobStatus(jobId, (status) => {
+      setJobStatus(status);
 
-        if (status.status === 'completed' || status.status === 'failed') {
-          clearInterval(interval);
-          if (status.status === 'completed') {
-            onUploadComplete();
-          }
-        }
-      } catch (error) {
-        console.error('Failed to get job status:', error);
-        clearInterval(interval);
+      if (status.status === 'completed') {
+        onUploadComplete();
       }
-    }, 2000);
+    });
 
-    // Stop polling after 5 minutes
-    setTimeout(() => clearInterval(interval), 300000);
+    // Stop watching after 5 minutes
+    setTimeout(stop, 300000);
   };
 
   const formatFileSize = (bytes: number) => {
@@ -207,7 +199,7 @@ const FileUpload: React.FC<FileUploadProps> = ({ onUploadComplete }) => {
                   <div className="upload-icon">📤</div>
                   <p className="dropzone-text">Drag & drop an Excel file here</p>
                   <p className="dropzone-subtext">or click to browse</p>
-                  <p className="file-types">Supports .xlsx, .xls</p>
+                  <p className="file-types">Supports .xlsx, .xls, .csv</p>
                 </div>
             )}
           </div>
@@ -44,6 +44,7 @@ const UploadModal: React.FC<UploadModalProps> = ({ isOpen, onClose, onUploadComp
     accept: {
       'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': ['.xlsx'],
       'application/vnd.ms-excel': ['.xls'],
+      'text/csv': ['.csv'],
     },
     disabled: uploading || validating,
   });
@@ -117,39 +118,31 @@ const UploadModal: React.FC<UploadModalProps> = ({ isOpen, onClose, onUploadComp
   };
 
   const pollJobStatus = async (jobId: number) => {
-    const interval = setInterval(async () => {
-      try {
-        const status = await claimsAPI.getJobStatus(jobId);
-        setJobStatus(status);
-        
-        if (status.progress) {
-          const percentage = status.progress.percentage || 0;
-          setValidationProgress(percentage);
-        }
+    const stop = claimsAPI.watchJobStatus(jobId, (status) => {
+      setJobStatus(status);
+      
+      if (status.progress) {
+        const percentage = status.progress.percentage || 0;
+        setValidationProgress(percentage);
+      }
 
-        if (status.status === 'completed') {
-          clearInterval(interval);
-          setValidating(false);
-          setCurrentStep('complete');
-          
-          // Show completion for 2 seconds, then close
-          setTimeout(() => {
-            onUploadComplete();
-            handleClose();
-          }, 2000);
-        } else if (status.status === 'failed') {
-          clearInterval(interval);
-          setError('Validation failed. Please try again.');
-          setValidating(false);
-          setCurrentStep('upload');
-        }
-      } catch (error) {
-        console.error('Failed to get job status:', error);
-        clearInterval(interval);
+      if (status.status === 'completed') {
+        setValidating(false);
+        setCurrentStep('complete');
+        
+        // Show completion for 2 seconds, then close
+        setTimeout(() => {
+          onUploadComplete();
+          handleClose();
+        }, 2000);
+      } else if (status.status === 'failed') {
+        setError('Validation failed. Please try again.');
+        setValidating(false);
+        setCurrentStep('upload');
       }
-    }, 1000);
+    });
 
-    setTimeout(() => clearInterval(interval), 300000); // Stop after 5 minutes
+    setTimeout(stop, 300000); // Stop after 5 minutes
   };
 
   const formatFileSize = (bytes: number) => {
@@ -227,7 +220,7 @@ const UploadModal: React.FC<UploadModalProps> = ({ isOpen, onClose, onUploadComp
                         <div className="upload-icon">📤</div>
                         <p className="dropzone-text">Drag & drop Excel file</p>
                         <p className="dropzone-subtext">or click to browse</p>
-                        <p className="file-types">.xlsx, .xls</p>
+                        <p className="file-types">.xlsx, .xls, .csv</p>
                       </div>
                     )}
                   </div>
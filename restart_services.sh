@@ -11,7 +11,7 @@ BACKEND_PID=$!
 echo "Backend PID: $BACKEND_PID"
 
 echo "🚀 Starting Celery worker..."
-celery -A rcm_project worker --loglevel=info > ../celery.log 2>&1 &
+celery -A rcm_project worker --loglevel=info -Q interactive,bulk,llm > ../celery.log 2>&1 &
 CELERY_PID=$!
 echo "Celery PID: $CELERY_PID"
 
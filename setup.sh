@@ -33,7 +33,7 @@ echo "Setup complete! Next steps:"
 echo "1. Update backend/.env with your settings"
 echo "2. Start PostgreSQL and Redis"
 echo "3. Run 'cd backend && source venv/bin/activate && python manage.py runserver'"
-echo "4. In another terminal, run 'cd backend && source venv/bin/activate && celery -A rcm_project worker -l info'"
+echo "4. In another terminal, run 'cd backend && source venv/bin/activate && celery -A rcm_project worker -l info -Q interactive,bulk,llm'"
 echo "5. In another terminal, run 'cd frontend && npm start'"
 echo ""
 echo "Or use Docker: docker-compose up --build"